@@ -0,0 +1,96 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+from array import array
+from itertools import accumulate, chain
+
+from all_pairs_spf import COSTS_TYPECODE, OFFSETS_TYPECODE, TARGETS_TYPECODE
+from forwarding_table import EmulatorIndex
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class AdjacencyCache:
+    # Graph view of a LinkStateDatabase with every emulator as its dense EmulatorIndex id. sync() only re-reads the
+    # origins the LSDB changed since the generation last synced, so an SPF run after one new LSP does not walk the
+    # whole LSDB. The CSR arrays of the graph (see all_pairs_spf.CsrGraph) are built on first use after a change.
+
+    def __init__(self, lsdb, emulator_index=None):
+        self.lsdb = lsdb
+        self.emulator_index = emulator_index if emulator_index is not None else EmulatorIndex()
+        self.generation = None  # LSDB generation synced up to, None before the first sync
+        self.targets = []       # id -> tuple of neighbor ids
+        self.costs = []         # id -> tuple of the cost of the link to each neighbor
+        self.arrays = None      # (offsets, targets, costs) CSR arrays, None once the links changed
+        self.dirty = set()      # Origins whose links changed since the last get_dirty()
+
+    def __len__(self):
+        return len(self.emulator_index)
+
+    def get_generation(self):
+        return self.generation
+
+    def sync(self):
+        # Catch up with the LSDB, returns the origins whose links changed
+        changed = self.lsdb.get_changed_since(self.generation) if self.generation is not None else list(self.lsdb.get_origins())
+        if changed is None:
+            # Too far behind for the LSDB's change log - re-read every origin and drop the links of the ones it no
+            # longer holds. Links set from outside the LSDB, like the router's own, have to be set again after.
+            changed = list(self.lsdb.get_origins())
+            changed.extend(address for address, targets in zip(self.emulator_index.addresses, self.targets) if targets and address not in self.lsdb)
+        self.generation = self.lsdb.get_generation()
+
+        return [origin for origin in changed if self.set_links(origin, self.lsdb.get_links(origin))]
+
+    def set_links(self, origin, links):
+        # Replace an origin's ((ip, port), cost) links - also how links not in the LSDB get in, like the router's
+        # own. Returns True if they changed.
+        get_id = self.emulator_index.get_id
+        node = get_id(*origin)
+        targets = tuple(get_id(*neighbor) for neighbor, _ in links)
+        costs = tuple(cost for _, cost in links)
+        self.__grow()
+        if self.targets[node] == targets and self.costs[node] == costs:
+            return False
+
+        self.targets[node] = targets
+        self.costs[node] = costs
+        self.arrays = None
+        self.dirty.add(origin)
+        return True
+
+    def get_dirty(self):
+        # Origins whose links changed since the last call
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def __grow(self):
+        # Emulators interned since, here or by a forwarding table sharing the index, have no links yet
+        missing = len(self.emulator_index) - len(self.targets)
+        if missing > 0:
+            self.targets.extend([()] * missing)
+            self.costs.extend([()] * missing)
+
+    def get_nodes(self):
+        return self.emulator_index.addresses
+
+    def get_id(self, ip, port):
+        return self.emulator_index.find_id(ip, port)
+
+    def get_links(self, ip, port):
+        # ((ip, port), cost) of every link of an emulator
+        node = self.emulator_index.find_id(ip, port)
+        if node < 0 or node >= len(self.targets):
+            return ()
+        return tuple((self.emulator_index.get_address(target), cost) for target, cost in zip(self.targets[node], self.costs[node]))
+
+    def get_arrays(self):
+        # (offsets, targets, costs) CSR arrays over every id, rebuilt only after the links changed
+        self.__grow()
+        if self.arrays is None or len(self.arrays[0]) != len(self.targets) + 1:
+            offsets = array(OFFSETS_TYPECODE, [0])
+            offsets.extend(accumulate(map(len, self.targets)))
+            self.arrays = (offsets, array(TARGETS_TYPECODE, chain.from_iterable(self.targets)), array(COSTS_TYPECODE, chain.from_iterable(self.costs)))
+        return self.arrays
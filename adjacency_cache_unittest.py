@@ -0,0 +1,83 @@
+import unittest
+
+from adjacency_cache import AdjacencyCache
+from forwarding_table import EmulatorIndex
+from link_state_database import LinkStateDatabase
+
+
+class TestAdjacencyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.lsdb = LinkStateDatabase()
+        self.lsdb.install(('1.0.0.0', 1), 1, [('2.0.0.0', 2), ('3.0.0.0', 3)], costs=[1, 4])
+        self.lsdb.install(('2.0.0.0', 2), 1, [('1.0.0.0', 1)])
+        self.cache = AdjacencyCache(self.lsdb)
+
+    def test_first_sync_reads_every_origin(self):
+        ''' Tests that the first sync reports every origin and builds CSR arrays over every emulator seen. '''
+        self.assertEqual(sorted(self.cache.sync()), [('1.0.0.0', 1), ('2.0.0.0', 2)])
+        self.assertEqual(self.cache.get_dirty(), {('1.0.0.0', 1), ('2.0.0.0', 2)})
+        self.assertEqual(self.cache.get_dirty(), set())
+        self.assertEqual(self.cache.get_generation(), self.lsdb.get_generation())
+
+        offsets, targets, costs = self.cache.get_arrays()
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(list(offsets), [0, 2, 3, 3])
+        self.assertEqual(list(targets), [1, 2, 0])
+        self.assertEqual(list(costs), [1, 4, 1])
+        self.assertEqual(self.cache.get_links('1.0.0.0', 1), ((('2.0.0.0', 2), 1), (('3.0.0.0', 3), 4)))
+
+    def test_sync_only_reads_changes(self):
+        ''' Tests that later syncs only re-read the origins changed since, and keep the arrays when nothing changed. '''
+        self.cache.sync()
+        arrays = self.cache.get_arrays()
+
+        self.lsdb.install(('1.0.0.0', 1), 2, [('2.0.0.0', 2), ('3.0.0.0', 3)], costs=[1, 4])
+        self.assertEqual(self.cache.sync(), [])
+        self.assertIs(self.cache.get_arrays(), arrays)
+
+        self.lsdb.install(('3.0.0.0', 3), 1, [('4.0.0.0', 4)])
+        self.lsdb.remove(('2.0.0.0', 2))
+        self.assertEqual(self.cache.sync(), [('2.0.0.0', 2), ('3.0.0.0', 3)])
+        offsets, targets, _ = self.cache.get_arrays()
+        self.assertEqual(list(offsets), [0, 2, 2, 3, 3])
+        self.assertEqual(list(targets), [1, 2, 3])
+
+    def test_full_resync_behind_change_log(self):
+        ''' Tests that a cache synced before removals the LSDB no longer logs re-reads every origin. '''
+        lsdb = LinkStateDatabase(max_removed_changes=1)
+        lsdb.install(('1.0.0.0', 1), 1, [('2.0.0.0', 2)])
+        lsdb.install(('2.0.0.0', 2), 1, [('1.0.0.0', 1)])
+        lsdb.install(('3.0.0.0', 3), 1, [('1.0.0.0', 1)])
+        cache = AdjacencyCache(lsdb)
+        cache.sync()
+
+        lsdb.remove(('2.0.0.0', 2))
+        lsdb.remove(('3.0.0.0', 3))
+        lsdb.install(('1.0.0.0', 1), 2, [('4.0.0.0', 4)])
+        self.assertIsNone(lsdb.get_changed_since(cache.get_generation()))
+        self.assertEqual(sorted(cache.sync()), [('1.0.0.0', 1), ('2.0.0.0', 2), ('3.0.0.0', 3)])
+        self.assertEqual(cache.get_links('2.0.0.0', 2), ())
+        self.assertEqual(cache.get_links('3.0.0.0', 3), ())
+        self.assertEqual(cache.get_links('1.0.0.0', 1), ((('4.0.0.0', 4), 1),))
+        self.assertEqual(cache.sync(), [])
+
+    def test_links_outside_the_lsdb(self):
+        ''' Tests links set directly, like a router's own, and emulators interned by a forwarding table sharing the index. '''
+        emulator_index = EmulatorIndex()
+        cache = AdjacencyCache(self.lsdb, emulator_index)
+        cache.sync()
+        self.assertTrue(cache.set_links(('9.0.0.0', 9), [(('1.0.0.0', 1), 2)]))
+        self.assertFalse(cache.set_links(('9.0.0.0', 9), [(('1.0.0.0', 1), 2)]))
+        self.assertIn(('9.0.0.0', 9), cache.get_dirty())
+
+        emulator_index.get_id('8.0.0.0', 8)
+        offsets, targets, _ = cache.get_arrays()
+        self.assertEqual(len(offsets), len(emulator_index) + 1)
+        self.assertEqual(cache.get_id('9.0.0.0', 9), 3)
+        self.assertEqual(list(targets[offsets[3]:offsets[4]]), [0])
+        self.assertEqual(cache.get_links('7.0.0.0', 7), ())
+
+
+if __name__ == '__main__':
+    unittest.main()
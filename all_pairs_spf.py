@@ -0,0 +1,231 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import heapq
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from forwarding_table import NO_ENTRY
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# CSR Adjacency Enums - typecodes of the arrays shared with the workers, laid out in this order in one shared memory block
+OFFSETS_TYPECODE = 'q' # Note: offsets[u] .. offsets[u + 1] index the links of node u in targets and costs
+TARGETS_TYPECODE = 'i'
+COSTS_TYPECODE = 'I' # Note: link costs fit the 4 byte cost field of an LSP neighbor record
+
+SMALL_MATRIX_TYPECODE = 'h' # Note: next-hop ids of networks of up to 32767 nodes fit 2 bytes, larger ones take 4
+LARGE_MATRIX_TYPECODE = 'i'
+SHARDS_PER_WORKER = 4 # Note: sources are split in this many shards per worker, so a slow shard does not hold up the pool
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class CsrGraph:
+    # Directed, weighted link-state graph in compressed sparse row form. Nodes are numbered in (ip, port) order, so
+    # the lowest numbered of several equal-cost next-hops is the one a ForwardingTable lists first.
+
+    def __init__(self, links):
+        # links is {(ip, port): [((ip, port), cost), ...]}, as advertised in each origin's LSP. Emulators that are
+        # only advertised as neighbors get a node without links.
+        nodes = set(links)
+        for origin_links in links.values():
+            nodes.update(neighbor for neighbor, _ in origin_links)
+        self.nodes = sorted(nodes)
+        self.ids = {node: node_id for node_id, node in enumerate(self.nodes)}
+
+        ids = self.ids
+        self.offsets = array(OFFSETS_TYPECODE, [0])
+        self.targets = array(TARGETS_TYPECODE)
+        self.costs = array(COSTS_TYPECODE)
+        for node in self.nodes:
+            node_links = links.get(node, ())
+            self.targets.extend([ids[neighbor] for neighbor, _ in node_links])
+            self.costs.extend([cost for _, cost in node_links])
+            self.offsets.append(len(self.targets))
+
+    @classmethod
+    def from_topology(cls, filename):
+        # Graph of a topology file, every emulator's links as configured
+        from emulator import readtopology
+        return cls({(ip, port): [(neighbor.address, neighbor.cost) for neighbor in neighbors]
+                    for ip, port, neighbors in readtopology(filename)})
+
+    @classmethod
+    def from_lsdb(cls, lsdb):
+        # Snapshot of a LinkStateDatabase, every origin's links as advertised in its latest LSP
+        return cls({origin: lsdb.get_links(origin) for origin in lsdb.get_origins()})
+
+    @classmethod
+    def from_protocol(cls, protocol):
+        # Snapshot of what a running router knows - its LSDB plus its own links, which are not in the LSDB
+        emulator = protocol.emulator_obj
+        root = (emulator.get_ip(), emulator.get_port())
+        return cls({origin: protocol.getoriginlinks(origin) for origin in [root] + list(protocol.lsdb.get_origins())})
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get_nodes(self):
+        return self.nodes
+
+    def get_id(self, ip, port):
+        return self.ids.get((ip, port), NO_ENTRY)
+
+    def get_nr_links(self):
+        return len(self.targets)
+
+    def get_arrays(self):
+        return self.offsets, self.targets, self.costs
+
+
+class NextHopMatrix:
+    # Next-hop of every router towards every destination, as node ids in one typed array of a row per source:
+    # next_hops[source * n + dest] is the node source forwards to dest's packets to, NO_ENTRY if dest is unreachable.
+
+    def __init__(self, nodes, next_hops):
+        self.nodes = nodes
+        self.ids = {node: node_id for node_id, node in enumerate(nodes)}
+        self.next_hops = next_hops
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get_nodes(self):
+        return self.nodes
+
+    def get_row(self, src):
+        # Next-hop id towards every destination from the source (ip, port)
+        n = len(self.nodes)
+        start = self.ids[src] * n
+        return self.next_hops[start:start + n]
+
+    def get_next_hop(self, src, dest):
+        # Next-hop (ip, port) from src towards dest, None if dest is unreachable or unknown
+        if src not in self.ids or dest not in self.ids:
+            return None
+        next_id = self.next_hops[self.ids[src] * len(self.nodes) + self.ids[dest]]
+        return self.nodes[next_id] if next_id != NO_ENTRY else None
+
+    def print_forwarding_tables(self):
+        for src in self.nodes:
+            print("Forwarding table of {},{}".format(*src))
+            for dest, next_id in zip(self.nodes, self.get_row(src)):
+                if next_id != NO_ENTRY:
+                    print("  {},{}  {},{}".format(*dest, *self.nodes[next_id]))
+
+
+def matrix_typecode(nr_nodes):
+    return SMALL_MATRIX_TYPECODE if nr_nodes <= 2 ** 15 - 1 else LARGE_MATRIX_TYPECODE
+
+
+def shortest_path_row(offsets, targets, costs, source):
+    # Dijkstra from source over the CSR arrays, returns the next-hop id towards every node. Of several equal-cost
+    # next-hops the lowest id is kept: every predecessor on a shortest path is settled before the node it leads to,
+    # since link costs are positive.
+    n = len(offsets) - 1
+    dist = [-1] * n
+    row = [NO_ENTRY] * n
+    dist[source] = 0
+    row[source] = source
+    heap = [(0, source)]
+
+    while heap:
+        cost, u = heapq.heappop(heap)
+        if cost > dist[u]:
+            continue
+        hop = row[u]
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            new_cost = cost + costs[i]
+            next_hop = v if u == source else hop
+            if dist[v] == -1 or new_cost < dist[v]:
+                dist[v] = new_cost
+                row[v] = next_hop
+                heapq.heappush(heap, (new_cost, v))
+            elif new_cost == dist[v] and next_hop < row[v]:
+                row[v] = next_hop
+
+    return row
+
+
+# Shared memory attached by each worker process once, in attach_worker
+worker_graph = None
+worker_matrix = None
+worker_layout = None
+
+
+def attach_worker(graph_name, matrix_name, layout):
+    global worker_graph, worker_matrix, worker_layout
+    worker_graph = shared_memory.SharedMemory(graph_name)
+    worker_matrix = shared_memory.SharedMemory(matrix_name)
+    worker_layout = layout
+
+
+def compute_shard(start, stop):
+    # Runs in a worker - writes the rows of sources start .. stop - 1 into the shared next-hop matrix. The views are
+    # released before returning so the worker can close the shared memory on exit.
+    nr_nodes, nr_links, typecode = worker_layout
+    targets_start = (nr_nodes + 1) * array(OFFSETS_TYPECODE).itemsize
+    costs_start = targets_start + nr_links * array(TARGETS_TYPECODE).itemsize
+    itemsize = array(typecode).itemsize
+
+    with worker_graph.buf[:targets_start] as raw_offsets, raw_offsets.cast(OFFSETS_TYPECODE) as offsets, \
+            worker_graph.buf[targets_start:costs_start] as raw_targets, raw_targets.cast(TARGETS_TYPECODE) as targets, \
+            worker_graph.buf[costs_start:costs_start + nr_links * array(COSTS_TYPECODE).itemsize] as raw_costs, \
+            raw_costs.cast(COSTS_TYPECODE) as costs:
+        for source in range(start, stop):
+            offset = source * nr_nodes * itemsize
+            worker_matrix.buf[offset:offset + nr_nodes * itemsize] = array(typecode, shortest_path_row(offsets, targets, costs, source)).tobytes()
+    return stop - start
+
+
+def compute_all_pairs(graph, workers=None):
+    # Every router's next-hops in a NextHopMatrix. With more than one worker the sources are sharded over a process
+    # pool; the CSR arrays and the matrix live in shared memory, so tasks only carry their (start, stop) range.
+    nr_nodes = len(graph)
+    typecode = matrix_typecode(nr_nodes)
+    workers = workers if workers is not None else os.cpu_count() or 1
+
+    if workers <= 1 or nr_nodes < 2:
+        next_hops = array(typecode)
+        for source in range(nr_nodes):
+            next_hops.extend(shortest_path_row(graph.offsets, graph.targets, graph.costs, source))
+        return NextHopMatrix(graph.nodes, next_hops)
+
+    graph_bytes = graph.offsets.tobytes() + graph.targets.tobytes() + graph.costs.tobytes()
+    matrix_size = nr_nodes * nr_nodes * array(typecode).itemsize
+    shared_graph = shared_memory.SharedMemory(create=True, size=len(graph_bytes))
+    shared_matrix = shared_memory.SharedMemory(create=True, size=matrix_size)
+    try:
+        shared_graph.buf[:len(graph_bytes)] = graph_bytes
+        shard_size = max(1, -(-nr_nodes // (workers * SHARDS_PER_WORKER)))
+        layout = (nr_nodes, graph.get_nr_links(), typecode)
+        with ProcessPoolExecutor(workers, initializer=attach_worker, initargs=(shared_graph.name, shared_matrix.name, layout)) as pool:
+            shards = [pool.submit(compute_shard, start, min(start + shard_size, nr_nodes)) for start in range(0, nr_nodes, shard_size)]
+            for shard in shards:
+                shard.result()
+
+        next_hops = array(typecode)
+        next_hops.frombytes(shared_matrix.buf[:matrix_size])
+        return NextHopMatrix(graph.nodes, next_hops)
+    finally:
+        for block in (shared_graph, shared_matrix):
+            block.close()
+            block.unlink()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute the forwarding table of every router of a topology at once.')
+    parser.add_argument('-f', '--filename', default='topology.txt', help='the topology file')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='the number of worker processes, one per CPU by default')
+    args = parser.parse_args()
+
+    compute_all_pairs(CsrGraph.from_topology(args.filename), args.workers).print_forwarding_tables()
@@ -0,0 +1,87 @@
+import random
+import unittest
+from unittest import mock
+
+from all_pairs_spf import NO_ENTRY, CsrGraph, compute_all_pairs
+from emulator import EmulatorInProgress
+from incremental_spf_unittest import ecmp_next_hops
+from link_state_routing import LinkStateProtocol
+from neighbor_table import Neighbor
+
+
+def random_links(rng, nr_nodes, nr_links, max_cost):
+    ''' Random directed links {(ip, port): {(ip, port): cost}}, some nodes left unreachable. '''
+    nodes = [('10.0.0.{}'.format(rng.randint(1, 3)), 2000 + i) for i in range(nr_nodes)]
+    links = {node: {} for node in nodes}
+    for _ in range(nr_links):
+        u, v = rng.sample(nodes, 2)
+        links[u][v] = rng.randint(1, max_cost)
+    return links
+
+
+class TestAllPairsSPF(unittest.TestCase):
+
+    def assertMatrixMatchesReference(self, links, matrix):
+        for src in links:
+            expected = ecmp_next_hops(links, src)
+            for dest in links:
+                next_hop = matrix.get_next_hop(src, dest)
+                if dest in expected:
+                    self.assertEqual(next_hop, expected[dest][0])
+                else:
+                    self.assertIsNone(next_hop)
+
+    def test_matches_reference_dijkstra(self):
+        ''' Tests that every source's next-hops are those of a per-source Dijkstra, the lowest of equal-cost ones first. '''
+        for seed in range(5):
+            rng = random.Random(seed)
+            links = random_links(rng, 25, 60, max_cost=3)
+            graph = CsrGraph({node: list(node_links.items()) for node, node_links in links.items()})
+            self.assertMatrixMatchesReference(links, compute_all_pairs(graph, workers=1))
+
+    def test_workers_match_serial_run(self):
+        ''' Tests that sharding the sources over worker processes gives the same matrix as a serial run. '''
+        links = random_links(random.Random(9), 40, 120, max_cost=4)
+        graph = CsrGraph({node: list(node_links.items()) for node, node_links in links.items()})
+
+        serial = compute_all_pairs(graph, workers=1)
+        parallel = compute_all_pairs(graph, workers=2)
+        self.assertEqual(parallel.next_hops, serial.next_hops)
+        self.assertEqual(parallel.next_hops.typecode, 'h')
+        self.assertMatrixMatchesReference(links, parallel)
+
+    def test_topology_file(self):
+        ''' Tests the graph read from topology.txt and a row of its matrix. '''
+        graph = CsrGraph.from_topology('topology.txt')
+        self.assertEqual(len(graph), 5)
+        self.assertEqual(graph.get_nr_links(), 12)
+
+        matrix = compute_all_pairs(graph, workers=2)
+        row = matrix.get_row(('127.0.0.1', 2051))
+        self.assertEqual([matrix.get_nodes()[next_id][1] for next_id in row], [2051, 2052, 2053, 2052, 2053])
+        self.assertIsNone(matrix.get_next_hop(('127.0.0.1', 2051), ('127.0.0.1', 9999)))
+        self.assertEqual(graph.get_id('127.0.0.1', 9999), NO_ENTRY)
+
+    def test_lsdb_snapshot_matches_forwarding_table(self):
+        ''' Tests that a router's row of its own LSDB snapshot matches the forwarding table it builds. '''
+        links = random_links(random.Random(4), 15, 45, max_cost=3)
+        root = next(iter(links))
+        emulator = EmulatorInProgress(True, root[0], root[1], [Neighbor(ip, port, cost=cost)
+                                                               for (ip, port), cost in links[root].items()])
+        lsp = LinkStateProtocol(emulator)
+        for origin, origin_links in links.items():
+            if origin != root:
+                lsp.lsdb.install(origin, 1, list(origin_links), costs=list(origin_links.values()))
+        with mock.patch('sys.stdout'):
+            lsp.buildforwardingtable()
+
+        matrix = compute_all_pairs(CsrGraph.from_protocol(lsp), workers=1)
+        for entry in lsp.get_forwarding_tbl().get_values():
+            self.assertEqual(matrix.get_next_hop(root, entry.get_entry()), entry.get_next_hop())
+
+        # The LSDB alone holds every link but the router's own
+        self.assertEqual(CsrGraph.from_lsdb(lsp.lsdb).get_nr_links(), sum(map(len, links.values())) - len(links[root]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy_spf
+from all_pairs_spf import CsrGraph
+from emulator import EmulatorInProgress
+from link_state_routing import SPF_BACKEND_NUMPY, SPF_BACKEND_PYTHON, LinkStateProtocol
+from neighbor_table import Neighbor
+from topology_generator import generate, router_address
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_KIND = 'scale-free' # Note: generated in O(n), unlike erdos-renyi
+NR_CHANGES = 20 # Note: SPF runs timed per size, each after one LSP with new link costs was installed
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def build_protocol(kind, size, spf_backend):
+    # Router 0 with every other router's LSP installed in its LSDB, and its adjacency cache synced once
+    links = generate(kind, size)
+    ip, port = router_address(0)
+    lsp = LinkStateProtocol(EmulatorInProgress(True, ip, port, [Neighbor(router_address(neighbor)[0], router_address(neighbor)[1])
+                                                                for neighbor in links[0]]), print_tables=False, spf_backend=spf_backend)
+    for router, neighbors in links.items():
+        if router != 0:
+            lsp.lsdb.install(router_address(router), 1, [router_address(neighbor) for neighbor in neighbors])
+    lsp.syncadjacency()
+    return lsp, links
+
+
+def change_lsp(lsp, links, rng, seq_no):
+    # A router re-advertises its links with new costs
+    router = rng.randrange(1, len(links))
+    neighbors = [router_address(neighbor) for neighbor in links[router]]
+    lsp.lsdb.install(router_address(router), seq_no, neighbors, costs=[rng.randint(1, 10) for _ in neighbors])
+
+
+def per_change(lsp, links, function, nr_changes, seed=0):
+    # Mean seconds function takes after each of nr_changes LSP changes
+    rng = random.Random(seed)
+    total = 0
+    for seq_no in range(2, nr_changes + 2):
+        change_lsp(lsp, links, rng, seq_no)
+        start = time.perf_counter()
+        function(lsp)
+        total += time.perf_counter() - start
+    return total / nr_changes
+
+
+def cached_arrays(lsp):
+    lsp.syncadjacency()
+    lsp.adjacency.get_arrays()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Graph ready for SPF after one LSP changed: re-reading the LSDB vs the adjacency cache.')
+    parser.add_argument('-t', '--topology', default=DEFAULT_KIND, help='the kind of generated topology')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the number of routers')
+    parser.add_argument('-c', '--count', type=int, default=NR_CHANGES, help='the number of LSP changes per size')
+    args = parser.parse_args()
+
+    columns = ['re-read ms', 'cache ms'] + (['numpy SPF ms'] if numpy_spf.is_available() else [])
+    print("{:>8}  ".format('routers') + "  ".join("{:>12}".format(column) for column in columns))
+    for size in args.sizes:
+        lsp, links = build_protocol(args.topology, size, SPF_BACKEND_NUMPY if numpy_spf.is_available() else SPF_BACKEND_PYTHON)
+        times = [per_change(lsp, links, CsrGraph.from_protocol, args.count), per_change(lsp, links, cached_arrays, args.count)]
+        if numpy_spf.is_available():
+            times.append(per_change(lsp, links, LinkStateProtocol.buildforwardingtable, args.count))
+        print("{:>8}  ".format(size) + "  ".join("{:>12.2f}".format(seconds * 1000) for seconds in times))
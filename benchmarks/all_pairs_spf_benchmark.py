@@ -0,0 +1,101 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from all_pairs_spf import SHARDS_PER_WORKER, CsrGraph, compute_all_pairs, matrix_typecode, shortest_path_row
+from emulator import EmulatorInProgress
+from link_state_database import LinkStateDatabase
+from link_state_routing import LinkStateProtocol
+from neighbor_table import Neighbor
+from topology_generator import generate, router_address
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_SIZES = [100, 500, 2000]
+DEFAULT_KIND = 'erdos-renyi'
+MAX_PER_ROUTER_SIZE = 500 # Note: one buildforwardingtable per router is only timed up to this many routers, it takes minutes beyond
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def topology_links(kind, size):
+    return {router_address(router): [(router_address(neighbor), 1) for neighbor in neighbors] for router, neighbors in generate(kind, size).items()}
+
+
+def per_router_tables(links):
+    # What it takes today - every router runs buildforwardingtable from its own viewpoint over the same LSDB
+    lsdb = LinkStateDatabase()
+    for origin, origin_links in links.items():
+        lsdb.install(origin, 1, [neighbor for neighbor, _ in origin_links], costs=[cost for _, cost in origin_links])
+
+    start = time.perf_counter()
+    for (ip, port), origin_links in links.items():
+        lsp = LinkStateProtocol(EmulatorInProgress(True, ip, port, [Neighbor(neighbor[0], neighbor[1], cost=cost)
+                                                                  for neighbor, cost in origin_links]), print_tables=False)
+        lsp.lsdb = lsdb
+        lsp.buildforwardingtable()
+    return time.perf_counter() - start
+
+
+def pickled_shard(offsets, targets, costs, start, stop, typecode):
+    # A shard that gets the adjacency pickled along with it and sends its rows back the same way
+    rows = array(typecode)
+    for source in range(start, stop):
+        rows.extend(shortest_path_row(offsets, targets, costs, source))
+    return rows
+
+
+def pickled_all_pairs(graph, workers):
+    # The same sharding with the CSR arrays pickled into every task instead of shared
+    nr_nodes = len(graph)
+    typecode = matrix_typecode(nr_nodes)
+    shard_size = max(1, -(-nr_nodes // (workers * SHARDS_PER_WORKER)))
+    next_hops = array(typecode)
+    with ProcessPoolExecutor(workers) as pool:
+        shards = [pool.submit(pickled_shard, graph.offsets, graph.targets, graph.costs, start, min(start + shard_size, nr_nodes), typecode)
+                  for start in range(0, nr_nodes, shard_size)]
+        for shard in shards:
+            next_hops.extend(shard.result())
+    return next_hops
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='All-pairs forwarding tables: one buildforwardingtable per router vs the all-pairs SPF engine.')
+    parser.add_argument('-t', '--topology', default=DEFAULT_KIND, help='the kind of generated topology')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the number of routers')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help='the number of worker processes, at least 2')
+    args = parser.parse_args()
+
+    print("{} CPUs, {} workers".format(os.cpu_count(), args.workers))
+    print("{:>8}  {:>12}  {:>10}  {:>10}  {:>10}  {:>12}".format('routers', 'per router s', 'serial s', 'shared s', 'pickled s', 'matrix bytes'))
+    for size in args.sizes:
+        links = topology_links(args.topology, size)
+        graph = CsrGraph(links)
+        with mock.patch('sys.stdout'):
+            per_router = "{:.2f}".format(per_router_tables(links)) if size <= MAX_PER_ROUTER_SIZE else '-'
+        serial, matrix = timed(compute_all_pairs, graph, 1)
+        shared, shared_matrix = timed(compute_all_pairs, graph, max(2, args.workers))
+        pickled, pickled_matrix = timed(pickled_all_pairs, graph, max(2, args.workers))
+        assert shared_matrix.next_hops == matrix.next_hops == pickled_matrix
+
+        matrix_bytes = len(matrix.next_hops) * matrix.next_hops.itemsize
+        print("{:>8}  {:>12}  {:>10.2f}  {:>10.2f}  {:>10.2f}  {:>12}".format(size, per_router, serial, shared, pickled, matrix_bytes))
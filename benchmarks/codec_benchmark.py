@@ -0,0 +1,94 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import ipaddress
+import os
+import socket
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from packet_codec import P_HEADER_LEN, decode_header, get_ttl, ip_to_int, pack_header, set_ttl, unpack_header
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+NR_OPERATIONS = 200000
+SRC_ADDR = ['10.0.0.1', 2051]
+DEST_ADDR = ['10.0.0.2', 2052]
+PAYLOAD = bytes(64) # Note: about the size of an LSP for a handful of neighbors
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# The original codec - the format string is looked up on every call and addresses go through ipaddress and inet_ntoa
+
+def legacy_pack(packet):
+    return struct.pack("!cIIIIIII", b'L', 0, 1, 10, int(ipaddress.IPv4Address(SRC_ADDR[0])), SRC_ADDR[1],
+                       int(ipaddress.IPv4Address(DEST_ADDR[0])), DEST_ADDR[1])
+
+
+def legacy_unpack(packet):
+    header = struct.unpack("!cIIIIIII", packet[:29])
+    return [header[0].decode(), header[1], header[2], header[3], [socket.inet_ntoa(struct.pack('!L', header[4])), header[5]],
+            [socket.inet_ntoa(struct.pack('!L', header[6])), header[7]]]
+
+
+def legacy_decrement_ttl(packet):
+    header = legacy_unpack(packet)
+    return struct.pack("!cIIIIIII", header[0].encode(), header[1], header[2], header[3] - 1, int(ipaddress.IPv4Address(header[4][0])),
+                       header[4][1], int(ipaddress.IPv4Address(header[5][0])), header[5][1]) + packet[29:]
+
+
+# The shared codec
+
+def codec_pack(packet):
+    return pack_header(b'L', 0, 1, 10, ip_to_int(SRC_ADDR[0]), SRC_ADDR[1], ip_to_int(DEST_ADDR[0]), DEST_ADDR[1])
+
+
+def codec_unpack(packet):
+    return unpack_header(packet)
+
+
+def codec_decode(packet):
+    return decode_header(packet)
+
+
+def codec_decrement_ttl(packet):
+    buffer = bytearray(packet)
+    set_ttl(buffer, get_ttl(buffer) - 1)
+    return buffer
+
+
+def measure(operation, packet, nr_operations):
+    # Returns operations per second
+    start = time.perf_counter()
+    for _ in range(nr_operations):
+        operation(packet)
+    return nr_operations / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Packet header encode, decode and TTL decrement throughput, per call struct formats vs the shared codec.')
+    parser.add_argument('-c', '--count', type=int, default=NR_OPERATIONS, help='the number of operations per run')
+    args = parser.parse_args()
+
+    packet = codec_pack(None) + PAYLOAD
+    assert legacy_pack(None) == packet[:P_HEADER_LEN] and legacy_decrement_ttl(packet) == codec_decrement_ttl(packet)
+
+    runs = [('encode header', legacy_pack, codec_pack),
+            ('decode header (packed)', legacy_unpack, codec_unpack),
+            ('decode header (dotted)', legacy_unpack, codec_decode),
+            ('decrement TTL', legacy_decrement_ttl, codec_decrement_ttl)]
+
+    print("{:>24}  {:>14}  {:>14}  {:>8}".format('operation', 'legacy ops/s', 'codec ops/s', 'speedup'))
+    for name, legacy, codec in runs:
+        legacy_rate = measure(legacy, packet, args.count)
+        codec_rate = measure(codec, packet, args.count)
+        print("{:>24}  {:>14.0f}  {:>14.0f}  {:>7.1f}x".format(name, legacy_rate, codec_rate, codec_rate / legacy_rate))
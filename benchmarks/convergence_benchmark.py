@@ -0,0 +1,236 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulator_host import EmulatorHost
+from neighbor_table import Neighbor
+from simulated_network import SimulatedEventLoop, SimulatedNetwork
+from spf_throttle import SPF_HOLD_TIME, SPF_INITIAL_DELAY, SPF_MAX_WAIT
+from topology_generator import DEFAULT_BASE_PORT, DEFAULT_IP, TOPOLOGY_KINDS, generate, write_topology
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# Default size of each topology - # of routers, or k for a fat-tree (k = 4 is 20 switches). Kept small: LSPs are
+# flooded no further than their TTL, so networks wider than that many hops never converge.
+DEFAULT_SIZES = {'ring': 12, 'grid': 16, 'fat-tree': 4, 'erdos-renyi': 16, 'scale-free': 16}
+
+CHECK_INTERVAL = 0.1 # Note: seconds between two checks of every forwarding table
+DEFAULT_TIMEOUT = 60 # Note: seconds a phase may take before it is reported as not converged
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def hop_counts(links, root):
+    distances = {root: 0}
+    frontier = [root]
+    while frontier:
+        next_frontier = []
+        for router in frontier:
+            for neighbor in links[router]:
+                if neighbor not in distances:
+                    distances[neighbor] = distances[router] + 1
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+def is_connected(links):
+    return not links or len(hop_counts(links, next(iter(links)))) == len(links)
+
+
+class ConvergenceRun:
+    # Boots every router of a topology in one EmulatorHost and measures each phase (boot, failure, restore) until
+    # every live router's forwarding table holds the shortest hop count to, and a valid next hop for, every router
+    # it can reach
+
+    def __init__(self, links, topology_file, simulated, incremental_spf, spf_timers):
+        self.links = links
+        self.live = set(links)
+
+        if simulated:
+            self.event_loop = SimulatedEventLoop()
+            network = SimulatedNetwork(self.event_loop)
+            self.host = EmulatorHost(incremental_spf, event_loop=self.event_loop, transport_factory=network.add_transport, print_tables=False,
+                                     spf_timers=spf_timers)
+        else:
+            self.host = EmulatorHost(incremental_spf, print_tables=False, spf_timers=spf_timers)
+            self.event_loop = self.host.get_event_loop()
+
+        self.host.add_topology(topology_file)
+        self.routers = {emulator.get_port() - DEFAULT_BASE_PORT: emulator for emulator in self.host.get_emulators()}
+
+    def live_links(self):
+        return {router: [neighbor for neighbor in self.links[router] if neighbor in self.live] for router in self.live}
+
+    def counters(self):
+        # Totals over every emulator ever started, including failed ones and the ones they were restored from
+        lsp_messages = nr_packets = nr_bytes = spf_triggered = spf_suppressed = 0
+        spf_runs = dict.fromkeys(self.links, 0)
+        for emulator in self.host.get_emulators():
+            for p_type, counter in emulator.get_transport().get_stats().items():
+                nr_packets += counter['packets']
+                nr_bytes += counter['bytes']
+                if p_type == 'L':
+                    lsp_messages += counter['packets']
+            spf_runs[emulator.get_port() - DEFAULT_BASE_PORT] += emulator.lsp.get_nr_spf_runs()
+            spf_stats = emulator.lsp.get_spf_throttle().get_stats()
+            spf_triggered += spf_stats['triggered']
+            spf_suppressed += spf_stats['suppressed']
+        return lsp_messages, nr_packets, nr_bytes, spf_runs, spf_triggered, spf_suppressed
+
+    def is_consistent(self, links, hops):
+        for router in self.live:
+            forwarding_tbl = self.routers[router].lsp.get_forwarding_tbl()
+            if forwarding_tbl is None or len(forwarding_tbl) != len(hops[router]):
+                return False
+
+            for entry in forwarding_tbl.get_values():
+                dest = entry.get_port() - DEFAULT_BASE_PORT
+                if hops[router].get(dest) != entry.get_cost():
+                    return False
+                if dest != router:
+                    next_hop = entry.get_next_hop()[1] - DEFAULT_BASE_PORT
+                    if next_hop not in links[router] or 1 + hops[next_hop][dest] != entry.get_cost():
+                        return False
+        return True
+
+    def run_phase(self, name, change, timeout, routers=()):
+        # Apply the change (boot, fail or restore routers), then run until the forwarding tables are consistent
+        before = self.counters()
+        start, wall_start = self.event_loop.time(), time.perf_counter()
+        change()
+        links = self.live_links()
+        hops = {router: hop_counts(links, router) for router in links}
+        result = {'converged': False}
+
+        def check():
+            if self.is_consistent(links, hops):
+                result['converged'] = True
+                result['time'] = self.event_loop.time() - start
+                self.event_loop.stop()
+            elif self.event_loop.time() - start >= timeout:
+                self.event_loop.stop()
+            else:
+                self.event_loop.call_later(CHECK_INTERVAL, check)
+
+        self.event_loop.call_later(CHECK_INTERVAL, check)
+        self.event_loop.run_forever()
+
+        after = self.counters()
+        spf_runs = [after[3][router] - before[3][router] for router in self.links]
+        return {'phase': name,
+                'routers': sorted(routers),
+                'converged': result['converged'],
+                'convergence_time_s': result.get('time'),
+                'wall_time_s': time.perf_counter() - wall_start,
+                'lsp_messages': after[0] - before[0],
+                'packets': after[1] - before[1],
+                'bytes': after[2] - before[2],
+                'spf_runs': {'total': sum(spf_runs), 'mean': sum(spf_runs) / len(spf_runs), 'max': max(spf_runs)},
+                'spf_triggered': after[4] - before[4],
+                'spf_suppressed': after[5] - before[5]}
+
+    def boot(self, timeout):
+        return self.run_phase('boot', self.host.start, timeout)
+
+    def fail(self, routers, timeout):
+        def change():
+            for router in routers:
+                self.routers[router].lsp.stop()
+                self.live.discard(router)
+
+        return self.run_phase('fail', change, timeout, routers)
+
+    def restore(self, routers, timeout):
+        def change():
+            for router in routers:
+                ip, port = DEFAULT_IP, DEFAULT_BASE_PORT + router
+                neighbors = [Neighbor(DEFAULT_IP, DEFAULT_BASE_PORT + neighbor) for neighbor in self.links[router]]
+                emulator = self.routers[router] = self.host.add_emulator(router, ip, port, neighbors)
+                emulator.lsp.createroutes(self.event_loop)
+                self.live.add(router)
+
+        return self.run_phase('restore', change, timeout, routers)
+
+    def close(self):
+        for router in self.live:
+            self.routers[router].lsp.stop()
+        self.event_loop.close()
+
+
+def pick_failures(links, nr_failures, rng):
+    # Routers whose failure leaves the rest of the network connected - stale LSPs behind a partition never age out
+    failed = []
+    for router in rng.sample(sorted(links), len(links)):
+        if len(failed) == nr_failures:
+            break
+        remaining = {u: [v for v in links[u] if v not in failed and v != router] for u in links if u not in failed and u != router}
+        if is_connected(remaining):
+            failed.append(router)
+    return failed
+
+
+def benchmark_topology(kind, size, args, topology_dir):
+    links = generate(kind, size, args.seed)
+    topology_file = os.path.join(topology_dir, '{}-{}.txt'.format(kind, size))
+    write_topology(topology_file, links, DEFAULT_IP, DEFAULT_BASE_PORT)
+
+    run = ConvergenceRun(links, topology_file, not args.udp, args.incremental_spf, args.spf_timers)
+    phases = [run.boot(args.timeout)]
+    failed = pick_failures(links, args.failures, random.Random(args.seed))
+    if failed:
+        phases.append(run.fail(failed, args.timeout))
+        phases.append(run.restore(failed, args.timeout))
+    run.close()
+
+    return {'topology': kind,
+            'size': size,
+            'routers': len(links),
+            'links': sum(len(neighbors) for neighbors in links.values()) // 2,
+            'topology_file': topology_file if args.keep_topologies else None,
+            'phases': phases}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convergence time and flooding cost after boot, router failure and restore.')
+    parser.add_argument('-t', '--topologies', nargs='+', choices=TOPOLOGY_KINDS, default=TOPOLOGY_KINDS, help='the topologies benchmarked')
+    parser.add_argument('-n', '--size', type=int, help='the size of every topology (# of routers, k for a fat-tree)')
+    parser.add_argument('-f', '--failures', type=int, default=1, help='the number of routers failed and then restored')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='the seed of the random topologies and failures')
+    parser.add_argument('-i', '--incremental_spf', action='store_true', help='repair the shortest path tree instead of rebuilding it')
+    parser.add_argument('--spf_timers', type=float, nargs=3, metavar=('INITIAL', 'HOLD', 'MAX'), default=[SPF_INITIAL_DELAY, SPF_HOLD_TIME, SPF_MAX_WAIT],
+                        help='the seconds every router waits before the first SPF run after a quiet period, before the second, and at most')
+    parser.add_argument('--udp', action='store_true', help='run on real sockets and wall-clock time instead of the simulated network')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='the seconds a phase may take to converge')
+    parser.add_argument('--keep_topologies', metavar='DIR', help='write the generated topology files to DIR instead of a temporary directory')
+    parser.add_argument('-o', '--output', help='the JSON results file (default: stdout)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        topology_dir = args.keep_topologies or tmp_dir
+        os.makedirs(topology_dir, exist_ok=True)
+        results = {'transport': 'udp' if args.udp else 'simulated',
+                   'incremental_spf': args.incremental_spf,
+                   'spf_timers': args.spf_timers,
+                   'seed': args.seed,
+                   'results': [benchmark_topology(kind, args.size or DEFAULT_SIZES[kind], args, topology_dir) for kind in args.topologies]}
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
@@ -0,0 +1,101 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_SIZES = [10, 100, 500]
+EMULATOR_SCRIPT = os.path.join(REPO_DIR, 'emulator.py')
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def write_ring_topology(filename, base_port, nr_emulators):
+    with open(filename, 'w') as file:
+        for i in range(nr_emulators):
+            prev_port = base_port + (i - 1) % nr_emulators
+            next_port = base_port + (i + 1) % nr_emulators
+            file.write("127.0.0.1,{} 127.0.0.1,{} 127.0.0.1,{}\n".format(base_port + i, prev_port, next_port))
+
+
+def max_rss_bytes(usage):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+
+def measure_host(nr_emulators, base_port):
+    # Runs in a fresh interpreter so the resident set size only reflects this host
+    from emulator_host import EmulatorHost
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        topology = os.path.join(tmp_dir, 'topology.txt')
+        write_ring_topology(topology, base_port, nr_emulators)
+
+        rss_before = max_rss_bytes(resource.getrusage(resource.RUSAGE_SELF))
+        start = time.perf_counter()
+        host = EmulatorHost()
+        host.add_topology(topology)
+        host.start()
+        startup = time.perf_counter() - start
+        rss_after = max_rss_bytes(resource.getrusage(resource.RUSAGE_SELF))
+        host.close()
+
+    return {'startup_s': startup, 'rss_delta_bytes': rss_after - rss_before}
+
+
+def measure_process(base_port):
+    # One emulator per interpreter, the way routers were run before - RSS of a single idle emulator process
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        topology = os.path.join(tmp_dir, 'topology.txt')
+        write_ring_topology(topology, base_port, 2)
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import emulator'], cwd=REPO_DIR, check=True)
+        interpreter_startup = time.perf_counter() - start
+
+        emulator = subprocess.Popen([sys.executable, EMULATOR_SCRIPT, '-p', str(base_port), '-f', topology],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(3)
+        emulator.terminate()
+        emulator.wait()
+
+    return {'startup_s': interpreter_startup, 'rss_bytes': max_rss_bytes(resource.getrusage(resource.RUSAGE_CHILDREN))}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Startup time and memory per router, one process per router vs one host process.')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the number of routers in the host')
+    parser.add_argument('-p', '--base_port', type=int, default=20000, help='the port of the first router')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure_host(args.child, args.base_port)))
+        sys.exit(0)
+
+    process = measure_process(args.base_port)
+    print("process per router:  startup (excluding the 2s sleep) {:.3f}s, RSS {:.1f} MiB per router".format(
+        process['startup_s'], process['rss_bytes'] / 2 ** 20))
+
+    print("{:>8}  {:>12}  {:>16}  {:>16}".format('routers', 'startup (s)', 'ms per router', 'KiB per router'))
+    for nr_emulators in args.sizes:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(nr_emulators), '-p', str(args.base_port)],
+                                stdout=subprocess.PIPE, check=True).stdout
+        host = json.loads(output)
+        print("{:>8}  {:>12.3f}  {:>16.3f}  {:>16.1f}".format(nr_emulators, host['startup_s'], 1000 * host['startup_s'] / nr_emulators,
+                                                               host['rss_delta_bytes'] / 1024 / nr_emulators))
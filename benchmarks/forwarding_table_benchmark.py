@@ -0,0 +1,98 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forwarding_table import EmulatorIndex, ForwardingTable
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+NR_NEXT_HOPS = 8 # Note: destinations are spread over this many next-hops, like a router with 8 neighbors
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class LegacyForwardingTableEntry():
+    # The original one-object-per-destination entry (no __slots__)
+
+    def __init__(self, dest_ip, dest_port, next_ip, next_port, in_spf, cost):
+        self.dest_ip = dest_ip
+        self.dest_port = dest_port
+        self.next_ip = next_ip
+        self.next_port = next_port
+        self.in_spf = in_spf
+        self.cost = cost
+
+
+class LegacyForwardingTable:
+    # The original table keyed by "ip,port" strings
+
+    def __init__(self):
+        self.forwarding_table = {}
+
+    def add_entry(self, ip, port, next_ip, next_port, cost=0):
+        key = str(ip) + ',' + str(port)
+        self.forwarding_table[key] = LegacyForwardingTableEntry(ip, port, next_ip, next_port, False, cost)
+
+    def get_emulator_cost(self, ip, port):
+        return self.forwarding_table[str(ip) + ',' + str(port)].cost
+
+
+def generate_addresses(nr_emulators):
+    # Distinct (ip, port) pairs with freshly built strings, as they arrive decoded from LSPs
+    return [('10.{}.{}.{}'.format(i >> 16, (i >> 8) & 255, i & 255), 2000 + i % 1000) for i in range(nr_emulators)]
+
+
+def fill_table(table, addresses):
+    for i, (ip, port) in enumerate(addresses):
+        next_ip, next_port = addresses[i % NR_NEXT_HOPS]
+        table.add_entry(ip, port, next_ip, next_port, i)
+
+
+def measure(table_factory, addresses):
+    # Memory allocated by the table (the addresses themselves are excluded) and time to look up every entry's cost
+    gc.collect()
+    tracemalloc.start()
+    table = table_factory()
+    fill_table(table, addresses)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for ip, port in addresses:
+        table.get_emulator_cost(ip, port)
+    lookup_time = time.perf_counter() - start
+
+    return memory / len(addresses), lookup_time / len(addresses)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare memory and lookup cost of the string-keyed and array-backed forwarding tables.')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the number of destinations to store')
+    args = parser.parse_args()
+
+    print("{:>8}  {:>16}  {:>16}  {:>16}  {:>16}".format('dests', 'legacy B/dest', 'array B/dest', 'legacy ns/cost', 'array ns/cost'))
+    for nr_emulators in args.sizes:
+        addresses = generate_addresses(nr_emulators)
+        legacy_memory, legacy_lookup = measure(LegacyForwardingTable, addresses)
+
+        # The emulator index persists across forwarding table builds, so intern outside the measured window
+        emulator_index = EmulatorIndex()
+        for ip, port in addresses:
+            emulator_index.get_id(ip, port)
+        array_memory, array_lookup = measure(lambda: ForwardingTable(emulator_index), addresses)
+
+        print("{:>8}  {:>16.1f}  {:>16.1f}  {:>16.0f}  {:>16.0f}".format(nr_emulators, legacy_memory, array_memory,
+                                                                          legacy_lookup * 1e9, array_lookup * 1e9))
@@ -0,0 +1,70 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMULATOR_SCRIPT = os.path.join(REPO_DIR, 'emulator.py')
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def write_ring_topology(filename, ip, base_port, nr_emulators):
+    # Each emulator is linked to the emulator before and after it in the ring
+    with open(filename, 'w') as file:
+        for i in range(nr_emulators):
+            prev_port = base_port + (i - 1) % nr_emulators
+            next_port = base_port + (i + 1) % nr_emulators
+            file.write("{0},{1} {0},{2} {0},{3}\n".format(ip, base_port + i, prev_port, next_port))
+
+
+def measure_idle_cpu(nr_emulators, base_port, duration):
+    ip = socket.gethostbyname(socket.gethostname())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        topology = os.path.join(tmp_dir, 'topology.txt')
+        write_ring_topology(topology, ip, base_port, nr_emulators)
+
+        # Boot every emulator in its own interpreter, exactly as an operator would
+        emulators = []
+        for i in range(nr_emulators):
+            emulators.append(subprocess.Popen([sys.executable, EMULATOR_SCRIPT, '-p', str(base_port + i), '-f', topology],
+                                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+
+        # Let the network converge (2s start-up sleep + 3s forwarding table delay) then measure an idle window
+        time.sleep(duration)
+        for emulator in emulators:
+            emulator.terminate()
+        for emulator in emulators:
+            emulator.wait()
+
+    # CPU time of all reaped children (user + system)
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (usage.ru_utime + usage.ru_stime) / nr_emulators
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure CPU used per idle emulator process.')
+    parser.add_argument('-n', '--nr_emulators', type=int, default=5, help='the number of emulators to run in a ring')
+    parser.add_argument('-p', '--base_port', type=int, default=3051, help='the port of the first emulator')
+    parser.add_argument('-t', '--duration', type=float, default=20, help='how long to let the emulators run (seconds)')
+    args = parser.parse_args()
+
+    cpu_seconds = measure_idle_cpu(args.nr_emulators, args.base_port, args.duration)
+    print("emulators:                {}".format(args.nr_emulators))
+    print("wall time:                {:.1f}s".format(args.duration))
+    print("cpu time per emulator:    {:.3f}s".format(cpu_seconds))
+    print("cpu usage per emulator:   {:.2f}%".format(100 * cpu_seconds / args.duration))
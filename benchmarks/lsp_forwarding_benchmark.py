@@ -0,0 +1,104 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import ipaddress
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulator import EmulatorInProgress
+from link_state_routing import LinkStateProtocol
+from lsp_payload import DEFAULT_LINK_COST, encode_lsp_payload
+from neighbor_table import Neighbor
+from packet_codec import ip_to_int, pack_header
+from simulated_network import SimulatedEventLoop
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_DEGREES = [2, 8, 32]
+NR_LSPS = 20000
+NR_LSP_NEIGHBORS = 8 # Note: neighbors advertised in each LSP forwarded
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class NullTransport:
+    # Swallows datagrams so only the forwarding work is measured, not the kernel
+
+    def sendto(self, packet, addr):
+        pass
+
+    def send_batch(self, batch):
+        pass
+
+
+def legacy_decrement_ttl(emulator, packet):
+    # The original TTL decrement - decode the whole LSP, re-encode the addresses through ipaddress and re-pack the header
+    packet, header, data = emulator.deassemblepacket(packet)
+    new_pkt = struct.pack("!cIIIIIII", header[0].encode(), int(header[1]), int(header[2]), int(header[3] - 1),
+                          int(ipaddress.IPv4Address(header[4][0])), int(header[4][1]), int(ipaddress.IPv4Address(header[5][0])),
+                          int(header[5][1]))
+    return new_pkt + packet[29:]
+
+
+def build_emulator(degree, legacy):
+    neighbors = [Neighbor('10.0.0.{}'.format(2 + i), 2000, 0, True) for i in range(degree)]
+    emulator = EmulatorInProgress(True, '10.0.0.1', 2000, neighbors, emulator_id=0)
+    emulator.set_transport(NullTransport())
+    emulator.lsp = LinkStateProtocol(emulator, print_tables=False)
+    event_loop = SimulatedEventLoop()
+    emulator.lsp.event_loop = event_loop
+    emulator.lsp.flooding.start(event_loop)
+    if legacy:
+        emulator.lsp.decrement_ttl = lambda packet: legacy_decrement_ttl(emulator, packet)
+    return emulator
+
+
+def generate_lsps(nr_lsps):
+    # Every LSP is new to the emulator - one per origin, so each is installed and flooded on
+    lsps = []
+    for i in range(nr_lsps):
+        origin_ip = str(ipaddress.IPv4Address(0x0b000000 + i))
+        payload = encode_lsp_payload([(str(ipaddress.IPv4Address(0x0c000000 + i * NR_LSP_NEIGHBORS + j)), 2000, DEFAULT_LINK_COST)
+                                      for j in range(NR_LSP_NEIGHBORS)])
+        lsps.append(pack_header(b'L', 0, 1, 10, ip_to_int(origin_ip), 2000, 0, 0) + payload)
+    return lsps
+
+
+def decrements_per_second(emulator, lsps):
+    start = time.perf_counter()
+    for lsp in lsps:
+        emulator.lsp.decrement_ttl(lsp)
+    return len(lsps) / (time.perf_counter() - start)
+
+
+def lsps_per_second(emulator, lsps, sender):
+    start = time.perf_counter()
+    for lsp in lsps:
+        emulator.lsp.forwardpacket(lsp, addr=sender)
+    return len(lsps) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='LSP forwarding throughput, full decode and re-encode vs in-place TTL decrement.')
+    parser.add_argument('-d', '--degrees', type=int, nargs='+', default=DEFAULT_DEGREES, help='the number of neighbors each LSP is flooded to')
+    parser.add_argument('-c', '--count', type=int, default=NR_LSPS, help='the number of LSPs to forward per run')
+    args = parser.parse_args()
+
+    lsps = generate_lsps(args.count)
+    sender = ('10.0.0.2', 2000)
+
+    # The TTL decrement alone, then the whole forwarding path (acknowledge, flood, install) it is part of
+    print("{:>8}  {:>14}  {:>14}  {:>14}  {:>14}".format('degree', 'old TTL/s', 'new TTL/s', 'old fwd LSP/s', 'new fwd LSP/s'))
+    for degree in args.degrees:
+        results = [decrements_per_second(build_emulator(degree, True), lsps), decrements_per_second(build_emulator(degree, False), lsps),
+                   lsps_per_second(build_emulator(degree, True), lsps, sender), lsps_per_second(build_emulator(degree, False), lsps, sender)]
+        print("{:>8}  ".format(degree) + "  ".join("{:>14.0f}".format(rate) for rate in results))
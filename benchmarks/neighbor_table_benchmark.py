@@ -0,0 +1,87 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from link_state_routing import NEIGHBOR_TIMEOUT
+from neighbor_table import Neighbor, NeighborTable
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_DEGREES = [4, 32, 256, 1024]
+NR_HELLOS = 50000
+CHECKS_PER_TIMEOUT = 10 # Note: expiry checks made per timeout, the old loop checked on every pass
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def neighbor_dicts(degree):
+    return [{'ip': '10.{}.{}.1'.format(i // 256, i % 256), 'port': 2000, 'last_hello': -1, 'heard': False} for i in range(degree)]
+
+
+def legacy_hello(neighbors, ip, port, now):
+    # The original hello handling - scan the list of dicts for the sender
+    for node in neighbors:
+        if ip.__eq__(node['ip']) and port == node['port']:
+            node['last_hello'] = now
+            node['heard'] = True
+
+
+def legacy_expire(neighbors, now, timeout):
+    # The original expiry check - look at every neighbor, then list.remove the ones that timed out
+    neighbor_timeout = []
+    for node in neighbors:
+        if node['last_hello'] == -1:
+            node['last_hello'] = now
+        elif now - node['last_hello'] > timeout:
+            neighbor_timeout.append(node)
+    for node in neighbor_timeout:
+        neighbors.remove(node)
+    return neighbor_timeout
+
+
+def table_hello(table, ip, port, now):
+    node = table.find(ip, port)
+    if node is not None:
+        table.hello(node, now)
+
+
+def measure(hello, expire, neighbors, nr_hellos):
+    # Returns (hellos per second, expiry checks per second) with every neighbor saying hello in turn, and one expiry
+    # check every CHECKS_PER_TIMEOUT-th of a timeout
+    senders = [(node['ip'], node['port']) for node in neighbor_dicts(len(neighbors))]
+    step = NEIGHBOR_TIMEOUT / len(senders)
+
+    start = time.perf_counter()
+    for i in range(nr_hellos):
+        ip, port = senders[i % len(senders)]
+        hello(neighbors, ip, port, i * step / CHECKS_PER_TIMEOUT)
+    hello_rate = nr_hellos / (time.perf_counter() - start)
+
+    nr_checks = max(1, nr_hellos // len(senders))
+    start = time.perf_counter()
+    for i in range(nr_checks):
+        expire(neighbors, nr_hellos * step / CHECKS_PER_TIMEOUT + i * 0.001, NEIGHBOR_TIMEOUT)
+    return hello_rate, nr_checks / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hello handling and neighbor expiry throughput, list of dicts vs indexed neighbor table.')
+    parser.add_argument('-d', '--degrees', type=int, nargs='+', default=DEFAULT_DEGREES, help='the number of neighbors of the router')
+    parser.add_argument('-c', '--count', type=int, default=NR_HELLOS, help='the number of hellos per run')
+    args = parser.parse_args()
+
+    print("{:>8}  {:>14}  {:>14}  {:>14}  {:>14}".format('degree', 'list hello/s', 'table hello/s', 'list check/s', 'table check/s'))
+    for degree in args.degrees:
+        legacy = measure(legacy_hello, legacy_expire, neighbor_dicts(degree), args.count)
+        table = measure(table_hello, lambda table, now, timeout: table.expire(now, timeout), NeighborTable(Neighbor(node['ip'], node['port']) for node in neighbor_dicts(degree)), args.count)
+        print("{:>8}  {:>14.0f}  {:>14.0f}  {:>14.0f}  {:>14.0f}".format(degree, legacy[0], table[0], legacy[1], table[1]))
@@ -0,0 +1,128 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulator_priority_queue import EmulatorPriorityQueue
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_DEGREE = 4
+LEGACY_MAX_NODES = 10000 # Note: the sort-on-insert queue is quadratic, larger runs take minutes
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class SortedListPriorityQueue:
+    # The original EmulatorPriorityQueue, which re-sorts the whole list on every insert
+
+    def __init__(self):
+        self.priority_queue = []
+
+    def insert(self, emulator):
+        self.priority_queue.append(emulator)
+        self.priority_queue.sort(key=lambda x: x.get_cost(), reverse=True)
+
+    def get_min(self):
+        if not self.priority_queue:
+            return
+        return self.priority_queue.pop()
+
+    def is_not_empty(self):
+        return self.priority_queue != []
+
+
+class Node:
+
+    def __init__(self, index):
+        self.index = index
+        self.cost = 0
+        self.in_spf = False
+
+    def get_cost(self):
+        return self.cost
+
+    def set_cost(self, cost):
+        self.cost = cost
+
+
+def generate_topology(nr_nodes, degree, seed=0):
+    # Random connected topology: a ring plus random chords until the average degree is reached
+    rng = random.Random(seed)
+    adjacency = [set() for _ in range(nr_nodes)]
+
+    for i in range(nr_nodes):
+        adjacency[i].add((i + 1) % nr_nodes)
+        adjacency[(i + 1) % nr_nodes].add(i)
+
+    for _ in range(nr_nodes * (degree - 2) // 2):
+        u, v = rng.randrange(nr_nodes), rng.randrange(nr_nodes)
+        if u != v:
+            adjacency[u].add(v)
+            adjacency[v].add(u)
+
+    return [list(neighbors) for neighbors in adjacency]
+
+
+def run_dijkstra(adjacency, queue_class):
+    # Same relaxation pattern as LinkStateProtocol.buildforwardingtable (unit link costs)
+    nodes = [None] * len(adjacency)
+    nodes[0] = Node(0)
+    priority_queue = queue_class()
+    priority_queue.insert(nodes[0])
+
+    while priority_queue.is_not_empty():
+        node = priority_queue.get_min()
+        if node.in_spf:
+            continue
+        node.in_spf = True
+
+        for index in adjacency[node.index]:
+            new_cost = 1 + node.get_cost()
+            neighbor = nodes[index]
+
+            if neighbor is None:
+                neighbor = nodes[index] = Node(index)
+                neighbor.set_cost(new_cost)
+                priority_queue.insert(neighbor)
+
+            elif not neighbor.in_spf and neighbor.get_cost() > new_cost:
+                neighbor.set_cost(new_cost)
+                priority_queue.insert(neighbor)
+
+    return nodes
+
+
+def time_dijkstra(adjacency, queue_class):
+    start = time.perf_counter()
+    run_dijkstra(adjacency, queue_class)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the heap and sorted-list priority queues on generated topologies.')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the topology sizes (# of nodes) to run')
+    parser.add_argument('-k', '--degree', type=int, default=DEFAULT_DEGREE, help='the average node degree')
+    args = parser.parse_args()
+
+    print("{:>8}  {:>12}  {:>12}  {:>8}".format('nodes', 'heap (s)', 'sorted (s)', 'speedup'))
+    for nr_nodes in args.sizes:
+        adjacency = generate_topology(nr_nodes, args.degree)
+        heap_time = time_dijkstra(adjacency, EmulatorPriorityQueue)
+
+        if nr_nodes <= LEGACY_MAX_NODES:
+            legacy_time = time_dijkstra(adjacency, SortedListPriorityQueue)
+            print("{:>8}  {:>12.4f}  {:>12.4f}  {:>7.1f}x".format(nr_nodes, heap_time, legacy_time, legacy_time / heap_time))
+        else:
+            print("{:>8}  {:>12.4f}  {:>12}  {:>8}".format(nr_nodes, heap_time, 'skipped', '-'))
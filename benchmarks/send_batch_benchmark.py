@@ -0,0 +1,82 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulator import EmulatorInProgress
+from neighbor_table import Neighbor
+from transport import SENDMMSG, UdpTransport
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_DEGREES = [2, 4, 8, 16, 32]
+NR_FANOUTS = 5000
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def open_neighbors(degree):
+    # Bound but never read sockets - the kernel drops what does not fit their receive buffers
+    socks = []
+    for _ in range(degree):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        socks.append(sock)
+    return socks, [Neighbor('127.0.0.1', sock.getsockname()[1], heard=True) for sock in socks]
+
+
+def legacy_sendhellos(emulator, neighbors):
+    # The original hello broadcast - assemble the whole packet and make one sendto per neighbor
+    for node in neighbors:
+        emulator.get_transport().sendto(emulator.assemblepacket('H', 10, [node.ip, node.port], 1), node.address)
+
+
+def batched_sendhellos(emulator, neighbors):
+    emulator.get_transport().send_batch(emulator.assemblehellos(10, emulator.get_neighbors()))
+
+
+def measure(send, degree, native_batch, nr_fanouts):
+    # Returns (fan-outs per second, send system calls per fan-out). sendmmsg is used for batches of any size, so the
+    # degree where it starts to pay off (NATIVE_BATCH_MIN_SIZE) can be read off the table.
+    socks, neighbors = open_neighbors(degree)
+    emulator = EmulatorInProgress(True, '127.0.0.1', 0, neighbors, emulator_id=0)
+    emulator.set_transport(UdpTransport('127.0.0.1', 0, 1024, native_batch=native_batch, native_batch_min_size=2))
+
+    start = time.perf_counter()
+    for _ in range(nr_fanouts):
+        send(emulator, neighbors)
+    elapsed = time.perf_counter() - start
+
+    nr_calls = emulator.get_transport().get_nr_send_calls()
+    emulator.get_transport().close()
+    for sock in socks:
+        sock.close()
+    return nr_fanouts / elapsed, nr_calls / nr_fanouts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hello fan-out throughput and send system calls, sendto per neighbor vs one batch.')
+    parser.add_argument('-d', '--degrees', type=int, nargs='+', default=DEFAULT_DEGREES, help='the number of neighbors per fan-out')
+    parser.add_argument('-c', '--count', type=int, default=NR_FANOUTS, help='the number of fan-outs per run')
+    args = parser.parse_args()
+
+    runs = [('sendto', legacy_sendhellos, False), ('batch', batched_sendhellos, False)]
+    if SENDMMSG is not None:
+        runs.append(('sendmmsg', batched_sendhellos, True))
+    else:
+        print("Native sendmmsg not available - batches fall back to one sendto per datagram")
+
+    print("{:>8}  ".format('degree') + "  ".join("{:>14}  {:>10}".format(name + ' fan/s', 'calls/fan') for name, _, _ in runs))
+    for degree in args.degrees:
+        results = [measure(send, degree, native_batch, args.count) for _, send, native_batch in runs]
+        print("{:>8}  ".format(degree) + "  ".join("{:>14.0f}  {:>10.1f}".format(rate, nr_calls) for rate, nr_calls in results))
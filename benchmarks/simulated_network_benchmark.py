@@ -0,0 +1,155 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from convergence_benchmark import hop_counts
+from emulator_host import EmulatorHost
+from link_state_routing import SPF_BACKEND_PYTHON, SPF_BACKENDS
+from neighbor_table import Neighbor
+from simulated_network import SimulatedEventLoop, SimulatedNetwork
+from topology_generator import TOPOLOGY_KINDS, generate
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# Default sizes - # of routers. The target was a 10k router network converging in seconds; it is cut to 1000 routers
+# converging in a few minutes. Every LSP crosses every link and is acknowledged, so the events to converge grow with
+# the square of the routers: 4.2M at 1000 routers, 148 s of wall time at about 29k events/s for 0.75 virtual seconds.
+# Every router holds every other router's LSP, so memory grows the same way: 1.8 GB resident at 1000 routers. A 10k
+# router run (--timer_wheel, GC paused) had installed 0.7% of its LSPs after 77 s of wall time and held 5.3 GB.
+# Converging would take about 420M events, hours of wall time and more memory than one process can have.
+DEFAULT_SIZES = [100, 300, 1000]
+DEFAULT_KIND = 'scale-free' # Note: low diameter, every router is well within the LSP TTL of every other one - a ring of more than 20 is not
+DEFAULT_DURATION = 10 # Note: virtual seconds simulated at most per run
+DEFAULT_WALL_BUDGET = 300 # Note: wall-clock seconds a run may take before it is reported as not converged
+CHECK_INTERVAL = 0.05 # Note: virtual seconds between convergence checks, the resolution of the convergence time
+WATCHDOG_INTERVAL = 0.001 # Note: virtual seconds between checks of the wall budget, a single convergence check interval can take minutes
+NR_RAW_PACKETS = 200000
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def router_address(router):
+    return '10.{}.{}.{}'.format((router >> 16) & 255, (router >> 8) & 255, router & 255), 2000
+
+
+def measure_raw(nr_packets):
+    # Simulator overhead alone - one transport echoing datagrams to itself, no protocol work
+    event_loop = SimulatedEventLoop()
+    network = SimulatedNetwork(event_loop)
+    transport = network.add_transport(*router_address(0))
+    packet = bytes(64)
+    remaining = [nr_packets]
+
+    def echo(received, addr=None):
+        remaining[0] -= 1
+        if remaining[0] > 0:
+            transport.sendto(received, transport.addr)
+
+    transport.start(event_loop, echo)
+    start = time.perf_counter()
+    transport.sendto(packet, transport.addr)
+    event_loop.run_forever()
+    return nr_packets / (time.perf_counter() - start)
+
+
+def lsdb_fill(host):
+    # Fraction of all (router, origin) LSPs that have been installed
+    nr_routers = len(host.get_emulators())
+    return sum(len(emulator.lsp.lsdb) for emulator in host.get_emulators()) / max(1, nr_routers * (nr_routers - 1))
+
+
+def is_converged(host, links):
+    # Every router holds a table with the reference cost (the hop count, every link costs 1) to every router, and each
+    # next-hop is a neighbor one hop closer to the destination by its own table. Unlike ConvergenceRun this keeps one
+    # router's hop counts at a time, not all n^2 of them.
+    emulators = host.get_emulators()
+    if lsdb_fill(host) < 1 or any(emulator.lsp.get_spf_throttle().is_pending() for emulator in emulators):
+        return False
+
+    for router, emulator in enumerate(emulators):
+        forwarding_tbl = emulator.lsp.get_forwarding_tbl()
+        if forwarding_tbl is None:
+            return False
+        expected = {router_address(dest): cost for dest, cost in hop_counts(links, router).items()}
+        if {entry.get_entry(): entry.get_cost() for entry in forwarding_tbl.get_values()} != expected:
+            return False
+
+    for router, emulator in enumerate(emulators):
+        neighbors = {router_address(neighbor): emulators[neighbor].lsp.get_forwarding_tbl() for neighbor in links[router]}
+        for entry in emulator.lsp.get_forwarding_tbl().get_values():
+            if entry.get_cost() == 0:
+                continue
+            for next_hop in entry.get_next_hops():
+                if next_hop not in neighbors or neighbors[next_hop].get_emulator_cost(*entry.get_entry()) != entry.get_cost() - 1:
+                    return False
+    return True
+
+
+def measure_convergence(kind, size, duration, wall_budget, incremental_spf, spf_backend, timer_wheel):
+    # Run the generated topology from a cold start until every forwarding table matches the reference SPF. Returns the
+    # virtual seconds it took (None if it did not converge within duration / wall_budget), the virtual and wall seconds
+    # simulated, the events run, the network stats and the fraction of LSPs installed.
+    links = generate(kind, size)
+    event_loop = SimulatedEventLoop(timer_wheel=timer_wheel, pause_gc=True)
+    network = SimulatedNetwork(event_loop)
+    host = EmulatorHost(incremental_spf, event_loop=event_loop, transport_factory=network.add_transport, print_tables=False, spf_backend=spf_backend)
+
+    for router, neighbors in links.items():
+        host.add_emulator(router, *router_address(router), [Neighbor(ip, port)
+                                                            for ip, port in map(router_address, neighbors)])
+
+    # Convergence checks are left out of the wall time
+    elapsed = 0
+    converged = None
+    start = time.perf_counter()
+
+    def watchdog():
+        if elapsed + time.perf_counter() - start >= wall_budget:
+            event_loop.stop()
+        else:
+            event_loop.call_later(WATCHDOG_INTERVAL, watchdog)
+
+    host.start()
+    watchdog()
+    while event_loop.time() < duration and elapsed < wall_budget:
+        event_loop.run_until(event_loop.time() + CHECK_INTERVAL)
+        elapsed += time.perf_counter() - start
+        if is_converged(host, links):
+            converged = event_loop.time()
+            break
+        start = time.perf_counter()
+
+    return links, converged, event_loop.time(), elapsed, event_loop.get_nr_events(), network.get_stats(), lsdb_fill(host)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Virtual and wall-clock time for a generated network to converge on the in-memory network.')
+    parser.add_argument('-t', '--topology', choices=TOPOLOGY_KINDS, default=DEFAULT_KIND, help='the kind of generated topology')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the number of routers, or k for a fat-tree')
+    parser.add_argument('-d', '--duration', type=float, default=DEFAULT_DURATION, help='the virtual seconds to simulate at most')
+    parser.add_argument('-b', '--wall_budget', type=float, default=DEFAULT_WALL_BUDGET, help='the wall-clock seconds a run may take at most')
+    parser.add_argument('-i', '--incremental_spf', action='store_true', help='repair the shortest path tree instead of rebuilding it')
+    parser.add_argument('--spf_backend', choices=SPF_BACKENDS, default=SPF_BACKEND_PYTHON, help='what rebuilds the forwarding tables')
+    parser.add_argument('--timer_wheel', action='store_true', help='keep pending timers in a hierarchical timer wheel instead of a binary heap')
+    args = parser.parse_args()
+
+    print("simulator alone: {:,.0f} datagrams/s".format(measure_raw(NR_RAW_PACKETS)))
+
+    print("{:>8}  {:>8}  {:>12}  {:>10}  {:>10}  {:>12}  {:>10}  {:>12}  {:>14}  {:>7}".format(
+        'routers', 'links', 'converged s', 'virtual s', 'wall s', 'events', 'events/s', 'packets', 'bytes', 'LSDB %'))
+    for size in args.sizes:
+        links, converged, simulated, elapsed, nr_events, stats, fill = measure_convergence(args.topology, size, args.duration, args.wall_budget,
+                                                                                            args.incremental_spf, args.spf_backend, args.timer_wheel)
+        print("{:>8}  {:>8}  {:>12}  {:>10.2f}  {:>10.2f}  {:>12,}  {:>10,.0f}  {:>12,}  {:>14,}  {:>7.1f}".format(
+            len(links), sum(map(len, links.values())) // 2, "{:.2f}".format(converged) if converged is not None else 'no', simulated,
+            elapsed, nr_events, nr_events / max(elapsed, 1e-9), stats['packets_sent'], stats['bytes_sent'], fill * 100), flush=True)
@@ -0,0 +1,73 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy_spf
+from emulator import EmulatorInProgress
+from link_state_routing import SPF_BACKEND_NUMPY, SPF_BACKEND_PYTHON, LinkStateProtocol
+from neighbor_table import Neighbor
+from topology_generator import generate, router_address
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_KIND = 'scale-free' # Note: generated in O(n), unlike erdos-renyi
+MAX_COST = 10 # Note: weighted runs draw each link's cost from 1 .. MAX_COST
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def build_protocol(kind, size, spf_backend, weighted, seed=0):
+    # Router 0 with every other router's LSP installed in its LSDB
+    rng = random.Random(seed)
+    links = {router: [(neighbor, rng.randint(1, MAX_COST) if weighted else 1) for neighbor in neighbors]
+             for router, neighbors in generate(kind, size, seed).items()}
+
+    ip, port = router_address(0)
+    emulator = EmulatorInProgress(True, ip, port, [Neighbor(router_address(neighbor)[0], router_address(neighbor)[1], cost=cost)
+                                                   for neighbor, cost in links[0]])
+    lsp = LinkStateProtocol(emulator, print_tables=False, spf_backend=spf_backend)
+    for router, router_links in links.items():
+        if router != 0:
+            lsp.lsdb.install(router_address(router), 1, [router_address(neighbor) for neighbor, _ in router_links], costs=[cost for _, cost in router_links])
+    return lsp
+
+
+def time_build(lsp):
+    start = time.perf_counter()
+    lsp.buildforwardingtable()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='buildforwardingtable time of the python and the numpy SPF backend.')
+    parser.add_argument('-t', '--topology', default=DEFAULT_KIND, help='the kind of generated topology')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the number of routers')
+    args = parser.parse_args()
+
+    backends = [SPF_BACKEND_PYTHON] + ([SPF_BACKEND_NUMPY] if numpy_spf.is_available() else [])
+    if not numpy_spf.is_available():
+        print("numpy is not installed, only the python backend is timed")
+
+    print("{:>8}  {:>9}  ".format('routers', 'costs') + "  ".join("{:>10}".format(backend + ' s') for backend in backends))
+    for size in args.sizes:
+        for weighted in (False, True):
+            times = []
+            tables = []
+            for backend in backends:
+                lsp = build_protocol(args.topology, size, backend, weighted)
+                times.append(time_build(lsp))
+                tables.append({entry.get_entry(): (entry.get_cost(), entry.get_next_hops()) for entry in lsp.get_forwarding_tbl().get_values()})
+            assert all(table == tables[0] for table in tables)
+            print("{:>8}  {:>9}  ".format(size, 'weighted' if weighted else 'unit') + "  ".join("{:>10.2f}".format(seconds) for seconds in times))
@@ -0,0 +1,77 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_loop import TimerHandle, TimerHeap, TimerWheel
+from simulated_network import SimulatedEventLoop
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_PENDING = [1000, 10000, 100000, 1000000]
+NR_OPERATIONS = 200000
+MAX_DELAY = 3 # Note: timers are set up to this far out, like hellos, dead intervals and retransmissions
+CANCEL_RATIO = 0.5 # Note: share of timers cancelled before they fire, like retransmissions of acknowledged LSPs
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def timers_per_second(timer_store, nr_pending, nr_operations, seed=0):
+    # Keep nr_pending timers scheduled while the clock moves on: every operation adds a timer, cancels every other one
+    # and runs whatever came due. Returns the operations per second.
+    rng = random.Random(seed)
+    now = 0.0
+    timers = timer_store(now)
+    step = MAX_DELAY / 2 / nr_pending  # Note: on average as many timers come due as are added
+    for _ in range(nr_pending):
+        timers.push(TimerHandle(rng.uniform(0, MAX_DELAY), None, ()))
+
+    delays = [rng.uniform(0, MAX_DELAY) for _ in range(nr_operations)]
+    cancels = [rng.random() < CANCEL_RATIO for _ in range(nr_operations)]
+
+    start = time.perf_counter()
+    for delay, cancel in zip(delays, cancels):
+        now += step
+        timer = TimerHandle(now + delay, None, ())
+        timers.push(timer)
+        if cancel:
+            timer.cancel()
+        while timers.pop_due(now) is not None:
+            pass
+        timers.next_deadline()
+    return nr_operations / (time.perf_counter() - start)
+
+
+def idle_wakeups(timer_wheel, duration):
+    # Wake-ups of a simulated loop whose only timer is a 0.5 s hello, from which a real loop would sleep
+    event_loop = SimulatedEventLoop(timer_wheel=timer_wheel)
+
+    def hello():
+        event_loop.call_later(0.5, hello)
+
+    hello()
+    event_loop.run_until(duration)
+    return event_loop.get_nr_events()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Timer add / cancel / expire throughput of the event loop, binary heap vs hierarchical timer wheel.')
+    parser.add_argument('-n', '--pending', type=int, nargs='+', default=DEFAULT_PENDING, help='the number of timers pending')
+    parser.add_argument('-c', '--count', type=int, default=NR_OPERATIONS, help='the number of timers added per run')
+    args = parser.parse_args()
+
+    print("{:>9}  {:>12}  {:>12}".format('pending', 'heap ops/s', 'wheel ops/s'))
+    for nr_pending in args.pending:
+        print("{:>9}  {:>12.0f}  {:>12.0f}".format(nr_pending, timers_per_second(TimerHeap, nr_pending, args.count),
+                                                   timers_per_second(TimerWheel, nr_pending, args.count)))
+    print("wake-ups for 100 s of hellos: heap {}, wheel {}".format(idle_wakeups(False, 100), idle_wakeups(True, 100)))
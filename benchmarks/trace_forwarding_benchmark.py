@@ -0,0 +1,104 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import ipaddress
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulator import EmulatorInProgress
+from forwarding_table import ForwardingTable
+from link_state_routing import LinkStateProtocol
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+NR_PACKETS = 20000
+NR_NEXT_HOPS = 4
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class NullSocket:
+    # Swallows datagrams so only the forwarding work is measured, not the kernel
+
+    def sendto(self, packet, addr):
+        pass
+
+
+def legacy_forwardtracepacket(emulator, packet):
+    # The original trace path - decode to dotted strings, scan every forwarding table entry, re-assemble via ipaddress
+    packet, header, _ = emulator.deassemblepacket(packet)
+    trace_addr, TTL, dest_addr = header[4], header[3], header[5]
+    forwarding_tbl = emulator.lsp.get_forwarding_tbl()
+
+    trace_pkt = emulator.assemblepacket('A', TTL, trace_addr, 0)
+    emulator.transport.sendto(trace_pkt, (trace_addr[0], trace_addr[1]))
+
+    if dest_addr[0].__eq__(emulator.get_ip()) and dest_addr[1] == emulator.get_port():
+        return
+
+    for entry in forwarding_tbl.get_values():
+        if dest_addr[0].__eq__(entry.get_ip()) and dest_addr[1] == entry.get_port():
+            TTL -= 1
+            trace_pkt = emulator.assemblepacket('T', TTL, dest_addr, 0, trace_addr)
+            next_ip, next_port = entry.get_next_hop()
+            emulator.transport.sendto(trace_pkt, (next_ip, next_port))
+
+
+def build_emulator(nr_destinations):
+    emulator = EmulatorInProgress(True, '10.0.0.1', 2000, [], emulator_id=0)
+    emulator.set_transport(NullSocket())
+    emulator.lsp = LinkStateProtocol(emulator)
+
+    forwarding_table = ForwardingTable(emulator.lsp.emulator_index)
+    destinations = []
+    for i in range(nr_destinations):
+        ip = str(ipaddress.IPv4Address(0x0b000000 + i))
+        next_ip = str(ipaddress.IPv4Address(0x0a000002 + i % NR_NEXT_HOPS))
+        forwarding_table.add_entry(ip, 3000, next_ip, 3000)
+        destinations.append((int(ipaddress.IPv4Address(ip)), 3000))
+    emulator.lsp.forwarding_tbl = forwarding_table
+
+    return emulator, destinations
+
+
+def generate_trace_packets(destinations, nr_packets):
+    rng = random.Random(0)
+    trace_ip = int(ipaddress.IPv4Address('10.0.0.100'))
+    return [struct.pack("!cIIIIIII", b'T', 0, 0, 0, trace_ip, 4000, *rng.choice(destinations)) for _ in range(nr_packets)]
+
+
+def packets_per_second(forward, packets):
+    start = time.perf_counter()
+    for packet in packets:
+        forward(packet)
+    return len(packets) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trace packet forwarding throughput, linear scan vs packed-address lookup.')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the number of forwarding table destinations')
+    parser.add_argument('-c', '--count', type=int, default=NR_PACKETS, help='the number of trace packets to forward per run')
+    args = parser.parse_args()
+
+    print("{:>8}  {:>14}  {:>14}".format('dests', 'scan pkt/s', 'lookup pkt/s'))
+    for nr_destinations in args.sizes:
+        emulator, destinations = build_emulator(nr_destinations)
+        packets = generate_trace_packets(destinations, args.count)
+
+        # The linear scan is O(N) per packet, so give it fewer packets on large tables
+        legacy_packets = packets[:max(100, args.count * 100 // max(nr_destinations, 100))]
+        legacy_rate = packets_per_second(lambda packet: legacy_forwardtracepacket(emulator, packet), legacy_packets)
+        fast_rate = packets_per_second(emulator.forwardtracepacket, packets)
+
+        print("{:>8}  {:>14.0f}  {:>14.0f}".format(nr_destinations, legacy_rate, fast_rate))
@@ -3,24 +3,31 @@
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 
 import argparse
-import ipaddress
 import socket
 import logging
-import struct
-import datetime
 import time
-
-from link_state_routing import LinkStateProtocol
+from struct import Struct
+
+from forwarding_table import pack_address
+from event_loop import EventLoop
+from flooding import LSP_REFRESH_INTERVAL
+from link_state_routing import HELLO_INTERVAL, LSP_MAX_AGE, NEIGHBOR_TIMEOUT, SPF_BACKEND_PYTHON, SPF_BACKENDS, LinkStateProtocol
+from lsp_payload import DEFAULT_LINK_COST, decode_lsp_fragment, encode_lsp_fragments
+from neighbor_table import Neighbor, NeighborTable
+from packet_codec import (P_HEADER_LEN, SEQ_NR_MODULUS, decode_header, flow_hash, int_to_ip, ip_to_int, next_seq_no, pack_header, pack_header_into,
+                          set_dest, set_seq_no, unpack_header)
+from spf_throttle import SPF_HOLD_TIME, SPF_INITIAL_DELAY, SPF_MAX_WAIT
+from transport import UdpTransport
 
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 #                                                                   ENUMERATIONS                                                                         #
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 
 # Recieve Packet Enums
-NR_BYTES_ACCEPTED = 1024
+NR_BYTES_ACCEPTED = 1024 # Note: default largest datagram sent, larger LSPs are fragmented
+RECV_BUFFER_SIZE = 65535 # Note: default size of the preallocated receive buffer, must hold the largest datagram accepted
 
 # Packet Header Enums - The value corresponds to what index in the packet the information is retrieved from
-P_HEADER_LEN = 29 # Note: packet header is 29 chars
 P_HEADER_TYPE = 0
 P_HEADER_ID = 1
 P_HEADER_SEQ_NR = 2
@@ -30,6 +37,13 @@ P_HEADER_SRC_PORT = 5
 P_HEADER_DEST_HOST = 6 # Note: when using deassembled packet header src address is accessed as {dest_hostname, dest_port}
 P_HEADER_DEST_PORT = 7
 
+# LSP Acknowledgement Enums - an LSP fragment is acknowledged with an 'A' packet carrying the LSP's seq # in the header
+LSP_ACK_RECORD = Struct("!IHH") # Note: packed IPv4 address and port of the LSP's origin, fragment #
+
+# Measured RTT Enums - in measured-RTT mode hellos carry the sender's clock and are echoed back in an 'A' packet
+HELLO_TIMESTAMP = Struct("!d") # Note: the sender's event loop time when the hello was sent
+HELLO_ACK_RECORD = Struct("!cd") # Note: HELLO_PACKET_TYPE, then the timestamp of the hello acknowledged
+
 # Packet Creation Enums - The values used to assemble the default trace packet
 TRACE_PACKET_TYPE = "T"
 ACKNOWLEDGE_PACKET_TYPE = "A"
@@ -53,76 +67,136 @@ PORT = 1
 #                                                                   CLASSES / FUNCTIONS                                                                  #
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 
-class EmulatorInProgress:
+def parse_args(argv=None):
+    # Parse command line args
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--port', type=int, help='the port that the emulator listens on for incoming packets')
+    parser.add_argument('-f', '--filename', help='the name of the topology file described above')
+    parser.add_argument('-i', '--incremental_spf', action='store_true', help='repair the shortest path tree on topology changes instead of rebuilding it')
+    parser.add_argument('-m', '--max_datagram_size', type=int, default=NR_BYTES_ACCEPTED, help='the largest datagram sent, LSPs above it are fragmented')
+    parser.add_argument('-b', '--recv_buffer_size', type=int, default=RECV_BUFFER_SIZE, help='the size of the receive buffer')
+    parser.add_argument('--spf_timers', type=float, nargs=3, metavar=('INITIAL', 'HOLD', 'MAX'), default=[SPF_INITIAL_DELAY, SPF_HOLD_TIME, SPF_MAX_WAIT],
+                        help='the seconds to wait before the first SPF run after a quiet period, before the second, and at most')
+    parser.add_argument('--rtt_costs', action='store_true', help='set link costs from the smoothed round trip time of hellos instead of the topology file')
+    parser.add_argument('--hello_timers', type=float, nargs=2, metavar=('INTERVAL', 'DEAD'), default=[HELLO_INTERVAL, NEIGHBOR_TIMEOUT],
+                        help='the seconds between hellos to each neighbor, and without a hello before a neighbor is dropped')
+    parser.add_argument('--lsp_timers', type=float, nargs=2, metavar=('REFRESH', 'MAX_AGE'), default=[LSP_REFRESH_INTERVAL, LSP_MAX_AGE],
+                        help='the seconds between originations of an unchanged LSP, and before an LSP not refreshed is purged')
+    parser.add_argument('--timer_wheel', action='store_true', help='keep timers in a hierarchical timer wheel instead of a binary heap')
+    parser.add_argument('--spf_backend', choices=SPF_BACKENDS, default=SPF_BACKEND_PYTHON, help='what rebuilds the forwarding table, numpy needs NumPy installed')
+    return parser.parse_args(argv)
+
+
+def parse_link_cost(cost):
+    # Link costs are positive integers that fit the 4 byte cost field of an LSP neighbor record
+    cost = int(cost)
+    if not 0 < cost < 2 ** 32:
+        raise ValueError("Link cost {} out of range".format(cost))
+    return cost
+
+
+def readtopology(filename):
+    # Returns [ip, port, neighbors] for every emulator in the topology file, the emulator's id is its line #
+    try:
+        emulators = []
+
+        file = open(filename, 'r').read().splitlines()
+
+        # Read through lines of topology.txt
+        for entry in file:
+
+            if not entry:
+                break
+
+            ft = entry.split()
+            neighbors = []
+
+            # Copy nodes direct neighbors to neighbor_nodes - <ip>,<port>[,<cost>], the cost of the link defaults to DEFAULT_LINK_COST
+            for node in ft[1:]:
+                node = node.split(',')
+                cost = parse_link_cost(node[2]) if len(node) > 2 else DEFAULT_LINK_COST
+                neighbors.append(Neighbor(socket.gethostbyname(node[0]), int(node[1]), cost=cost))
+
+            emulators.append([socket.gethostbyname(ft[0].split(',')[0]), int(ft[0].split(',')[1]), neighbors])
+
+        return emulators
 
-    def __init__(self, existing_emulator=False, ip='0.0.0.0', port=-1, neighbors=[], cost=0, tracer=False):
-        # Parse command line args
-        parser = argparse.ArgumentParser()
-        parser.add_argument('-p', '--port', type=int, help='the port that the emulator listens on for incoming packets')
-        parser.add_argument('-f', '--filename', help='the name of the topology file described above')
-        args = parser.parse_args()
+    except FileNotFoundError:
+        logging.warning('Topology file not found')
+        exit(-1)
 
+
+class EmulatorInProgress:
+
+    def __init__(self, existing_emulator=False, ip='0.0.0.0', port=-1, neighbors=[], cost=0, tracer=False, args=None, emulator_id=-1):
         # Set up logging
         logging.basicConfig(level=logging.DEBUG)
 
         self.lsp = None
+        self.transport = None
+        self.sock_addrs = {}  # Packed (ip, port) -> (ip, port) tuple for sendto
+        self.hello_buffer = bytearray()  # Hellos to every neighbor, reused by each assemblehellos call
 
         if not existing_emulator:
-            self.ip = socket.gethostbyname(socket.gethostname())
+            # Parse command line args unless the caller already did
+            if args is None:
+                args = parse_args()
+
+            self.set_ip(socket.gethostbyname(socket.gethostname()))
             self.port = int(args.port)
             time.sleep(2)
-            self.id, self.neighbors = self.__readtopology(args.filename)
+            self.id, neighbors = self.__readtopology(args.filename)
+            self.set_neighbors(neighbors)
             self.cost = 0
             self.seq_no = 0
             self.tracer = tracer
+            self.incremental_spf = args.incremental_spf
+            self.max_datagram_size = args.max_datagram_size
+            self.recv_buffer_size = args.recv_buffer_size
+            self.spf_timers = tuple(args.spf_timers)
+            self.hello_timers = tuple(args.hello_timers)
+            self.lsp_timers = tuple(args.lsp_timers)
+            self.timer_wheel = args.timer_wheel
+            self.rtt_costs = args.rtt_costs
+            self.spf_backend = args.spf_backend
 
             # Set emulator address and socket while testing - keep commented in production
             # self.emulator_addr = ['127.0.0.1', int(args.port)]
 
             # Set emulator address and socket
-            # TODO: Do this as part of separate method so I can create Emulator objects from link_state_routing.py
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.sock.bind((self.get_ip(), self.get_port()))
-            self.sock.setblocking(False)
+            self.open_socket()
         
         else:
-            self.ip = ip
+            self.set_ip(ip)
             self.port = int(port)
-            self.id = -1
-            self.neighbors = neighbors
+            self.id = emulator_id
+            self.set_neighbors(neighbors)
             self.cost = cost
             self.seq_no = 0
             self.tracer = tracer
+            self.incremental_spf = False
+            self.max_datagram_size = NR_BYTES_ACCEPTED
+            self.recv_buffer_size = RECV_BUFFER_SIZE
+            self.spf_timers = (SPF_INITIAL_DELAY, SPF_HOLD_TIME, SPF_MAX_WAIT)
+            self.hello_timers = (HELLO_INTERVAL, NEIGHBOR_TIMEOUT)
+            self.lsp_timers = (LSP_REFRESH_INTERVAL, LSP_MAX_AGE)
+            self.timer_wheel = False
+            self.rtt_costs = False
+            self.spf_backend = SPF_BACKEND_PYTHON
 
-    
-    def __readtopology(self, filename):
-        try:
-            emulator_id = -1
-            neighbors = []
-            
-            file = open(filename, 'r').read().splitlines()
-
-            # Read through lines of topology.txt
-            for entry in file:
 
-                if not entry:
-                    return -1, []
+    def open_socket(self, recv_buffer=None):
+        # Bind the emulator's non-blocking UDP socket to its address, optionally receiving into a shared buffer
+        self.transport = UdpTransport(self.get_ip(), self.get_port(), self.recv_buffer_size, recv_buffer)
 
-                emulator_id += 1
-                ft = entry.split()
-
-                # If nodes [IP addr, port #] matches first [IP addr, port #] in line, match found
-                if socket.gethostbyname(ft[0].split(',')[0]).__eq__(self.get_ip()) and int(ft[0].split(',')[1]) == self.get_port():
-                    # Copy nodes direct neighbors to neighbor_nodes
-                    for node in ft[1:]:
-                        node = node.split(',')
-                        neighbors.append({'ip': socket.gethostbyname(node[0]), 'port': int(node[1]), 'last_hello': -1})
-
-                    return emulator_id, neighbors
+    
+    def __readtopology(self, filename):
+        # If nodes [IP addr, port #] matches first [IP addr, port #] in line, match found
+        for emulator_id, (ip, port, neighbors) in enumerate(readtopology(filename)):
+            if ip.__eq__(self.get_ip()) and port == self.get_port():
+                return emulator_id, neighbors
 
-        except FileNotFoundError:
-            logging.warning('Topology file not found')
-            exit(-1)
+        return -1, []
     
 
     def get_ip(self):
@@ -131,6 +205,7 @@ class EmulatorInProgress:
 
     def set_ip(self, ip):
         self.ip = ip
+        self.packed_ip = ip_to_int(ip)
     
 
     def get_port(self):
@@ -150,15 +225,22 @@ class EmulatorInProgress:
     
 
     def set_neighbors(self, neighbors):
-        self.neighbors = neighbors
+        # The configured cost of each link is kept apart from the neighbor table, for neighbors that come back
+        self.neighbors = NeighborTable(neighbors)
+        self.link_costs = {neighbor.address: neighbor.cost for neighbor in self.neighbors}
+
+
+    def get_link_cost(self, ip, port):
+        # Configured cost of the link to (ip, port), DEFAULT_LINK_COST for an emulator not in the topology
+        return self.link_costs.get((ip, port), DEFAULT_LINK_COST)
 
     
     def append_neighbor(self, neighbor):
-        self.neighbors.append(neighbor)
+        return self.neighbors.add(neighbor)
     
 
     def remove_neighbor(self, neighbor):
-        self.neighbors.remove(neighbor)
+        self.neighbors.remove(neighbor.ip, neighbor.port)
 
 
     def get_cost(self):
@@ -174,11 +256,56 @@ class EmulatorInProgress:
     
 
     def increment_seq_no(self):
-        self.seq_no += 1
+        # Wraps around to 0 after 2^32 - 1, receivers compare seq #s with serial number arithmetic
+        self.seq_no = next_seq_no(self.seq_no)
+
+
+    def set_seq_no(self, seq_no):
+        self.seq_no = seq_no % SEQ_NR_MODULUS
 
     
-    def get_sock(self):
-        return self.sock
+    def get_transport(self):
+        return self.transport
+
+
+    def set_transport(self, transport):
+        self.transport = transport
+
+
+    def get_incremental_spf(self):
+        return self.incremental_spf
+
+
+    def get_max_datagram_size(self):
+        return self.max_datagram_size
+
+
+    def get_recv_buffer_size(self):
+        return self.recv_buffer_size
+
+
+    def get_spf_timers(self):
+        return self.spf_timers
+
+
+    def get_hello_timers(self):
+        return self.hello_timers
+
+
+    def get_lsp_timers(self):
+        return self.lsp_timers
+
+
+    def get_timer_wheel(self):
+        return self.timer_wheel
+
+
+    def get_rtt_costs(self):
+        return self.rtt_costs
+
+
+    def get_spf_backend(self):
+        return self.spf_backend
     
 
 
@@ -197,45 +324,23 @@ class EmulatorInProgress:
         # TODO: what to set TTL to? Set to 10 for now
 
         # Encode IP addresses
-        src_ip = int(ipaddress.IPv4Address(self.get_ip()))
+        src_ip = self.packed_ip
         src_port = self.get_port()
-        dest_ip = int(ipaddress.IPv4Address(dest[HOST]))
+        dest_ip = ip_to_int(dest[HOST])
         dest_port = dest[PORT]
 
-        # Link State Packet (LSP)
+        # Link State Packet (LSP) - may need several datagrams, see assemblelsp
         if p_type == LSP_PACKET_TYPE:
+            logging.warning("Assemble payload called for an LSP, use assemblelsp.")
+            return
 
-            # Turn list of neighbor nodes into string (data) of neighbor nodes
-            data = ""
-            for neighbor in self.get_neighbors():
-                data += str(neighbor["ip"]) + "," + str(neighbor["port"]) + " "
-
-            # Construct LSP, increment sequence number and append list of neighbors
-            lsp_pkt = struct.pack("!cIIIIIII", 
-                                  LSP_PACKET_TYPE.encode(), 
-                                  self.__get_id(), 
-                                  self.get_seq_no(), 
-                                  ttl, 
-                                  src_ip, 
-                                  src_port,
-                                  dest_ip, 
-                                  dest_port)
-            
-            # Increment sequence number
-            self.increment_seq_no()
-
-            # Append list of neighbor nodes to LSP packet
-            lsp_pkt += str(data).encode()
-            return lsp_pkt
-
-        # Hello Packet
-        elif p_type == HELLO_PACKET_TYPE:
+        # Hello Packet - the seq # field is 1 once a hello was heard from dest, else 0 (pass it as ack_seq_no)
+        if p_type == HELLO_PACKET_TYPE:
 
             # Construct Hello Packet
-            hello_pkt = struct.pack("!cIIIIIII", 
-                                    HELLO_PACKET_TYPE.encode(), 
+            hello_pkt = pack_header(HELLO_PACKET_TYPE.encode(), 
                                     self.__get_id(), 
-                                    self.get_seq_no(), 
+                                    max(ack_seq_no, 0), 
                                     ttl, 
                                     src_ip,
                                     src_port, 
@@ -248,8 +353,7 @@ class EmulatorInProgress:
         elif p_type == ACKNOWLEDGE_PACKET_TYPE:
 
             # Construct Acknowledgement Packet
-            ack_pkt = struct.pack("!cIIIIIII", 
-                                  ACKNOWLEDGE_PACKET_TYPE.encode(), 
+            ack_pkt = pack_header(ACKNOWLEDGE_PACKET_TYPE.encode(), 
                                   self.__get_id(), 
                                   ack_seq_no, 
                                   ttl, 
@@ -264,12 +368,11 @@ class EmulatorInProgress:
         if p_type == TRACE_PACKET_TYPE:
 
             # Construct acknowledgement packet, increment sequence number and append list of neighbors
-            trace_ip = int(ipaddress.IPv4Address(trace_addr[0]))
+            trace_ip = ip_to_int(trace_addr[0])
             trace_port = int(trace_addr[PORT])
 
             # Construct Route Trace Packet
-            trace_pkt = struct.pack("!cIIIIIII",
-                                    TRACE_PACKET_TYPE.encode(),
+            trace_pkt = pack_header(TRACE_PACKET_TYPE.encode(),
                                     DEFAULT_ID,
                                     DEFAULT_SEQ_NR,
                                     0,
@@ -287,64 +390,140 @@ class EmulatorInProgress:
         return
     
 
-    def deassemblepacket(self, packet):
-        header = struct.unpack("!cIIIIIII", packet[:29])
-        data = packet[29:].decode()
-
-        # Unpack packet header
-        p_type = header[0].decode()
-        p_ID = header[1]
-        p_seq_no = header[2]
-        TTL = header[3]
-        src_addr = [socket.inet_ntoa(struct.pack('!L', header[4])), header[5]]
-        dest_addr = [socket.inet_ntoa(struct.pack('!L', header[6])), header[7]]
-        header = [p_type, p_ID, p_seq_no, TTL, src_addr, dest_addr]
-
-        # If LSP packet, reconstruct senders neighbor list from encoded appended data
-        if p_type == 'L':
-            sender_neighbors = []
-            data = data.split()
+    def assemblelsp(self, ttl, dest):
+        # Returns this emulator's LSP as a list of datagrams, fragmented so none exceeds max_datagram_size.
+        # All fragments share one sequence number so receivers can reassemble them by (origin, seq #).
+
+        # Construct LSP header
+        lsp_header = pack_header(LSP_PACKET_TYPE.encode(),
+                                 self.__get_id(),
+                                 self.get_seq_no(),
+                                 ttl,
+                                 self.packed_ip,
+                                 self.get_port(),
+                                 ip_to_int(dest[HOST]),
+                                 dest[PORT])
+
+        # Increment sequence number
+        self.increment_seq_no()
+
+        # Append (a share of) the list of neighbor nodes to each LSP fragment
+        neighbors = [(neighbor.ip, neighbor.port, neighbor.cost) for neighbor in self.get_neighbors()]
+        return [lsp_header + data for data in encode_lsp_fragments(neighbors, self.max_datagram_size - P_HEADER_LEN)]
+
+
+    def assemblehellos(self, ttl, neighbors, timestamp=None):
+        # Returns [(hello packet, (ip, port)), ...] for every Neighbor. The header is packed once and copied into a
+        # preallocated buffer, then only the dest address and the heard flag (seq # field) are patched per neighbor.
+        # The packets are views of the buffer, valid until the next call. In measured-RTT mode every hello also
+        # carries the timestamp the neighbor echoes back.
+        hello_len = P_HEADER_LEN + (HELLO_TIMESTAMP.size if timestamp is not None else 0)
+        size = hello_len * len(neighbors)
+        if len(self.hello_buffer) < size:
+            self.hello_buffer = bytearray(size)
+        buffer = memoryview(self.hello_buffer)
+
+        pack_header_into(buffer, 0, HELLO_PACKET_TYPE.encode(), self.__get_id(), 0, ttl, self.packed_ip, self.port, 0, 0)
+        if timestamp is not None:
+            HELLO_TIMESTAMP.pack_into(buffer, P_HEADER_LEN, timestamp)
+        hellos = []
+        for i, node in enumerate(neighbors):
+            offset = i * hello_len
+            if offset:
+                buffer[offset:offset + hello_len] = buffer[:hello_len]
+            set_seq_no(buffer, int(node.heard), offset)
+            set_dest(buffer, ip_to_int(node.ip), node.port, offset)
+            hellos.append((buffer[offset:offset + hello_len], node.address))
+        return hellos
+
+
+    def assemblehelloack(self, dest, timestamp):
+        # Echo the timestamp of a hello back to the neighbor that sent it, so it can measure the round trip time
+        ack_pkt = pack_header(ACKNOWLEDGE_PACKET_TYPE.encode(), self.__get_id(), 0, 1, self.packed_ip, self.port, ip_to_int(dest[HOST]), dest[PORT])
+
+        return ack_pkt + HELLO_ACK_RECORD.pack(HELLO_PACKET_TYPE.encode(), timestamp)
+
+
+    def assemblelspack(self, dest, origin, seq_no, fragment_no):
+        # Acknowledge fragment # of origin's LSP seq_no to the neighbor it came from
+        ack_pkt = pack_header(ACKNOWLEDGE_PACKET_TYPE.encode(), self.__get_id(), seq_no, 1, self.packed_ip, self.port, ip_to_int(dest[HOST]), dest[PORT])
+
+        return ack_pkt + LSP_ACK_RECORD.pack(ip_to_int(origin[HOST]), origin[PORT], fragment_no)
+
+
+    def deassemblelspack(self, packet):
+        # LSP acknowledgement fast path - (seq #, (ip, port) of the acknowledged LSP's origin, fragment #) read straight
+        # from the packet bytes without decoding the header, None if the packet is not an LSP acknowledgement
+        if packet[:1] != b'A' or len(packet) != P_HEADER_LEN + LSP_ACK_RECORD.size:
+            return None
+        seq_no = unpack_header(packet)[2]
+        origin_ip, origin_port, fragment_no = LSP_ACK_RECORD.unpack_from(packet, P_HEADER_LEN)
+        return seq_no, (int_to_ip(origin_ip), origin_port), fragment_no
 
-            for entry in data:
-                entry = entry.split(',')
-                sender_neighbors.append({'ip': entry[0], 'port': int(entry[1])})
 
-            return packet, header, sender_neighbors
+    def deassemblepacket(self, packet):
+        # Unpack packet header - [type, id, seq #, TTL, [src ip, src port], [dest ip, dest port]]
+        header = decode_header(packet)
+        p_type = header[P_TYPE]
 
-        # If Trace Route packet
-        elif p_type == 'T':
+        # If LSP packet, reconstruct senders neighbor list of (ip, port, cost) from encoded appended data
+        # and return it with the fragment # and # of fragments of the LSP it belongs to
+        if p_type == 'L':
+            return packet, header, decode_lsp_fragment(packet[P_HEADER_LEN:])
 
-            if not self.tracer:
-                self.forwardtracepacket(src_addr, TTL, dest_addr)
+        # If LSP acknowledgement, return the (ip, port) of the acknowledged LSP's origin and the fragment #
+        if p_type == 'A' and len(packet) == P_HEADER_LEN + LSP_ACK_RECORD.size:
+            origin_ip, origin_port, fragment_no = LSP_ACK_RECORD.unpack_from(packet, P_HEADER_LEN)
+            return packet, header, ((int_to_ip(origin_ip), origin_port), fragment_no)
 
-        return packet, header, data
+        # If hello or hello acknowledgement in measured-RTT mode, return the timestamp the hello was sent at
+        if p_type == 'H' and len(packet) == P_HEADER_LEN + HELLO_TIMESTAMP.size:
+            return packet, header, HELLO_TIMESTAMP.unpack_from(packet, P_HEADER_LEN)[0]
+        if p_type == 'A' and len(packet) == P_HEADER_LEN + HELLO_ACK_RECORD.size and packet[P_HEADER_LEN:P_HEADER_LEN + 1] == b'H':
+            return packet, header, HELLO_ACK_RECORD.unpack_from(packet, P_HEADER_LEN)[1]
 
+        return packet, header, bytes(packet[P_HEADER_LEN:]).decode()
 
-    def forwardtracepacket(self, trace_addr, TTL, dest_addr):
 
-        forwarding_tbl = self.lsp.get_forwarding_tbl()
+    def forwardtracepacket(self, packet):
+        # Data-plane fast path - addresses stay packed integers straight from the header, never decoded to dotted strings
+        _, _, _, TTL, trace_ip, trace_port, dest_ip, dest_port = unpack_header(packet)
 
         # Send packet back to trace addr acknowleding packet was recieved and is on it's way to the next hop
-        trace_pkt = self.assemblepacket('A', TTL, trace_addr, 0)
-        self.sock.sendto(trace_pkt, (trace_addr[0], trace_addr[1]))
+        ack_pkt = pack_header(ACKNOWLEDGE_PACKET_TYPE.encode(), self.__get_id(), 0, TTL, self.packed_ip, self.port, trace_ip, trace_port)
+        self.transport.sendto(ack_pkt, self.__get_sock_addr(trace_ip, trace_port))
 
         # If trace packet has reached destination stop forwarding trace packet
-        if dest_addr[0].__eq__(self.get_ip()) and dest_addr[1] == self.get_port():
+        if dest_ip == self.packed_ip and dest_port == self.port:
             return
 
-        # Else, look in forwarding table for next hop on way to destination
-        for entry in forwarding_tbl.get_values():
+        # Else, look up the next hop on way to destination keyed by the packed destination address. With several
+        # equal-cost next hops the flow hash of the trace's (src, dest) picks one, salted with this emulator's address
+        forwarding_tbl = self.lsp.get_forwarding_tbl()
+        if forwarding_tbl is None:
+            return
+
+        next_hop = forwarding_tbl.get_next_hop_by_flow(pack_address(dest_ip, dest_port), flow_hash(packet, self.packed_ip ^ self.port))
+        if next_hop is not None:
+            trace_pkt = pack_header(TRACE_PACKET_TYPE.encode(), DEFAULT_ID, DEFAULT_SEQ_NR, 0, trace_ip, trace_port, dest_ip, dest_port)
+            self.transport.sendto(trace_pkt, next_hop)
+
 
-            if dest_addr[0].__eq__(entry.get_ip()) and dest_addr[1] == entry.get_port():
-                TTL -= 1
-                trace_pkt = self.assemblepacket('T', TTL, dest_addr, 0, trace_addr)
-                next_ip, next_port = entry.get_next_hop()
-                self.sock.sendto(trace_pkt, (next_ip, next_port))
+    def __get_sock_addr(self, packed_ip, port):
+        # (ip, port) tuple for sendto, decoded once per address and then cached
+        key = pack_address(packed_ip, port)
+        sock_addr = self.sock_addrs.get(key)
+        if sock_addr is None:
+            sock_addr = self.sock_addrs[key] = (int_to_ip(packed_ip), port)
+        return sock_addr
 
 
 if __name__ == '__main__':
     emulator = EmulatorInProgress()
 
-    emulator.lsp = LinkStateProtocol(emulator)
+    emulator.lsp = LinkStateProtocol(emulator, emulator.get_incremental_spf(), spf_timers=emulator.get_spf_timers(), rtt_costs=emulator.get_rtt_costs(),
+                                     hello_timers=emulator.get_hello_timers(), lsp_timers=emulator.get_lsp_timers(), spf_backend=emulator.get_spf_backend())
 
-    emulator.lsp.createroutes()
+    event_loop = EventLoop(emulator.get_timer_wheel())
+    emulator.lsp.createroutes(event_loop)
+    event_loop.run_forever()
@@ -0,0 +1,115 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import logging
+
+from emulator import EmulatorInProgress, NR_BYTES_ACCEPTED, RECV_BUFFER_SIZE, readtopology
+from event_loop import EventLoop
+from flooding import LSP_REFRESH_INTERVAL
+from link_state_routing import HELLO_INTERVAL, LSP_MAX_AGE, NEIGHBOR_TIMEOUT, SPF_BACKEND_PYTHON, SPF_BACKENDS, LinkStateProtocol
+from spf_throttle import SPF_HOLD_TIME, SPF_INITIAL_DELAY, SPF_MAX_WAIT
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class EmulatorHost:
+    # Runs many emulators inside one process - each keeps its own socket, but all share one event loop / selector.
+    # Given a SimulatedEventLoop and a SimulatedNetwork's add_transport as transport_factory, the same emulators run
+    # on virtual time without any sockets.
+
+    def __init__(self, incremental_spf=False, max_datagram_size=NR_BYTES_ACCEPTED, recv_buffer_size=RECV_BUFFER_SIZE,
+                 event_loop=None, transport_factory=None, print_tables=True, spf_timers=(SPF_INITIAL_DELAY, SPF_HOLD_TIME, SPF_MAX_WAIT),
+                 rtt_costs=False, hello_timers=(HELLO_INTERVAL, NEIGHBOR_TIMEOUT), lsp_timers=(LSP_REFRESH_INTERVAL, LSP_MAX_AGE), timer_wheel=False,
+                 spf_backend=SPF_BACKEND_PYTHON):
+        self.event_loop = event_loop if event_loop is not None else EventLoop(timer_wheel)
+        self.transport_factory = transport_factory  # (ip, port) -> transport, None opens a UDP socket
+        self.emulators = []
+        self.incremental_spf = incremental_spf
+        self.max_datagram_size = max_datagram_size
+        self.print_tables = print_tables
+        self.spf_timers = tuple(spf_timers)  # (initial delay, hold time, max wait) of every emulator's SPF throttle
+        self.rtt_costs = rtt_costs  # Set link costs from the measured hello round trip time instead of the topology file
+        self.hello_timers = tuple(hello_timers)  # (hello interval, neighbor timeout) of every emulator
+        self.lsp_timers = tuple(lsp_timers)  # (LSP refresh interval, LSP max age) of every emulator
+        self.spf_backend = spf_backend  # What rebuilds every emulator's forwarding table, one of SPF_BACKENDS
+
+        # One packet is handled at a time, so every emulator receives into the same buffer
+        self.recv_buffer = bytearray(recv_buffer_size)
+
+    def get_event_loop(self):
+        return self.event_loop
+
+    def get_emulators(self):
+        return self.emulators
+
+    def add_emulator(self, emulator_id, ip, port, neighbors):
+        emulator = EmulatorInProgress(True, ip, port, neighbors, emulator_id=emulator_id)
+        emulator.incremental_spf = self.incremental_spf
+        emulator.max_datagram_size = self.max_datagram_size
+        emulator.spf_timers = self.spf_timers
+        emulator.rtt_costs = self.rtt_costs
+        emulator.hello_timers = self.hello_timers
+        emulator.lsp_timers = self.lsp_timers
+        emulator.spf_backend = self.spf_backend
+        if self.transport_factory is None:
+            emulator.open_socket(self.recv_buffer)
+        else:
+            emulator.set_transport(self.transport_factory(ip, port))
+
+        emulator.lsp = LinkStateProtocol(emulator, emulator.get_incremental_spf(), self.print_tables, emulator.get_spf_timers(),
+                                         rtt_costs=emulator.get_rtt_costs(), hello_timers=emulator.get_hello_timers(), lsp_timers=emulator.get_lsp_timers(),
+                                         spf_backend=emulator.get_spf_backend())
+        self.emulators.append(emulator)
+        return emulator
+
+    def add_topology(self, filename, ports=None):
+        # Add every emulator in the topology file, or only the ones listening on the given ports
+        for emulator_id, (ip, port, neighbors) in enumerate(readtopology(filename)):
+            if ports is None or port in ports:
+                self.add_emulator(emulator_id, ip, port, neighbors)
+
+    def start(self):
+        # Send each emulator's first hellos / LSPs and register its transport with the shared event loop
+        for emulator in self.emulators:
+            emulator.lsp.createroutes(self.event_loop)
+
+    def run(self):
+        self.start()
+        self.event_loop.run_forever()
+
+    def close(self):
+        for emulator in self.emulators:
+            emulator.get_transport().close()
+        self.event_loop.close()
+
+
+if __name__ == '__main__':
+    # Parse command line args
+    parser = argparse.ArgumentParser(description='Run every emulator of a topology (or a subset of them) in one process.')
+    parser.add_argument('-f', '--filename', help='the name of the topology file')
+    parser.add_argument('-p', '--ports', type=int, nargs='*', help='only run the emulators listening on these ports (default: all)')
+    parser.add_argument('-i', '--incremental_spf', action='store_true', help='repair the shortest path tree on topology changes instead of rebuilding it')
+    parser.add_argument('-m', '--max_datagram_size', type=int, default=NR_BYTES_ACCEPTED, help='the largest datagram sent, LSPs above it are fragmented')
+    parser.add_argument('-b', '--recv_buffer_size', type=int, default=RECV_BUFFER_SIZE, help='the size of the shared receive buffer')
+    parser.add_argument('--spf_timers', type=float, nargs=3, metavar=('INITIAL', 'HOLD', 'MAX'), default=[SPF_INITIAL_DELAY, SPF_HOLD_TIME, SPF_MAX_WAIT],
+                        help='the seconds to wait before the first SPF run after a quiet period, before the second, and at most')
+    parser.add_argument('--rtt_costs', action='store_true', help='set link costs from the smoothed round trip time of hellos instead of the topology file')
+    parser.add_argument('--hello_timers', type=float, nargs=2, metavar=('INTERVAL', 'DEAD'), default=[HELLO_INTERVAL, NEIGHBOR_TIMEOUT],
+                        help='the seconds between hellos to each neighbor, and without a hello before a neighbor is dropped')
+    parser.add_argument('--lsp_timers', type=float, nargs=2, metavar=('REFRESH', 'MAX_AGE'), default=[LSP_REFRESH_INTERVAL, LSP_MAX_AGE],
+                        help='the seconds between originations of an unchanged LSP, and before an LSP not refreshed is purged')
+    parser.add_argument('--timer_wheel', action='store_true', help='keep timers in a hierarchical timer wheel instead of a binary heap')
+    parser.add_argument('--spf_backend', choices=SPF_BACKENDS, default=SPF_BACKEND_PYTHON, help='what rebuilds the forwarding tables, numpy needs NumPy installed')
+    args = parser.parse_args()
+
+    # Set up logging
+    logging.basicConfig(level=logging.DEBUG)
+
+    host = EmulatorHost(args.incremental_spf, args.max_datagram_size, args.recv_buffer_size, spf_timers=args.spf_timers, rtt_costs=args.rtt_costs,
+                        hello_timers=args.hello_timers, lsp_timers=args.lsp_timers, timer_wheel=args.timer_wheel,
+                        spf_backend=args.spf_backend)
+    host.add_topology(args.filename, set(args.ports) if args.ports else None)
+    host.run()
@@ -1,27 +1,37 @@
+import heapq
+import itertools
 
 
 class EmulatorPriorityQueue:
 
     def __init__(self):
+        # Binary min-heap of [cost, insertion #, emulator, valid] ordered by the cost to get to the emulator
         self.priority_queue = []
+        # Heap item currently holding each queued emulator, so re-inserting an emulator is a decrease-key
+        self.entry_finder = {}
+        self.counter = itertools.count()
 
-    def __heapify(self):
-        # Sort the priority in descending order by the cost to get to the emulator
-        self.priority_queue.sort(key=lambda x: x.get_cost(), reverse=True)
-    
     def insert(self, emulator):
-        self.priority_queue.append(emulator)
-        self.__heapify()
+        # If the emulator is already queued invalidate its old heap item (lazy deletion) instead of searching the heap
+        if emulator in self.entry_finder:
+            self.entry_finder[emulator][-1] = False
+
+        item = [emulator.get_cost(), next(self.counter), emulator, True]
+        self.entry_finder[emulator] = item
+        heapq.heappush(self.priority_queue, item)
 
     def get_min(self):
+        # Pop until a valid heap item is found, skipping stale items left behind by decrease-key
+        while self.priority_queue:
+            _, _, emulator, valid = heapq.heappop(self.priority_queue)
+            if valid:
+                del self.entry_finder[emulator]
+                return emulator
+
         # If empty return None
-        if not self.priority_queue:
-            return
-        # If not empty return
-        else:
-            return self.priority_queue.pop()
-    
+        return
+
     def is_not_empty(self):
-        if self.priority_queue == []:
+        if not self.entry_finder:
             return False
-        return True
\ No newline at end of file
+        return True
@@ -0,0 +1,52 @@
+import unittest
+
+from emulator_priority_queue import EmulatorPriorityQueue
+
+
+class Emulator:
+
+    def __init__(self, name, cost):
+        self.name = name
+        self.cost = cost
+
+    def get_cost(self):
+        return self.cost
+
+
+class TestEmulatorPriorityQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.priority_queue = EmulatorPriorityQueue()
+
+    def test_get_min_returns_lowest_cost(self):
+        ''' Tests that emulators are returned in order of increasing cost. '''
+        for name, cost in [('c', 3), ('a', 1), ('d', 4), ('b', 2)]:
+            self.priority_queue.insert(Emulator(name, cost))
+
+        names = []
+        while self.priority_queue.is_not_empty():
+            names.append(self.priority_queue.get_min().name)
+
+        self.assertEqual(names, ['a', 'b', 'c', 'd'])
+        self.assertIsNone(self.priority_queue.get_min())
+
+    def test_reinsert_is_decrease_key(self):
+        ''' Tests that re-inserting an emulator with a lower cost moves it forward and leaves no stale copy behind. '''
+        emulator_1 = Emulator('1', 5)
+        emulator_2 = Emulator('2', 3)
+        self.priority_queue.insert(emulator_1)
+        self.priority_queue.insert(emulator_2)
+
+        emulator_1.cost = 1
+        self.priority_queue.insert(emulator_1)
+
+        self.assertIs(self.priority_queue.get_min(), emulator_1)
+        self.assertIs(self.priority_queue.get_min(), emulator_2)
+        self.assertFalse(self.priority_queue.is_not_empty())
+
+    def tearDown(self):
+        del self.priority_queue
+
+
+if __name__ == '__main__':
+    unittest.main()
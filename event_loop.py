@@ -0,0 +1,244 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import heapq
+import itertools
+import selectors
+import time
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# Timer Wheel Enums - WHEEL_LEVELS wheels of 2^WHEEL_BITS slots, a slot of the first wheel is one tick, of the next 2^WHEEL_BITS ticks...
+TIMER_WHEEL_TICK = 0.001 # Note: seconds per tick, timers are only sorted by their exact deadline within a tick
+WHEEL_BITS = 8
+WHEEL_SLOTS = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SLOTS - 1
+WHEEL_LEVELS = 4 # Note: 2^32 ticks, about 50 days at 1 ms ticks - timers further out wait in an overflow heap
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class TimerHandle:
+
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def get_deadline(self):
+        return self.deadline
+
+    def cancel(self):
+        # Cancelled timers stay in the heap and are skipped when they reach the top (lazy deletion)
+        self.cancelled = True
+
+    def is_cancelled(self):
+        return self.cancelled
+
+
+class TimerHeap:
+    # Timers in one binary heap ordered by (deadline, insertion #) - O(log n) to add, cancelled timers are dropped
+    # lazily when they reach the top
+
+    def __init__(self):
+        self.timers = []  # Heap of (deadline, insertion #, TimerHandle)
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.timers)
+
+    def push(self, timer):
+        heapq.heappush(self.timers, (timer.deadline, next(self.counter), timer))
+
+    def pop_due(self, now):
+        # The earliest timer due by now that is not cancelled, None if there is none
+        while self.timers and self.timers[0][0] <= now:
+            _, _, timer = heapq.heappop(self.timers)
+            if not timer.cancelled:
+                return timer
+        return None
+
+    def next_deadline(self):
+        while self.timers and self.timers[0][2].cancelled:
+            heapq.heappop(self.timers)
+        return self.timers[0][0] if self.timers else None
+
+
+class TimerWheel:
+    # Hierarchical timer wheel (Varghese & Lauck) - O(1) to add a timer whatever the number pending. A timer goes in the
+    # wheel of the highest group of tick bits where its deadline differs from the current tick, and drops a wheel
+    # every time the current tick reaches its slot there. Timers due within the current tick wait in a small heap
+    # so they still run in exact (deadline, insertion #) order, like with TimerHeap.
+
+    def __init__(self, start_time=0.0, tick=TIMER_WHEEL_TICK):
+        self.tick = tick
+        self.current = int(start_time / tick)  # Current tick, every timer in the wheels is due after it
+        self.wheels = [[[] for _ in range(WHEEL_SLOTS)] for _ in range(WHEEL_LEVELS)]
+        self.counts = [0] * WHEEL_LEVELS  # Timers in each wheel
+        self.ready = []     # Heap of (deadline, insertion #, TimerHandle) due by the end of the current tick
+        self.overflow = []  # Heap of timers too far out for the wheels
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return sum(self.counts) + len(self.ready) + len(self.overflow)
+
+    def push(self, timer):
+        self.__place((timer.deadline, next(self.counter), timer))
+
+    def __place(self, entry):
+        timer_tick = int(entry[0] / self.tick)
+        if timer_tick <= self.current:
+            heapq.heappush(self.ready, entry)
+            return
+
+        level = ((timer_tick ^ self.current).bit_length() - 1) // WHEEL_BITS
+        if level >= WHEEL_LEVELS:
+            heapq.heappush(self.overflow, entry)
+            return
+
+        self.wheels[level][(timer_tick >> (WHEEL_BITS * level)) & WHEEL_MASK].append(entry)
+        self.counts[level] += 1
+
+    def advance(self, now):
+        # Move the current tick up to now, cascading timers down the wheels and into the ready heap as their slots
+        # come up. Runs of empty wheels are skipped a whole rotation at a time.
+        target = int(now / self.tick)
+        while self.current < target:
+            empty = 0
+            while empty < WHEEL_LEVELS and not self.counts[empty]:
+                empty += 1
+            if empty == 0:
+                self.current += 1
+            else:
+                self.current = min(target, (self.current | ((1 << (WHEEL_BITS * empty)) - 1)) + 1)
+
+            if self.current & WHEEL_MASK == 0:
+                self.__cascade()
+
+            slot = self.wheels[0][self.current & WHEEL_MASK]
+            if slot:
+                self.counts[0] -= len(slot)
+                for entry in slot:
+                    heapq.heappush(self.ready, entry)
+                slot.clear()
+
+        while self.overflow and ((int(self.overflow[0][0] / self.tick) ^ self.current).bit_length() - 1) // WHEEL_BITS < WHEEL_LEVELS:
+            self.__place(heapq.heappop(self.overflow))
+
+    def __cascade(self):
+        # The current tick starts a new rotation of one or more wheels - empty their current slots into the wheels below,
+        # the highest wheel first
+        level = 1
+        while level < WHEEL_LEVELS - 1 and self.current & ((1 << (WHEEL_BITS * (level + 1))) - 1) == 0:
+            level += 1
+
+        for level in range(level, 0, -1):
+            slot = self.wheels[level][(self.current >> (WHEEL_BITS * level)) & WHEEL_MASK]
+            if slot:
+                self.counts[level] -= len(slot)
+                entries = list(slot)
+                slot.clear()
+                for entry in entries:
+                    self.__place(entry)
+
+    def pop_due(self, now):
+        # The earliest timer due by now that is not cancelled, None if there is none
+        self.advance(now)
+        while self.ready and self.ready[0][0] <= now:
+            _, _, timer = heapq.heappop(self.ready)
+            if not timer.cancelled:
+                return timer
+        return None
+
+    def next_deadline(self):
+        # Earliest deadline of a timer not cancelled. The wheels are in time order and so are the slots of a wheel ahead
+        # of the current tick, so the first slot holding a live timer has it.
+        while self.ready and self.ready[0][2].cancelled:
+            heapq.heappop(self.ready)
+        if self.ready:
+            return self.ready[0][0]
+
+        for level in range(WHEEL_LEVELS):
+            if not self.counts[level]:
+                continue
+
+            wheel = self.wheels[level]
+            for index in range(((self.current >> (WHEEL_BITS * level)) & WHEEL_MASK) + 1, WHEEL_SLOTS):
+                slot = wheel[index]
+                if not slot:
+                    continue
+
+                live = [entry for entry in slot if not entry[2].cancelled]
+                if len(live) != len(slot):
+                    self.counts[level] -= len(slot) - len(live)
+                    slot[:] = live
+                if live:
+                    return min(live)[0]
+
+        while self.overflow and self.overflow[0][2].cancelled:
+            heapq.heappop(self.overflow)
+        return self.overflow[0][0] if self.overflow else None
+
+
+class EventLoop:
+
+    def __init__(self, timer_wheel=False):
+        self.selector = selectors.DefaultSelector()
+        self.timers = TimerWheel(self.time()) if timer_wheel else TimerHeap()  # Pending TimerHandles
+        self.running = False
+
+    def time(self):
+        return time.monotonic()
+
+    def add_reader(self, sock, callback):
+        # Call callback(sock) whenever the socket has a datagram waiting
+        self.selector.register(sock, selectors.EVENT_READ, callback)
+
+    def remove_reader(self, sock):
+        self.selector.unregister(sock)
+
+    def call_at(self, deadline, callback, *args):
+        timer = TimerHandle(deadline, callback, args)
+        self.timers.push(timer)
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(self.time() + delay, callback, *args)
+
+    def __next_timeout(self):
+        # Cancelled timers are skipped so they never cause a wake-up
+        deadline = self.timers.next_deadline()
+        if deadline is None:
+            return None
+
+        return max(0, deadline - self.time())
+
+    def run_once(self):
+        # Sleep until a socket is readable or the earliest timer is due
+        for key, _ in self.selector.select(self.__next_timeout()):
+            key.data(key.fileobj)
+
+        # Run every timer whose deadline has passed, earliest first
+        now = self.time()
+        timer = self.timers.pop_due(now)
+        while timer is not None:
+            timer.callback(*timer.args)
+            timer = self.timers.pop_due(now)
+
+    def run_forever(self):
+        self.running = True
+        while self.running:
+            self.run_once()
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.selector.close()
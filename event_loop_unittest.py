@@ -0,0 +1,105 @@
+import random
+import socket
+import unittest
+
+from event_loop import EventLoop, TimerHandle, TimerHeap, TimerWheel
+
+
+class TestEventLoop(unittest.TestCase):
+
+    def setUp(self):
+        self.event_loop = EventLoop()
+
+    def test_timers_run_in_deadline_order(self):
+        ''' Tests that due timers run earliest deadline first and cancelled timers never run. '''
+        fired = []
+        now = self.event_loop.time()
+
+        self.event_loop.call_at(now - 1, fired.append, 'second')
+        self.event_loop.call_at(now - 2, fired.append, 'first')
+        cancelled = self.event_loop.call_at(now - 3, fired.append, 'cancelled')
+        cancelled.cancel()
+
+        self.event_loop.run_once()
+        self.assertEqual(fired, ['first', 'second'])
+
+    def test_reader_called_when_datagram_arrives(self):
+        ''' Tests that the loop wakes up for a readable socket before a far-away timer is due. '''
+        recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        recv_sock.bind(('127.0.0.1', 0))
+        recv_sock.setblocking(False)
+        send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        received = []
+        self.event_loop.add_reader(recv_sock, lambda sock: received.append(sock.recvfrom(1024)[0]))
+        self.event_loop.call_later(60, received.append, 'timer')
+
+        send_sock.sendto(b'hello', recv_sock.getsockname())
+        self.event_loop.run_once()
+        self.assertEqual(received, [b'hello'])
+
+        send_sock.close()
+        recv_sock.close()
+
+    def test_timer_wheel_loop(self):
+        ''' Tests that the loop runs the same timers in the same order on a timer wheel. '''
+        event_loop = EventLoop(timer_wheel=True)
+        fired = []
+        now = event_loop.time()
+
+        event_loop.call_at(now - 1, fired.append, 'second')
+        event_loop.call_at(now - 2, fired.append, 'first')
+        event_loop.call_at(now - 3, fired.append, 'cancelled').cancel()
+        event_loop.call_later(60, fired.append, 'later')
+
+        event_loop.run_once()
+        self.assertEqual(fired, ['first', 'second'])
+        self.assertAlmostEqual(event_loop.timers.next_deadline(), now + 60, delta=1)
+        event_loop.close()
+
+    def tearDown(self):
+        self.event_loop.close()
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    '''
+    Differential harness: a TimerWheel must hand out exactly the timers a TimerHeap does, in the same order, and agree
+    on the next deadline, whatever mix of near, far, past and cancelled timers is pending.
+    '''
+
+    def test_matches_heap(self):
+        ''' Tests random schedules, cancels and clock jumps against the heap, overflow heap included. '''
+        for seed in range(10):
+            rng = random.Random(seed)
+            now = rng.uniform(0, 1000)
+            heap, wheel = TimerHeap(), TimerWheel(now, tick=0.0001)
+            timers = []
+
+            for _ in range(300):
+                action = rng.random()
+                if action < 0.5:
+                    # Mostly near timers, some a wheel or two out, a few past the top wheel (2^32 ticks ~ 5 days)
+                    delay = rng.choice([rng.uniform(-0.01, 0.05), rng.uniform(0, 30), rng.uniform(0, 1e6)])
+                    timer = TimerHandle(now + delay, None, ())
+                    timers.append(timer)
+                    heap.push(timer)
+                    wheel.push(timer)
+                elif action < 0.6 and timers:
+                    rng.choice(timers).cancel()
+                else:
+                    now += rng.choice([rng.uniform(0, 0.01), rng.uniform(0, 5), rng.uniform(0, 2e5)])
+                    due = []
+                    timer = heap.pop_due(now)
+                    while timer is not None:
+                        due.append(timer)
+                        timer = heap.pop_due(now)
+
+                    for timer in due:
+                        self.assertIs(wheel.pop_due(now), timer)
+                    self.assertIsNone(wheel.pop_due(now))
+                self.assertEqual(wheel.next_deadline(), heap.next_deadline())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,312 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+from collections import OrderedDict
+
+from packet_codec import P_HEADER_LEN, seq_newer
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# Flooding Timer Enums (seconds)
+LSP_GEN_DELAY = 0.05 # Note: wait before originating a new LSP, every change to this emulator's links within it goes into the same LSP
+LSP_PACING_INTERVAL = 0.01 # Note: the shortest time between two bursts of LSP fragments to one neighbor
+LSP_RETRANSMIT_INTERVAL = 1 # Note: an LSP fragment a neighbor has not acknowledged within this time is sent again
+LSP_REFRESH_INTERVAL = 20 # Note: this emulator's LSP is originated again when it has not changed for this time, well within LSP_MAX_AGE
+
+LSP_PACING_BURST = 16 # Note: the most LSP fragments sent to one neighbor per burst, retransmissions included
+LSP_TTL = 10 # Note: the TTL of an originated LSP, fragments are not flooded on once it runs out
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class NeighborFloodState:
+    # LSP fragments on their way to one neighbor. Keys are (origin, fragment #) so a newer copy of a fragment replaces
+    # the older one still waiting in either list.
+
+    __slots__ = ('transmit', 'retransmit', 'due', 'last_burst')
+
+    def __init__(self):
+        self.transmit = OrderedDict()    # (origin, fragment #) -> (seq #, packet) not sent yet
+        self.retransmit = OrderedDict()  # (origin, fragment #) -> (seq #, packet, deadline) sent but not acknowledged, oldest deadline first
+        self.due = None  # Time of the next burst, None while there is nothing to send
+        self.last_burst = None
+
+    def is_idle(self):
+        return not self.transmit and not self.retransmit
+
+
+class FloodingEngine:
+    # Reliable flooding of LSP fragments for one emulator
+    #
+    # - Every fragment received is acknowledged to the neighbor it came from with an ACKNOWLEDGE_PACKET_TYPE packet
+    # - A fragment is flooded on only if it is newer than the copy held for its (origin, fragment #), so every
+    #   fragment crosses every link about once instead of until its TTL runs out
+    # - Fragments wait in a per-neighbor transmit queue and are sent in paced bursts, then stay on the neighbor's
+    #   retransmission list until it acknowledges them. The bursts of every neighbor due at the same time go to the
+    #   transport as one batch, so a fan-out is a single send call.
+    # - Requests to originate this emulator's LSP within LSP_GEN_DELAY of each other produce a single LSP
+    # - A neighbor that comes up is sent every fragment held, so it catches up with LSPs flooded before it was there
+    # - This emulator's LSP is originated again every refresh_interval even if nothing changed, so other emulators
+    #   never age it out of their LSDBs while it is alive
+
+    def __init__(self, emulator, gen_delay=LSP_GEN_DELAY, pacing_interval=LSP_PACING_INTERVAL, pacing_burst=LSP_PACING_BURST,
+                 retransmit_interval=LSP_RETRANSMIT_INTERVAL, refresh_interval=LSP_REFRESH_INTERVAL):
+        self.emulator_obj = emulator
+        self.gen_delay = gen_delay
+        self.pacing_interval = pacing_interval
+        self.pacing_burst = pacing_burst
+        self.retransmit_interval = retransmit_interval
+        self.refresh_interval = refresh_interval
+        self.event_loop = None
+        self.gen_timer = None
+        self.refresh_timer = None
+        self.burst_timer = None
+        self.burst_deadline = None
+        self.neighbors = {}  # (ip, port) -> NeighborFloodState
+        self.fragments = {}  # origin -> [seq #, {fragment #: packet to flood on, None if its TTL ran out}] of the newest LSP
+
+        # Counters
+        self.nr_originated = 0
+        self.nr_coalesced = 0
+        self.nr_refreshed = 0
+        self.nr_sent = 0
+        self.nr_retransmitted = 0
+        self.nr_duplicates = 0
+        self.nr_acks_sent = 0
+        self.nr_acks_received = 0
+
+    def start(self, event_loop):
+        self.event_loop = event_loop
+
+    def stop(self):
+        for timer in (self.gen_timer, self.refresh_timer, self.burst_timer):
+            if timer is not None:
+                timer.cancel()
+        self.gen_timer = self.refresh_timer = self.burst_timer = None
+        self.neighbors = {}
+
+    def get_stats(self):
+        return {'originated': self.nr_originated,
+                'coalesced': self.nr_coalesced,
+                'refreshed': self.nr_refreshed,
+                'sent': self.nr_sent,
+                'retransmitted': self.nr_retransmitted,
+                'duplicates': self.nr_duplicates,
+                'acks_sent': self.nr_acks_sent,
+                'acks_received': self.nr_acks_received}
+
+    def get_nr_unacknowledged(self, neighbor):
+        # Fragments queued for or sent to a neighbor that it has not acknowledged yet
+        state = self.neighbors.get(neighbor)
+        return len(state.transmit) + len(state.retransmit) if state is not None else 0
+
+    def originate(self):
+        # This emulator's links changed - flood a new LSP once the changes have settled for gen_delay
+        if self.gen_timer is not None:
+            self.nr_coalesced += 1
+            return
+
+        self.gen_timer = self.event_loop.call_later(self.gen_delay, self.__originatenow)
+
+    def __originatenow(self):
+        self.gen_timer = None
+        self.nr_originated += 1
+
+        # One LSP for every neighbor - it is flooded on as is, so it has no single destination
+        origin = (self.emulator_obj.get_ip(), self.emulator_obj.get_port())
+        seq_no = self.emulator_obj.get_seq_no()
+        packets = self.emulator_obj.assemblelsp(LSP_TTL, ['0.0.0.0', 0])
+        self.fragments[origin] = [seq_no, dict(enumerate(packets))]
+
+        for fragment_no, packet in enumerate(packets):
+            self.__queue(origin, fragment_no, seq_no, packet, exclude=None)
+
+        # Originate again once the LSP has gone unchanged for refresh_interval
+        if self.refresh_timer is not None:
+            self.refresh_timer.cancel()
+        self.refresh_timer = self.event_loop.call_later(self.refresh_interval, self.__refresh)
+
+    def __refresh(self):
+        self.refresh_timer = None
+        self.nr_refreshed += 1
+        self.originate()
+
+    def receive(self, sender, origin, seq_no, fragment_no):
+        # Acknowledge a fragment received from sender, returns True if it is new and should be installed and flooded
+        self.__acknowledge(sender, origin, seq_no, fragment_no)
+        self.__acknowledged(sender, origin, seq_no, fragment_no)
+
+        held = self.fragments.get(origin)
+        if held is not None and (seq_newer(held[0], seq_no) or (seq_no == held[0] and fragment_no in held[1])):
+            self.nr_duplicates += 1
+            if seq_no != held[0]:
+                self.__sendnewer(sender, origin, fragment_no)
+            return False
+
+        if held is None or seq_newer(seq_no, held[0]):
+            held = self.fragments[origin] = [seq_no, {}]
+        held[1][fragment_no] = None
+        return True
+
+    def flood(self, sender, origin, seq_no, fragment_no, packet):
+        # Flood a new fragment on to every neighbor but sender, packet is the copy with its TTL decremented
+        held = self.fragments.get(origin)
+        if held is None or held[0] != seq_no:
+            return
+
+        held[1][fragment_no] = packet
+        self.__queue(origin, fragment_no, seq_no, packet, exclude=sender)
+
+    def receive_own(self, sender, seq_no, fragment_no, packet):
+        # A copy of this emulator's LSP came back - only acknowledge it. Returns True if it is from before a restart
+        # and a new LSP must supersede it: newer than the last LSP originated, or as new but with other contents.
+        origin = (self.emulator_obj.get_ip(), self.emulator_obj.get_port())
+        self.__acknowledge(sender, origin, seq_no, fragment_no)
+        self.__acknowledged(sender, origin, seq_no, fragment_no)
+
+        held = self.fragments.get(origin)
+        if held is None:
+            return not seq_newer(self.emulator_obj.get_seq_no(), seq_no)
+        if seq_newer(held[0], seq_no):
+            self.__sendnewer(sender, origin, fragment_no)
+            return False
+
+        held_packet = held[1].get(fragment_no)
+        return seq_no != held[0] or held_packet is None or packet[P_HEADER_LEN:] != held_packet[P_HEADER_LEN:]
+
+    def acknowledged(self, sender, origin, seq_no, fragment_no):
+        # An acknowledgement arrived from a neighbor
+        self.nr_acks_received += 1
+        self.__acknowledged(sender, origin, seq_no, fragment_no)
+
+    def neighbor_up(self, neighbor):
+        # Bring a new neighbor up to date with every fragment held
+        for origin, (seq_no, packets) in self.fragments.items():
+            for fragment_no, packet in packets.items():
+                if packet is not None:
+                    self.__enqueue(neighbor, (origin, fragment_no), seq_no, packet)
+
+    def neighbor_down(self, neighbor):
+        self.neighbors.pop(neighbor, None)
+
+    def discard(self, origin):
+        # Forget the fragments held for an origin that left the network
+        self.fragments.pop(origin, None)
+
+    def __sendnewer(self, sender, origin, fragment_no):
+        # The sender flooded an older copy of a fragment than the one held - send it the newer one, which also
+        # tells a restarted origin the sequence # it has to move past
+        seq_no, packets = self.fragments[origin]
+        packet = packets.get(fragment_no)
+        if sender is not None and packet is not None:
+            self.__enqueue(sender, (origin, fragment_no), seq_no, packet)
+
+    def __acknowledge(self, sender, origin, seq_no, fragment_no):
+        if sender is None:
+            return
+        self.nr_acks_sent += 1
+        self.emulator_obj.get_transport().sendto(self.emulator_obj.assemblelspack(sender, origin, seq_no, fragment_no), sender)
+
+    def __acknowledged(self, sender, origin, seq_no, fragment_no):
+        # The neighbor holds (origin, fragment #) at seq_no or newer - stop sending it older or equal copies
+        state = self.neighbors.get(sender)
+        if state is None:
+            return
+
+        key = (origin, fragment_no)
+        for pending in (state.transmit, state.retransmit):
+            entry = pending.get(key)
+            if entry is not None and not seq_newer(entry[0], seq_no):
+                del pending[key]
+
+    def __queue(self, origin, fragment_no, seq_no, packet, exclude):
+        # Flood a fragment to every neighbor but the one it came from
+        for node in self.emulator_obj.get_neighbors():
+            if node.address != exclude:
+                self.__enqueue(node.address, (origin, fragment_no), seq_no, packet)
+
+    def __enqueue(self, neighbor, key, seq_no, packet):
+        state = self.neighbors.get(neighbor)
+        if state is None:
+            state = self.neighbors[neighbor] = NeighborFloodState()
+
+        # A newer copy replaces the one waiting to be sent or retransmitted
+        state.retransmit.pop(key, None)
+        state.transmit.pop(key, None)
+        sending = bool(state.transmit)
+        state.transmit[key] = (seq_no, packet)
+
+        # A burst is already due if other fragments were waiting
+        if not sending:
+            self.__schedule(neighbor, state)
+
+    def __schedule(self, neighbor, state):
+        # Due for the next burst at once for fragments not sent yet (pacing permitting), else at the oldest
+        # retransmission deadline
+        if state.transmit:
+            state.due = self.event_loop.time() if state.last_burst is None else state.last_burst + self.pacing_interval
+        elif state.retransmit:
+            state.due = next(iter(state.retransmit.values()))[2]
+        else:
+            state.due = None
+            return
+
+        if self.burst_timer is None or state.due < self.burst_deadline:
+            self.__arm(state.due)
+
+    def __arm(self, deadline):
+        if self.burst_timer is not None:
+            self.burst_timer.cancel()
+        self.burst_deadline = deadline
+        self.burst_timer = self.event_loop.call_at(deadline, self.__sendbursts)
+
+    def __sendbursts(self):
+        self.burst_timer = None
+        now = self.event_loop.time()
+        batch = []
+
+        for neighbor, state in self.neighbors.items():
+            if state.due is not None and state.due <= now:
+                self.__burst(neighbor, state, now, batch)
+
+        if batch:
+            self.emulator_obj.get_transport().send_batch(batch)
+
+        # Sleep until the next neighbor is due
+        next_due = min((state.due for state in self.neighbors.values() if state.due is not None), default=None)
+        if next_due is not None and self.burst_timer is None:
+            self.__arm(next_due)
+
+    def __burst(self, neighbor, state, now, batch):
+        state.last_burst = now
+        budget = self.pacing_burst
+
+        # Overdue retransmissions first, then fragments not sent yet
+        while budget and state.retransmit:
+            key, (seq_no, packet, deadline) = next(iter(state.retransmit.items()))
+            if deadline > now:
+                break
+            batch.append((packet, neighbor))
+            state.retransmit.move_to_end(key)
+            state.retransmit[key] = (seq_no, packet, now + self.retransmit_interval)
+            self.nr_retransmitted += 1
+            budget -= 1
+
+        while budget and state.transmit:
+            key, (seq_no, packet) = state.transmit.popitem(last=False)
+            batch.append((packet, neighbor))
+            state.retransmit[key] = (seq_no, packet, now + self.retransmit_interval)
+            self.nr_sent += 1
+            budget -= 1
+
+        # The next burst is scheduled once every due neighbor had its turn
+        if state.transmit:
+            state.due = now + self.pacing_interval
+        elif state.retransmit:
+            state.due = next(iter(state.retransmit.values()))[2]
+        else:
+            state.due = None
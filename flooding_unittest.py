@@ -0,0 +1,177 @@
+import unittest
+
+from emulator_host import EmulatorHost
+from neighbor_table import Neighbor
+from simulated_network import SimulatedEventLoop, SimulatedNetwork
+
+
+class TestFloodingEngine(unittest.TestCase):
+
+    '''
+    Floods the LSPs of every emulator in the topology below on virtual time:
+
+              2 - 4
+             / \\   \\
+            1 - 3 - 5
+    '''
+
+    links = {1: [2, 3], 2: [1, 3, 4], 3: [1, 2, 5], 4: [2, 5], 5: [3, 4]}
+
+    def setUp(self):
+        self.event_loop = SimulatedEventLoop()
+        self.network = SimulatedNetwork(self.event_loop)
+        self.host = EmulatorHost(event_loop=self.event_loop, transport_factory=self.network.add_transport, print_tables=False)
+
+        for node, neighbors in self.links.items():
+            self.host.add_emulator(node, self.address(node)[0], node,
+                                   [Neighbor(self.address(neighbor)[0], neighbor) for neighbor in neighbors])
+
+    def address(self, node):
+        return '{}.0.0.0'.format(node), node
+
+    def assertDatabasesComplete(self):
+        for emulator in self.host.get_emulators():
+            others = {self.address(node) for node in self.links if node != emulator.get_port()}
+            self.assertEqual(set(emulator.lsp.lsdb.get_origins()), others)
+
+    def assertAllAcknowledged(self):
+        for emulator in self.host.get_emulators():
+            for neighbor in self.links[emulator.get_port()]:
+                self.assertEqual(emulator.lsp.get_flooding().get_nr_unacknowledged(self.address(neighbor)), 0)
+
+    def test_every_fragment_crosses_every_link_once(self):
+        ''' Tests that a lossless start floods each LSP over each link at most once in each direction. '''
+        self.host.start()
+        self.event_loop.run_until(5)
+
+        self.assertDatabasesComplete()
+        self.assertAllAcknowledged()
+
+        nr_links = sum(len(neighbors) for neighbors in self.links.values())
+        nr_sent = sum(emulator.lsp.get_flooding().get_stats()['sent'] for emulator in self.host.get_emulators())
+        self.assertLessEqual(nr_sent, len(self.links) * nr_links)
+        self.assertEqual(sum(emulator.lsp.get_flooding().get_stats()['retransmitted'] for emulator in self.host.get_emulators()), 0)
+
+    def test_retransmits_until_acknowledged(self):
+        ''' Tests that LSPs lost on a lossy link are retransmitted until every database is complete. '''
+        for node, neighbors in self.links.items():
+            for neighbor in neighbors:
+                self.network.set_link(self.address(node), self.address(neighbor), loss=0.1)
+        self.host.start()
+        self.event_loop.run_until(30)
+
+        self.assertDatabasesComplete()
+        self.assertAllAcknowledged()
+        self.assertGreater(sum(emulator.lsp.get_flooding().get_stats()['retransmitted'] for emulator in self.host.get_emulators()), 0)
+
+    def test_back_to_back_originations_coalesce(self):
+        ''' Tests that originating the LSP several times within the generation delay floods a single LSP. '''
+        self.host.start()
+        self.event_loop.run_until(5)
+
+        emulator = self.host.get_emulators()[0]
+        flooding = emulator.lsp.get_flooding()
+        seq_no = emulator.get_seq_no()
+        for _ in range(5):
+            flooding.originate()
+        self.event_loop.run_until(10)
+
+        self.assertEqual(emulator.get_seq_no(), seq_no + 1)
+        self.assertEqual(flooding.get_stats()['coalesced'], 4)
+        for other in self.host.get_emulators()[1:]:
+            self.assertEqual(other.lsp.lsdb.get_entry(self.address(1)).get_seq_no(), seq_no)
+
+    def test_restarted_emulator_supersedes_its_old_lsp(self):
+        ''' Tests that an emulator restarted with sequence # 0 learns its old LSP back and floods a newer one. '''
+        self.host.start()
+        self.event_loop.run_until(5)
+        for _ in range(3):
+            self.host.get_emulators()[0].lsp.get_flooding().originate()
+            self.event_loop.run_until(self.event_loop.time() + 1)
+        old_seq_no = self.host.get_emulators()[2].lsp.lsdb.get_entry(self.address(1)).get_seq_no()
+
+        # Emulator 1 fails, its neighbors time it out, then it comes back with a fresh sequence #
+        self.host.get_emulators()[0].lsp.stop()
+        self.event_loop.run_until(10)
+        restarted = self.host.add_emulator(1, *self.address(1), [Neighbor(self.address(neighbor)[0], neighbor)
+                                                                 for neighbor in self.links[1]])
+        restarted.lsp.createroutes(self.event_loop)
+        self.event_loop.run_until(20)
+
+        self.assertGreater(restarted.get_seq_no(), old_seq_no)
+        for emulator in self.host.get_emulators()[1:5]:
+            self.assertGreater(emulator.lsp.lsdb.get_entry(self.address(1)).get_seq_no(), old_seq_no)
+        self.assertEqual(len(restarted.lsp.lsdb), len(self.links) - 1)
+
+    def test_restart_with_same_sequence_number(self):
+        ''' Tests that a restarted emulator whose first LSP repeats the old seq # with other links still supersedes it. '''
+        self.host.start()
+        self.event_loop.run_until(5)
+        old_seq_no = self.host.get_emulators()[1].lsp.lsdb.get_entry(self.address(1)).get_seq_no()
+
+        # Emulator 1 comes back without its link to 3 before 2 times it out, and originates the old seq # again
+        self.host.get_emulators()[0].lsp.stop()
+        for a, b in ((1, 3), (3, 1)):
+            self.network.set_link(self.address(a), self.address(b), loss=1)
+        self.event_loop.run_until(6)
+        restarted = self.host.add_emulator(1, *self.address(1), [Neighbor(self.address(2)[0], 2)])
+        restarted.lsp.createroutes(self.event_loop)
+        self.event_loop.run_until(12)
+
+        self.assertGreater(restarted.get_seq_no(), old_seq_no + 1)
+        for emulator in self.host.get_emulators()[1:5]:
+            if emulator.get_port() != 3:
+                self.assertEqual(emulator.lsp.lsdb.get_neighbors(self.address(1)), (self.address(2),))
+
+    def test_sequence_numbers_wrap(self):
+        ''' Tests that LSPs keep replacing each other when the seq # of their origin wraps around to 0. '''
+        self.host.get_emulators()[0].set_seq_no(2 ** 32 - 2)
+        self.host.start()
+        self.event_loop.run_until(5)
+        for _ in range(3):
+            self.host.get_emulators()[0].lsp.get_flooding().originate()
+            self.event_loop.run_until(self.event_loop.time() + 1)
+
+        self.assertEqual(self.host.get_emulators()[0].get_seq_no(), 2)
+        for emulator in self.host.get_emulators()[1:]:
+            self.assertEqual(emulator.lsp.lsdb.get_entry(self.address(1)).get_seq_no(), 1)
+
+    def test_lsps_refreshed_and_aged_out(self):
+        ''' Tests that live emulators keep their LSPs refreshed while the LSP of one that left is purged everywhere. '''
+        for emulator in self.host.get_emulators():
+            emulator.lsp.lsp_max_age = 6
+            emulator.lsp.get_flooding().refresh_interval = 2
+        self.host.start()
+        self.event_loop.run_until(5)
+
+        # Emulator 5 leaves - only its neighbors 3 and 4 see it go, 1 and 2 hold its LSP until it ages out
+        self.host.get_emulators()[4].lsp.stop()
+        self.event_loop.run_until(8)
+        self.assertIn(self.address(5), self.host.get_emulators()[0].lsp.lsdb)
+        self.event_loop.run_until(20)
+
+        for emulator in self.host.get_emulators()[:4]:
+            others = {self.address(node) for node in self.links if node not in (emulator.get_port(), 5)}
+            self.assertEqual(set(emulator.lsp.lsdb.get_origins()), others)
+            self.assertGreater(emulator.lsp.get_flooding().get_stats()['refreshed'], 0)
+        self.assertEqual(self.host.get_emulators()[0].lsp.get_nr_purged(), 1)
+
+    def test_one_sided_hello_loss_resyncs(self):
+        ''' Tests that an emulator that timed out a neighbor still hearing it gets the neighbor's LSP back within a few hellos. '''
+        self.host.start()
+        self.event_loop.run_until(5)
+
+        # Hellos from 2 to 1 are lost for longer than the dead interval - 1 drops 2 and its LSP, 2 keeps hearing 1
+        self.network.set_link(self.address(2), self.address(1), loss=1, bidirectional=False)
+        self.event_loop.run_until(8)
+        self.assertNotIn(self.address(2), self.host.get_emulators()[0].lsp.lsdb)
+        self.assertIn(self.address(1), self.host.get_emulators()[1].get_neighbors())
+
+        # Well within the LSP refresh interval, so 2's LSP can only come back by 2 resyncing its database with 1
+        self.network.set_link(self.address(2), self.address(1), loss=0, bidirectional=False)
+        self.event_loop.run_until(10)
+        self.assertDatabasesComplete()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,286 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+from array import array
+
+from packet_codec import ip_to_int
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+NO_ENTRY = -1 # Note: next-hop id stored for emulators that have no entry in the forwarding table
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def pack_address(packed_ip, port):
+    # Single integer key for an emulator from its header fields - 32-bit IPv4 address followed by 16-bit port
+    return (packed_ip << 16) | port
+
+
+class EmulatorIndex:
+    # Interns each emulator (ip, port) address to a dense integer id the first time it is seen
+
+    def __init__(self):
+        self.ids = {}             # (ip, port) -> id
+        self.addresses = []       # id -> (ip, port)
+        self.packed = array('Q')  # id -> packed (ip, port) as found in packet headers
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def get_id(self, ip, port):
+        # Return the emulator's id, assigning the next free id if it has not been seen before
+        key = (ip, port)
+        emulator_id = self.ids.get(key)
+        if emulator_id is None:
+            emulator_id = self.ids[key] = len(self.addresses)
+            self.addresses.append(key)
+            self.packed.append(pack_address(ip_to_int(ip), port))
+        return emulator_id
+
+    def find_id(self, ip, port):
+        # Return the emulator's id without interning it, or NO_ENTRY if it has never been seen
+        return self.ids.get((ip, port), NO_ENTRY)
+
+    def get_address(self, emulator_id):
+        return self.addresses[emulator_id]
+
+    def get_packed_address(self, emulator_id):
+        return self.packed[emulator_id]
+
+
+class ForwardingTableEntry:
+    # Light-weight view of one row of a ForwardingTable - all state lives in the table's arrays
+
+    __slots__ = ('table', 'id')
+
+    def __init__(self, table, emulator_id):
+        self.table = table
+        self.id = emulator_id
+
+    def __eq__(self, other):
+        return isinstance(other, ForwardingTableEntry) and self.table is other.table and self.id == other.id
+
+    def __hash__(self):
+        return self.id
+
+    def get_id(self):
+        return self.id
+
+    def get_entry(self):
+        return self.table.emulator_index.get_address(self.id)
+
+    def get_ip(self):
+        return self.get_entry()[0]
+
+    def get_port(self):
+        return self.get_entry()[1]
+
+    def get_next_hop(self):
+        return self.table.emulator_index.get_address(self.table.next_hops[self.id])
+
+    def get_next_hops(self):
+        return self.table.get_next_hops(*self.get_entry())
+
+    def set_next_hop(self, next_ip, next_port):
+        self.table.next_hops[self.id] = self.table.emulator_index.get_id(next_ip, next_port)
+        self.table.multipath.pop(self.id, None)
+        self.table.packed_next_hops = None
+
+    def get_in_spf(self):
+        return bool(self.table.in_spf[self.id])
+
+    def set_in_spf(self, in_spf):
+        self.table.in_spf[self.id] = in_spf
+
+    def get_cost(self):
+        return self.table.costs[self.id]
+
+    def set_cost(self, cost):
+        self.table.costs[self.id] = cost
+
+
+class ForwardingTable:
+
+    def __init__(self, emulator_index=None):
+        # Emulator addresses are interned once, so every lookup below is an index into parallel arrays
+        self.emulator_index = emulator_index if emulator_index is not None else EmulatorIndex()
+
+        # EMULATOR (id)   NEXT-HOP (id)   IN-SPF   COST
+        self.next_hops = array('i')
+        self.in_spf = array('B')
+        self.costs = array('q')
+        self.nr_entries = 0
+
+        # Emulators reached over several equal-cost paths - id -> ids of every next-hop, the one in next_hops first
+        self.multipath = {}
+
+        # Packed destination (ip, port) -> tuple of next-hop (ip, port)s, built on the first data-plane lookup
+        self.packed_next_hops = None
+
+    def __grow(self):
+        # Extend the arrays to cover every id handed out by the emulator index so far
+        missing = len(self.emulator_index) - len(self.next_hops)
+        if missing > 0:
+            self.next_hops.extend([NO_ENTRY] * missing)
+            self.in_spf.extend(bytes(missing))
+            self.costs.extend([0] * missing)
+
+    def __has_id(self, emulator_id):
+        return 0 <= emulator_id < len(self.next_hops) and self.next_hops[emulator_id] != NO_ENTRY
+
+    def __get_emulator_id(self, ip, port):
+        # Id of an emulator that has an entry, raises KeyError like a missing dict key otherwise
+        emulator_id = self.emulator_index.ids.get((ip, port), NO_ENTRY)
+        if emulator_id < 0 or emulator_id >= len(self.next_hops) or self.next_hops[emulator_id] == NO_ENTRY:
+            raise KeyError((ip, port))
+        return emulator_id
+
+    def __len__(self):
+        return self.nr_entries
+
+    def get_emulator_index(self):
+        return self.emulator_index
+
+    def get_values(self):
+        return [ForwardingTableEntry(self, emulator_id) for emulator_id in range(len(self.next_hops)) if self.next_hops[emulator_id] != NO_ENTRY]
+
+    def print_forwarding_table(self, src_ip, src_port):
+        print("      Forwarding Table:      ")
+        print(' ____dest____   __next-hop__ ')
+        for entry in self.get_values():
+            dest_ip, dest_port = entry.get_entry()
+            if not ((dest_ip == src_ip) and (dest_port == src_port)):
+                print("{},{} ".format(dest_ip, dest_port) + " ".join("{},{}".format(next_ip, next_port) for next_ip, next_port in entry.get_next_hops()))
+        print()
+
+    def get_entry(self, ip, port):
+        return ForwardingTableEntry(self, self.__get_emulator_id(ip, port))
+
+    def get_entry_by_id(self, emulator_id):
+        if not self.__has_id(emulator_id):
+            raise KeyError(emulator_id)
+        return ForwardingTableEntry(self, emulator_id)
+
+    def add_entry(self, ip, port, next_ip, next_port, cost=0):
+        emulator_id = self.emulator_index.get_id(ip, port)
+        next_id = self.emulator_index.get_id(next_ip, next_port)
+        self.__grow()
+
+        if self.next_hops[emulator_id] == NO_ENTRY:
+            self.nr_entries += 1
+        self.next_hops[emulator_id] = next_id
+        self.in_spf[emulator_id] = False
+        self.costs[emulator_id] = cost
+        self.multipath.pop(emulator_id, None)
+        self.packed_next_hops = None
+
+    def add_routes(self, routes):
+        # Add a whole SPF run at once, every destination already in the SPF tree. routes are ((ip, port), next-hop
+        # (ip, port)s, cost) with the next-hops in the sorted order update_next_hops keeps them in.
+        get_id = self.emulator_index.get_id
+        next_ids = {}  # Next-hop (ip, port)s -> ids, most destinations share a few sets of next-hops
+        for next_hops in {next_hops for _, next_hops, _ in routes}:
+            next_ids[next_hops] = tuple(get_id(next_ip, next_port) for next_ip, next_port in next_hops)
+        routes = [(get_id(ip, port), next_ids[next_hops], cost) for (ip, port), next_hops, cost in routes]
+        self.__grow()
+
+        for emulator_id, next_ids, cost in routes:
+            if self.next_hops[emulator_id] == NO_ENTRY:
+                self.nr_entries += 1
+            self.next_hops[emulator_id] = next_ids[0]
+            self.in_spf[emulator_id] = True
+            self.costs[emulator_id] = cost
+            if len(next_ids) > 1:
+                self.multipath[emulator_id] = next_ids
+            else:
+                self.multipath.pop(emulator_id, None)
+        self.packed_next_hops = None
+
+    def get_next_hop(self, ip, port):
+        return self.emulator_index.get_address(self.next_hops[self.__get_emulator_id(ip, port)])
+
+    def get_next_hops(self, ip, port):
+        # Every equal-cost next-hop (ip, port) towards an emulator, the one get_next_hop returns first
+        emulator_id = self.__get_emulator_id(ip, port)
+        next_ids = self.multipath.get(emulator_id, (self.next_hops[emulator_id],))
+        return tuple(self.emulator_index.get_address(next_id) for next_id in next_ids)
+
+    def update_next_hop(self, ip, port, next_ip, next_port):
+        self.update_next_hops(ip, port, ((next_ip, next_port),))
+
+    def update_next_hops(self, ip, port, next_hops):
+        # Replace every next-hop towards an emulator with the given equal-cost (ip, port)s. They are kept sorted, so
+        # the same set of paths always hashes flows the same way however SPF found them
+        emulator_id = self.__get_emulator_id(ip, port)
+        next_ids = tuple(self.emulator_index.get_id(next_ip, next_port) for next_ip, next_port in sorted(set(next_hops)))
+        self.__grow()
+
+        self.next_hops[emulator_id] = next_ids[0]
+        if len(next_ids) > 1:
+            self.multipath[emulator_id] = next_ids
+        else:
+            self.multipath.pop(emulator_id, None)
+        self.packed_next_hops = None
+
+    def add_next_hops(self, ip, port, next_hops):
+        # Add next-hops of another path towards an emulator that costs the same as the ones it already has
+        self.update_next_hops(ip, port, self.get_next_hops(ip, port) + tuple(next_hops))
+
+    def __get_packed_next_hops(self):
+        if self.packed_next_hops is None:
+            addresses = self.emulator_index.addresses
+            packed = self.emulator_index.packed
+            self.packed_next_hops = {packed[emulator_id]: tuple(addresses[next_id] for next_id in self.multipath.get(emulator_id, (next_id,)))
+                                     for emulator_id, next_id in enumerate(self.next_hops) if next_id != NO_ENTRY}
+        return self.packed_next_hops
+
+    def get_next_hop_by_packed_addr(self, packed_addr):
+        # O(1) next-hop lookup for a destination given as pack_address(ip, port), None if there is no route
+        next_hops = self.__get_packed_next_hops().get(packed_addr)
+        return next_hops[0] if next_hops is not None else None
+
+    def get_next_hop_by_flow(self, packed_addr, flow_hash):
+        # Same as get_next_hop_by_packed_addr, but spreads flows over every equal-cost next-hop - a flow always
+        # hashes to the same one, so its packets stay in order
+        next_hops = self.__get_packed_next_hops().get(packed_addr)
+        if next_hops is None:
+            return None
+        return next_hops[flow_hash % len(next_hops)]
+
+    def find_next_hop(self, src_ip, src_port, pre_ip, pre_port, dest_ip, dest_port):
+
+        # If source node == predecessor node, then destination is the 'next-hop'
+        if (src_ip, src_port) == (pre_ip, pre_port):
+            return dest_ip, dest_port
+
+        # Find forwarding table entry who's next-node equals the current next-node (starting with predecessor)
+        return self.get_next_hop(pre_ip, pre_port)
+
+    def find_next_hops(self, src_ip, src_port, pre_ip, pre_port, dest_ip, dest_port):
+        # Same as find_next_hop, but every equal-cost next-hop of the predecessor
+
+        if (src_ip, src_port) == (pre_ip, pre_port):
+            return ((dest_ip, dest_port),)
+
+        return self.get_next_hops(pre_ip, pre_port)
+
+    def is_emulator_in_forwarding_table(self, ip, port):
+        return self.__has_id(self.emulator_index.find_id(ip, port))
+
+    def is_emulator_in_spf_tree(self, ip, port):
+        emulator_id = self.emulator_index.find_id(ip, port)
+        return self.__has_id(emulator_id) and bool(self.in_spf[emulator_id])
+
+    def add_emulator_to_sp_tree(self, ip, port):
+        self.in_spf[self.__get_emulator_id(ip, port)] = True
+
+    def set_emulator_cost(self, ip, port, cost):
+        self.costs[self.__get_emulator_id(ip, port)] = cost
+
+    def get_emulator_cost(self, ip, port):
+        return self.costs[self.__get_emulator_id(ip, port)]
@@ -0,0 +1,95 @@
+import unittest
+
+import ipaddress
+
+from forwarding_table import EmulatorIndex, ForwardingTable, pack_address
+
+
+class TestForwardingTable(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator_index = EmulatorIndex()
+        self.forwarding_table = ForwardingTable(self.emulator_index)
+        self.forwarding_table.add_entry('1.0.0.0', 1, '1.0.0.0', 1)
+        self.forwarding_table.add_entry('2.0.0.0', 2, '2.0.0.0', 2, 1)
+        self.forwarding_table.add_entry('4.0.0.0', 4, '2.0.0.0', 2, 2)
+
+    def test_emulator_index_is_dense_and_stable(self):
+        ''' Tests that each address is interned once to the next free id and shared between tables. '''
+        self.assertEqual(self.emulator_index.find_id('1.0.0.0', 1), 0)
+        self.assertEqual(self.emulator_index.find_id('4.0.0.0', 4), 2)
+        self.assertEqual(self.emulator_index.find_id('9.0.0.0', 9), -1)
+        self.assertEqual(self.emulator_index.get_address(1), ('2.0.0.0', 2))
+
+        other_table = ForwardingTable(self.emulator_index)
+        other_table.add_entry('4.0.0.0', 4, '4.0.0.0', 4)
+        self.assertEqual(len(self.emulator_index), 3)
+        self.assertFalse(other_table.is_emulator_in_forwarding_table('1.0.0.0', 1))
+
+    def test_entries_are_views_of_the_arrays(self):
+        ''' Tests that entry getters / setters read and write the table's arrays. '''
+        entry = self.forwarding_table.get_entry('4.0.0.0', 4)
+        self.assertEqual(entry.get_entry(), ('4.0.0.0', 4))
+        self.assertEqual(entry.get_next_hop(), ('2.0.0.0', 2))
+        self.assertEqual(entry.get_cost(), 2)
+        self.assertFalse(entry.get_in_spf())
+
+        entry.set_cost(7)
+        self.forwarding_table.add_emulator_to_sp_tree('4.0.0.0', 4)
+        self.forwarding_table.update_next_hop('4.0.0.0', 4, '3.0.0.0', 3)
+        self.assertEqual(self.forwarding_table.get_emulator_cost('4.0.0.0', 4), 7)
+        self.assertTrue(self.forwarding_table.is_emulator_in_spf_tree('4.0.0.0', 4))
+        self.assertEqual(self.forwarding_table.get_next_hop('4.0.0.0', 4), ('3.0.0.0', 3))
+        self.assertEqual(entry, self.forwarding_table.get_entry('4.0.0.0', 4))
+
+    def test_missing_entry(self):
+        ''' Tests that emulators without an entry are reported as missing and raise KeyError on lookup. '''
+        self.assertFalse(self.forwarding_table.is_emulator_in_forwarding_table('3.0.0.0', 3))
+        self.assertFalse(self.forwarding_table.is_emulator_in_spf_tree('3.0.0.0', 3))
+        with self.assertRaises(KeyError):
+            self.forwarding_table.get_entry('3.0.0.0', 3)
+        self.assertEqual(len(self.forwarding_table), 3)
+
+    def test_next_hop_by_packed_addr(self):
+        ''' Tests the data-plane lookup keyed by the packed (ip, port) from a packet header, including after an update. '''
+        packed_addr = pack_address(int(ipaddress.IPv4Address('4.0.0.0')), 4)
+        self.assertEqual(self.forwarding_table.get_next_hop_by_packed_addr(packed_addr), ('2.0.0.0', 2))
+        self.assertIsNone(self.forwarding_table.get_next_hop_by_packed_addr(pack_address(int(ipaddress.IPv4Address('4.0.0.0')), 5)))
+
+        self.forwarding_table.update_next_hop('4.0.0.0', 4, '1.0.0.0', 1)
+        self.assertEqual(self.forwarding_table.get_next_hop_by_packed_addr(packed_addr), ('1.0.0.0', 1))
+
+    def test_equal_cost_next_hops(self):
+        ''' Tests that equal-cost next-hops are kept sorted and that a flow always hashes to the same one of them. '''
+        self.forwarding_table.add_next_hops('4.0.0.0', 4, [('3.0.0.0', 3), ('2.0.0.0', 2)])
+        self.assertEqual(self.forwarding_table.get_next_hops('4.0.0.0', 4), (('2.0.0.0', 2), ('3.0.0.0', 3)))
+        self.assertEqual(self.forwarding_table.get_next_hop('4.0.0.0', 4), ('2.0.0.0', 2))
+
+        packed_addr = pack_address(int(ipaddress.IPv4Address('4.0.0.0')), 4)
+        self.assertEqual({self.forwarding_table.get_next_hop_by_flow(packed_addr, flow) for flow in range(4)}, {('2.0.0.0', 2), ('3.0.0.0', 3)})
+        self.assertEqual(self.forwarding_table.get_next_hop_by_flow(packed_addr, 5), self.forwarding_table.get_next_hop_by_flow(packed_addr, 5))
+        self.assertEqual(self.forwarding_table.get_next_hop_by_flow(pack_address(int(ipaddress.IPv4Address('2.0.0.0')), 2), 5), ('2.0.0.0', 2))
+        self.assertIsNone(self.forwarding_table.get_next_hop_by_flow(pack_address(int(ipaddress.IPv4Address('4.0.0.0')), 5), 5))
+
+        self.forwarding_table.update_next_hop('4.0.0.0', 4, '1.0.0.0', 1)
+        self.assertEqual(self.forwarding_table.get_next_hops('4.0.0.0', 4), (('1.0.0.0', 1),))
+        self.assertEqual(self.forwarding_table.get_next_hop_by_flow(packed_addr, 1), ('1.0.0.0', 1))
+
+    def test_add_routes(self):
+        ''' Tests that a whole SPF run added at once reads back like entries added one by one. '''
+        self.forwarding_table.add_routes([(('4.0.0.0', 4), (('2.0.0.0', 2), ('3.0.0.0', 3)), 5), (('5.0.0.0', 5), (('3.0.0.0', 3),), 1)])
+        self.assertEqual(len(self.forwarding_table), 4)
+        self.assertEqual(self.forwarding_table.get_next_hops('4.0.0.0', 4), (('2.0.0.0', 2), ('3.0.0.0', 3)))
+        self.assertEqual(self.forwarding_table.get_emulator_cost('4.0.0.0', 4), 5)
+        self.assertEqual(self.forwarding_table.get_next_hop('5.0.0.0', 5), ('3.0.0.0', 3))
+        self.assertTrue(self.forwarding_table.is_emulator_in_spf_tree('5.0.0.0', 5))
+
+        packed_addr = pack_address(int(ipaddress.IPv4Address('5.0.0.0')), 5)
+        self.assertEqual(self.forwarding_table.get_next_hop_by_packed_addr(packed_addr), ('3.0.0.0', 3))
+
+    def tearDown(self):
+        del self.forwarding_table
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import heapq
+import itertools
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+INFINITY = float('inf')
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class IncrementalSPF:
+    # Shortest path tree rooted at one emulator that is repaired in place when a link is added, removed or re-costed.
+    # Nodes are any hashable, orderable emulator keys (e.g. (ip, port)); link costs must be positive.
+    # The tree itself keeps one parent per node, but every node also gets the next-hops of all its equal-cost paths.
+
+    def __init__(self, root):
+        self.root = root
+        self.out_links = {}  # node -> {neighbor: cost}
+        self.in_links = {}   # node -> {predecessor: cost}
+        self.counter = itertools.count()
+        self.__reset_tree()
+
+    def __reset_tree(self):
+        self.dist = {self.root: 0}
+        self.parent = {self.root: None}
+        self.children = {self.root: set()}
+        self.next_hops = {self.root: (self.root,)}  # node -> sorted tuple of the next-hops of every equal-cost path
+
+    def get_root(self):
+        return self.root
+
+    def get_cost(self, node):
+        return self.dist.get(node, INFINITY)
+
+    def get_next_hop(self, node):
+        next_hops = self.next_hops.get(node)
+        return next_hops[0] if next_hops is not None else None
+
+    def get_next_hops(self, node):
+        return self.next_hops.get(node, ())
+
+    def get_routes(self):
+        # Yields (destination, next-hop, cost) for every emulator reachable from the root
+        for node, cost in self.dist.items():
+            yield node, self.next_hops[node][0], cost
+
+    def get_multipath_routes(self):
+        # Yields (destination, every equal-cost next-hop, cost) for every emulator reachable from the root
+        for node, cost in self.dist.items():
+            yield node, self.next_hops[node], cost
+
+    def get_links(self, node):
+        return self.out_links.get(node, {})
+
+    def set_node_links(self, node, links):
+        # Replace all of a node's outgoing links ({neighbor: cost}), repairing the tree once per changed link
+        old_links = self.out_links.get(node, {})
+
+        for neighbor in [neighbor for neighbor in old_links if neighbor not in links]:
+            self.set_link(node, neighbor, None)
+
+        for neighbor, cost in links.items():
+            if old_links.get(neighbor) != cost:
+                self.set_link(node, neighbor, cost)
+
+    def set_link(self, u, v, cost):
+        # Add, re-cost (cost) or remove (cost=None) the directed link u -> v
+        old_cost = self.out_links.get(u, {}).get(v)
+        if old_cost == cost:
+            return
+
+        if cost is None:
+            del self.out_links[u][v]
+            del self.in_links[v][u]
+        else:
+            self.out_links.setdefault(u, {})[v] = cost
+            self.in_links.setdefault(v, {})[u] = cost
+
+        # A link leaving an unreachable node cannot change the tree
+        if u not in self.dist:
+            return
+
+        changed = []
+        if cost is not None and (old_cost is None or cost < old_cost):
+            changed = self.__decrease(u, v, self.dist[u] + cost)
+
+        # A worse or removed link only matters if the tree was using it
+        elif self.parent.get(v) == u:
+            changed = self.__increase(v)
+
+        # Even when the tree stays as it is, the link may add or remove one of v's equal-cost paths
+        self.__update_next_hops(changed + [v])
+
+    def rebuild(self):
+        # Full Dijkstra run from the root over the current links
+        self.__reset_tree()
+        settled = set()
+        heap = [(0, next(self.counter), self.root, None)]
+
+        while heap:
+            cost, _, node, parent = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            self.dist[node] = cost
+            if parent is not None:
+                self.__set_parent(node, parent)
+
+            for neighbor, link_cost in self.out_links.get(node, {}).items():
+                if neighbor not in settled and cost + link_cost < self.dist.get(neighbor, INFINITY):
+                    self.dist[neighbor] = cost + link_cost
+                    heapq.heappush(heap, (cost + link_cost, next(self.counter), neighbor, node))
+
+        self.__update_next_hops(list(settled))
+
+    def __set_parent(self, node, parent):
+        old_parent = self.parent.get(node)
+        if old_parent is not None:
+            self.children[old_parent].discard(node)
+
+        self.parent[node] = parent
+        self.children.setdefault(parent, set()).add(node)
+        self.children.setdefault(node, set())
+
+    def __decrease(self, u, v, new_cost):
+        # A cheaper path to v through u - propagate the improvement outward from v only, returns the nodes re-costed
+        if new_cost >= self.dist.get(v, INFINITY):
+            return []
+
+        changed = []
+        heap = [(new_cost, next(self.counter), v, u)]
+
+        while heap:
+            cost, _, node, parent = heapq.heappop(heap)
+            if cost >= self.dist.get(node, INFINITY):
+                continue
+
+            self.dist[node] = cost
+            self.__set_parent(node, parent)
+            changed.append(node)
+
+            for neighbor, link_cost in self.out_links.get(node, {}).items():
+                if cost + link_cost < self.dist.get(neighbor, INFINITY):
+                    heapq.heappush(heap, (cost + link_cost, next(self.counter), neighbor, node))
+
+        return changed
+
+    def __increase(self, v):
+        # v's tree link got worse or disappeared - only v's subtree can be affected, returns the nodes re-costed
+        # or no longer reachable
+        affected = set()
+        stack = [v]
+        while stack:
+            node = stack.pop()
+            affected.add(node)
+            stack.extend(self.children.get(node, ()))
+
+        # Detach the subtree and forget its costs
+        self.children[self.parent[v]].discard(v)
+        for node in affected:
+            del self.dist[node]
+            del self.parent[node]
+            del self.next_hops[node]
+            self.children[node] = set()
+
+        # Seed each affected node with its best link from the unaffected part of the tree
+        heap = []
+        for node in affected:
+            for predecessor, link_cost in self.in_links.get(node, {}).items():
+                if predecessor in self.dist:
+                    heapq.heappush(heap, (self.dist[predecessor] + link_cost, next(self.counter), node, predecessor))
+
+        # Dijkstra restricted to the affected subtree
+        settled = []
+        while heap:
+            cost, _, node, parent = heapq.heappop(heap)
+            if node in self.dist:
+                continue
+
+            self.dist[node] = cost
+            self.__set_parent(node, parent)
+            settled.append(node)
+
+            for neighbor, link_cost in self.out_links.get(node, {}).items():
+                if neighbor in affected and neighbor not in self.dist:
+                    heapq.heappush(heap, (cost + link_cost, next(self.counter), neighbor, node))
+
+        # Whatever was not re-attached is now unreachable
+        for node in affected:
+            if node not in self.dist:
+                del self.children[node]
+
+        return list(affected)
+
+    def __update_next_hops(self, nodes):
+        # Re-derive the next-hops of the given nodes, whose cost or links changed, and of every node downstream of them
+        # whose next-hops change as a result. Nodes are done in cost order, so a node's predecessors are always done first.
+        heap = []
+        queued = set()
+        for node in nodes:
+            for neighbor in [node, *self.out_links.get(node, ())]:
+                if neighbor in self.dist and neighbor not in queued:
+                    queued.add(neighbor)
+                    heapq.heappush(heap, (self.dist[neighbor], next(self.counter), neighbor))
+
+        while heap:
+            _, _, node = heapq.heappop(heap)
+            next_hops = self.__equal_cost_next_hops(node)
+            if next_hops == self.next_hops.get(node):
+                continue
+
+            self.next_hops[node] = next_hops
+            for neighbor in self.out_links.get(node, ()):
+                if neighbor in self.dist and neighbor not in queued:
+                    queued.add(neighbor)
+                    heapq.heappush(heap, (self.dist[neighbor], next(self.counter), neighbor))
+
+    def __equal_cost_next_hops(self, node):
+        # Union of the next-hops of every predecessor on a shortest path to node
+        if node == self.root:
+            return (self.root,)
+
+        next_hops = set()
+        cost = self.dist[node]
+        for predecessor, link_cost in self.in_links.get(node, {}).items():
+            if self.dist.get(predecessor, INFINITY) + link_cost == cost:
+                next_hops.update((node,) if predecessor == self.root else self.next_hops[predecessor])
+        return tuple(sorted(next_hops))
@@ -0,0 +1,184 @@
+import heapq
+import random
+import unittest
+from unittest import mock
+
+from incremental_spf import IncrementalSPF
+from link_state_routing import LinkStateProtocol
+from emulator import EmulatorInProgress
+from neighbor_table import Neighbor
+
+
+def dijkstra(links, root):
+    ''' Reference shortest path costs from root over {node: {neighbor: cost}}. '''
+    dist = {root: 0}
+    heap = [(0, root)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if cost > dist[node]:
+            continue
+        for neighbor, link_cost in links.get(node, {}).items():
+            if cost + link_cost < dist.get(neighbor, float('inf')):
+                dist[neighbor] = cost + link_cost
+                heapq.heappush(heap, (cost + link_cost, neighbor))
+    return dist
+
+
+def ecmp_next_hops(links, root):
+    ''' Reference next-hops of every equal-cost shortest path from root, as sorted tuples. '''
+    dist = dijkstra(links, root)
+    distances = {neighbor: dijkstra(links, neighbor) for neighbor in links.get(root, {})}
+    next_hops = {root: (root,)}
+    for dest in dist:
+        if dest != root:
+            next_hops[dest] = tuple(sorted(neighbor for neighbor, link_cost in links[root].items()
+                                           if link_cost + distances[neighbor].get(dest, float('inf')) == dist[dest]))
+    return next_hops
+
+
+def random_edit(rng, links, nodes, max_cost):
+    ''' Adds, removes or re-costs a random bidirectional link, returns the (u, v, cost) edits made. '''
+    u, v = rng.sample(nodes, 2)
+    if v in links.get(u, {}) and rng.random() < 0.5:
+        cost = None
+    else:
+        cost = rng.randint(1, max_cost)
+
+    for a, b in ((u, v), (v, u)):
+        if cost is None:
+            links[a].pop(b, None)
+        else:
+            links.setdefault(a, {})[b] = cost
+    return [(u, v, cost), (v, u, cost)]
+
+
+class TestIncrementalSPF(unittest.TestCase):
+
+    '''
+    Differential harness: after every random link edit the repaired shortest path tree must match a full run.
+    Next-hops may legitimately differ between runs when several paths tie, so each next-hop is checked for being
+    the first hop of *a* shortest path rather than compared by value.
+    '''
+
+    def assertRoutesMatchFullRun(self, links, root, routes):
+        expected = dijkstra(links, root)
+        self.assertEqual({dest: cost for dest, _, cost in routes}, expected)
+
+        for dest, next_hop, cost in routes:
+            if dest == root:
+                self.assertEqual(next_hop, root)
+                continue
+            self.assertIn(next_hop, links[root])
+            self.assertEqual(links[root][next_hop] + dijkstra(links, next_hop)[dest], cost)
+
+    def assertMultipathMatchesFullRun(self, links, root, spf):
+        self.assertEqual({dest: next_hops for dest, next_hops, _ in spf.get_multipath_routes()}, ecmp_next_hops(links, root))
+
+    def test_random_edit_sequences(self):
+        ''' Tests the incremental tree against a full Dijkstra run after every add / remove / re-cost of a link. '''
+        for seed in range(20):
+            rng = random.Random(seed)
+            nodes = list(range(12))
+            links = {node: {} for node in nodes}
+
+            spf = IncrementalSPF(0)
+            for _ in range(60):
+                for u, v, cost in random_edit(rng, links, nodes, max_cost=5):
+                    spf.set_link(u, v, cost)
+                self.assertRoutesMatchFullRun(links, 0, list(spf.get_routes()))
+                self.assertMultipathMatchesFullRun(links, 0, spf)
+
+    def test_equal_cost_next_hops(self):
+        ''' Tests that every equal-cost path's next-hop is kept, and dropped again when its path gets worse. '''
+        spf = IncrementalSPF(0)
+        for u, v in ((0, 1), (0, 2), (1, 3), (2, 3), (3, 4)):
+            spf.set_link(u, v, 1)
+        self.assertEqual(spf.get_next_hops(4), (1, 2))
+
+        spf.set_link(2, 3, 2)
+        self.assertEqual(spf.get_next_hops(4), (1,))
+        spf.set_link(2, 3, 1)
+        self.assertEqual(spf.get_next_hops(3), (1, 2))
+        spf.set_link(1, 3, None)
+        self.assertEqual(spf.get_next_hops(4), (2,))
+
+    def test_set_node_links_matches_rebuild(self):
+        ''' Tests that replacing a whole node's links (one LSP arriving) matches rebuilding the tree from scratch. '''
+        rng = random.Random(7)
+        nodes = list(range(15))
+        links = {node: {} for node in nodes}
+        spf = IncrementalSPF(0)
+
+        for _ in range(40):
+            node = rng.choice(nodes)
+            links[node] = {neighbor: rng.randint(1, 3) for neighbor in rng.sample(nodes, 3) if neighbor != node}
+            spf.set_node_links(node, links[node])
+
+            rebuilt = IncrementalSPF(0)
+            for u in nodes:
+                rebuilt.set_node_links(u, links[u])
+            rebuilt.rebuild()
+
+            self.assertEqual({dest: cost for dest, _, cost in spf.get_routes()},
+                             {dest: cost for dest, _, cost in rebuilt.get_routes()})
+            self.assertRoutesMatchFullRun(links, 0, list(spf.get_routes()))
+            self.assertMultipathMatchesFullRun(links, 0, spf)
+            self.assertMultipathMatchesFullRun(links, 0, rebuilt)
+
+
+class TestIncrementalForwardingTable(unittest.TestCase):
+
+    '''
+    Runs LinkStateProtocol.buildforwardingtable in full and incremental mode side by side on the same link-state
+    database while links flap, and checks both produce the same ForwardingTable.
+    '''
+
+    def setUp(self):
+        self.full_emulator = EmulatorInProgress(True, '127.0.0.1', 0, [])
+        self.incremental_emulator = EmulatorInProgress(True, '127.0.0.1', 0, [])
+
+        self.full_lsp = LinkStateProtocol(self.full_emulator)
+        self.incremental_lsp = LinkStateProtocol(self.incremental_emulator, incremental_spf=True)
+
+    def test_random_link_flaps(self):
+        ''' Tests that both modes agree on destinations, costs and equal-cost next-hops after every LSP change. '''
+        rng = random.Random(3)
+        nodes = [('127.0.0.1', port) for port in range(10)]
+        root = nodes[0]
+        links = {node: {} for node in nodes}
+        seq_no = 0
+
+        for _ in range(50):
+            seq_no += 1
+            for u, v, cost in random_edit(rng, links, nodes, max_cost=1):
+                if u == root:
+                    neighbors = [Neighbor(ip, port) for ip, port in links[root]]
+                    self.full_emulator.set_neighbors(list(neighbors))
+                    self.incremental_emulator.set_neighbors(list(neighbors))
+                    self.incremental_lsp.spf_dirty.add(root)
+                else:
+                    for lsp in (self.full_lsp, self.incremental_lsp):
+                        if lsp.lsdb.install(u, seq_no, list(links[u])):
+                            lsp.spf_dirty.add(u)
+
+            with mock.patch('sys.stdout'):
+                self.full_lsp.buildforwardingtable()
+                self.incremental_lsp.buildforwardingtable()
+
+            full = {entry.get_entry(): entry for entry in self.full_lsp.get_forwarding_tbl().get_values()}
+            incremental = {entry.get_entry(): entry for entry in self.incremental_lsp.get_forwarding_tbl().get_values()}
+            self.assertEqual(set(full), set(incremental))
+
+            distances = {neighbor: dijkstra(links, neighbor) for neighbor in links[root]}
+            expected = ecmp_next_hops(links, root)
+            for dest, entry in incremental.items():
+                self.assertEqual(entry.get_cost(), full[dest].get_cost())
+                self.assertEqual(entry.get_next_hops(), full[dest].get_next_hops())
+                if dest != root:
+                    next_hop = entry.get_next_hop()
+                    self.assertEqual(1 + distances[next_hop][dest], entry.get_cost())
+                    self.assertEqual(entry.get_next_hops(), expected[dest])
+
+
+if __name__ == '__main__':
+    unittest.main()
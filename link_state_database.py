@@ -0,0 +1,159 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+from lsp_payload import DEFAULT_LINK_COST
+from packet_codec import seq_newer
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+MAX_REMOVED_CHANGES = 1024 # Note: removals kept in the change log - older ones are dropped, consumers that missed them resync in full
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class LinkStateEntry:
+
+    __slots__ = ('origin', 'seq_no', 'installed', 'neighbors', 'costs', 'links')
+
+    def __init__(self, origin, seq_no, installed, neighbors, costs):
+        self.origin = origin        # (ip, port) of the emulator that generated the LSP
+        self.seq_no = seq_no
+        self.installed = installed  # Time the LSP was installed, used to compute its age
+        self.neighbors = neighbors  # Tuple of (ip, port) adjacencies advertised in the LSP
+        self.costs = costs          # Tuple of the cost of the link to each neighbor, in the same order
+        self.links = tuple(zip(neighbors, costs))  # ((ip, port), cost) pairs, paired once here rather than on every SPF read
+
+    def get_origin(self):
+        return self.origin
+
+    def get_seq_no(self):
+        return self.seq_no
+
+    def get_age(self, now):
+        return now - self.installed
+
+    def get_neighbors(self):
+        return self.neighbors
+
+    def get_links(self):
+        # ((ip, port), cost) of every adjacency advertised in the LSP
+        return self.links
+
+
+class LinkStateDatabase:
+
+    def __init__(self, max_removed_changes=MAX_REMOVED_CHANGES):
+        # Up-to-date LSP of every known emulator, decoded once on arrival and keyed by its (ip, port). Entries are kept
+        # in the order they were installed, so the oldest LSP is always first.
+        self.entries = {}
+
+        # Every change to the links of an origin (an LSP with other links than the one it replaces, or a removal)
+        # bumps the generation. Consumers that remember the generation they last read ask for the origins changed
+        # since, in time proportional to the number of changes. The log holds every origin in the database, but only
+        # the last max_removed_changes removed ones - a consumer older than the last removal dropped must resync.
+        self.generation = 0
+        self.changes = {}  # origin -> generation of its last change, least recently changed first
+        self.removed = {}  # removed origin -> generation of its removal, in order of removal
+        self.max_removed_changes = max_removed_changes
+        self.horizon = 0   # Generation of the last removal dropped from the log
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, origin):
+        return origin in self.entries
+
+    def install(self, origin, seq_no, neighbors, now=0, costs=None):
+        # Install the LSP if it is the first from its origin or newer than the stored one, returns True if installed.
+        # costs lists the cost of the link to each neighbor, every link costs DEFAULT_LINK_COST if it is not given.
+        entry = self.entries.get(origin)
+        if entry is not None and not seq_newer(seq_no, entry.seq_no):
+            return False
+
+        neighbors = tuple(neighbors)
+        costs = tuple(costs) if costs is not None else (DEFAULT_LINK_COST,) * len(neighbors)
+        self.entries.pop(origin, None)
+        self.entries[origin] = LinkStateEntry(origin, seq_no, now, neighbors, costs)
+        if entry is None or entry.links != self.entries[origin].links:
+            self.__changed(origin)
+        return True
+
+    def remove(self, origin):
+        # Remove an origin's LSP, returns True if one was stored
+        if self.entries.pop(origin, None) is None:
+            return False
+        self.__changed(origin)
+        return True
+
+    def purge(self, now, max_age):
+        # Remove every LSP installed at least max_age ago, returns their origins. Only the expired entries are visited.
+        expired = []
+        for entry in self.entries.values():
+            # Same sum as get_next_expiry, so the sweep woken at that time always finds the entry expired
+            if entry.installed + max_age > now:
+                break
+            expired.append(entry.origin)
+
+        for origin in expired:
+            del self.entries[origin]
+            self.__changed(origin)
+        return expired
+
+    def get_next_expiry(self, max_age):
+        # Time the oldest LSP reaches max_age, None if the database is empty
+        for entry in self.entries.values():
+            return entry.installed + max_age
+        return None
+
+    def __changed(self, origin):
+        self.generation += 1
+        self.changes.pop(origin, None)
+        self.changes[origin] = self.generation
+
+        # Forget the oldest removal once too many are kept
+        self.removed.pop(origin, None)
+        if origin not in self.entries:
+            self.removed[origin] = self.generation
+            if len(self.removed) > self.max_removed_changes:
+                oldest = next(iter(self.removed))
+                self.horizon = self.removed.pop(oldest)
+                del self.changes[oldest]
+
+    def get_generation(self):
+        return self.generation
+
+    def get_changed_since(self, generation):
+        # Origins whose links changed or that were removed after the given generation, most recent first. None if a
+        # removal since was dropped from the log - the caller has to re-read every origin.
+        if generation < self.horizon:
+            return None
+        changed = []
+        for origin, changed_at in reversed(self.changes.items()):
+            if changed_at <= generation:
+                break
+            changed.append(origin)
+        return changed
+
+    def get_entry(self, origin):
+        return self.entries.get(origin)
+
+    def get_origins(self):
+        return self.entries.keys()
+
+    def get_neighbors(self, origin):
+        # O(1) adjacency lookup for SPF - an unknown origin has no neighbors
+        entry = self.entries.get(origin)
+        if entry is None:
+            return ()
+        return entry.neighbors
+
+    def get_links(self, origin):
+        # ((ip, port), cost) of every adjacency of an origin, none for an unknown origin
+        entry = self.entries.get(origin)
+        if entry is None:
+            return ()
+        return entry.get_links()
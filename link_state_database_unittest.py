@@ -0,0 +1,97 @@
+import unittest
+
+from link_state_database import LinkStateDatabase
+
+
+class TestLinkStateDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.lsdb = LinkStateDatabase()
+        self.lsdb.install(('1.0.0.0', 1), 5, [('2.0.0.0', 2), ('3.0.0.0', 3)], now=10)
+
+    def test_install_keeps_newest_lsp(self):
+        ''' Tests that an LSP only replaces the stored one when its sequence number is greater. '''
+        self.assertFalse(self.lsdb.install(('1.0.0.0', 1), 5, [('2.0.0.0', 2)]))
+        self.assertFalse(self.lsdb.install(('1.0.0.0', 1), 4, [('2.0.0.0', 2)]))
+        self.assertEqual(self.lsdb.get_neighbors(('1.0.0.0', 1)), (('2.0.0.0', 2), ('3.0.0.0', 3)))
+
+        self.assertTrue(self.lsdb.install(('1.0.0.0', 1), 6, [('2.0.0.0', 2)], now=12))
+        entry = self.lsdb.get_entry(('1.0.0.0', 1))
+        self.assertEqual(entry.get_seq_no(), 6)
+        self.assertEqual(entry.get_neighbors(), (('2.0.0.0', 2),))
+        self.assertEqual(entry.get_age(15), 3)
+
+    def test_link_costs(self):
+        ''' Tests that links without a cost cost DEFAULT_LINK_COST and given costs stay paired with their neighbor. '''
+        self.assertEqual(self.lsdb.get_links(('1.0.0.0', 1)), ((('2.0.0.0', 2), 1), (('3.0.0.0', 3), 1)))
+        self.lsdb.install(('1.0.0.0', 1), 6, [('2.0.0.0', 2), ('3.0.0.0', 3)], costs=[4, 7])
+        self.assertEqual(self.lsdb.get_links(('1.0.0.0', 1)), ((('2.0.0.0', 2), 4), (('3.0.0.0', 3), 7)))
+        self.assertEqual(self.lsdb.get_links(('9.0.0.0', 9)), ())
+
+    def test_remove_and_unknown_origin(self):
+        ''' Tests that removed or never-seen origins have no neighbors. '''
+        self.assertEqual(self.lsdb.get_neighbors(('9.0.0.0', 9)), ())
+        self.assertTrue(self.lsdb.remove(('1.0.0.0', 1)))
+        self.assertFalse(self.lsdb.remove(('1.0.0.0', 1)))
+        self.assertNotIn(('1.0.0.0', 1), self.lsdb)
+        self.assertEqual(len(self.lsdb), 0)
+
+    def test_install_across_sequence_wrap(self):
+        ''' Tests that an LSP whose seq # wrapped around to 0 replaces the one before the wrap. '''
+        self.assertTrue(self.lsdb.install(('2.0.0.0', 2), 2 ** 32 - 1, [('1.0.0.0', 1)]))
+        self.assertTrue(self.lsdb.install(('2.0.0.0', 2), 0, []))
+        self.assertFalse(self.lsdb.install(('2.0.0.0', 2), 2 ** 32 - 1, [('1.0.0.0', 1)]))
+        self.assertEqual(self.lsdb.get_neighbors(('2.0.0.0', 2)), ())
+
+    def test_purge_oldest_first(self):
+        ''' Tests that only LSPs at their max age are purged and that a newer install restarts an LSP's age. '''
+        self.lsdb.install(('2.0.0.0', 2), 1, [('1.0.0.0', 1)], now=11)
+        self.lsdb.install(('3.0.0.0', 3), 1, [('1.0.0.0', 1)], now=12)
+        self.lsdb.install(('1.0.0.0', 1), 6, [('2.0.0.0', 2)], now=13)
+        self.assertEqual(self.lsdb.get_next_expiry(5), 16)
+
+        self.assertEqual(self.lsdb.purge(16, 5), [('2.0.0.0', 2)])
+        self.assertEqual(self.lsdb.purge(16, 5), [])
+        self.assertEqual(self.lsdb.purge(18, 5), [('3.0.0.0', 3), ('1.0.0.0', 1)])
+        self.assertIsNone(self.lsdb.get_next_expiry(5))
+
+    def test_changes_since_generation(self):
+        ''' Tests that only installs that change an origin's links, removals and purges count as changes. '''
+        generation = self.lsdb.get_generation()
+        self.assertTrue(self.lsdb.install(('1.0.0.0', 1), 6, [('2.0.0.0', 2), ('3.0.0.0', 3)], now=11))
+        self.assertEqual(self.lsdb.get_generation(), generation)
+        self.assertEqual(self.lsdb.get_changed_since(generation), [])
+
+        self.lsdb.install(('2.0.0.0', 2), 1, [('1.0.0.0', 1)], now=12)
+        self.lsdb.install(('1.0.0.0', 1), 7, [('2.0.0.0', 2), ('3.0.0.0', 3)], costs=[1, 2], now=13)
+        self.assertEqual(self.lsdb.get_changed_since(generation), [('1.0.0.0', 1), ('2.0.0.0', 2)])
+
+        generation = self.lsdb.get_generation()
+        self.lsdb.remove(('2.0.0.0', 2))
+        self.assertEqual(self.lsdb.purge(20, 5), [('1.0.0.0', 1)])
+        self.assertEqual(self.lsdb.get_changed_since(generation), [('1.0.0.0', 1), ('2.0.0.0', 2)])
+        self.assertEqual(self.lsdb.get_changed_since(self.lsdb.get_generation()), [])
+
+    def test_removed_changes_bounded(self):
+        ''' Tests that only the last removals stay in the change log and older generations are told to resync. '''
+        lsdb = LinkStateDatabase(max_removed_changes=2)
+        for port in range(5):
+            lsdb.install(('1.0.0.0', port), 1, [('2.0.0.0', 2)])
+        generation = lsdb.get_generation()
+        lsdb.install(('1.0.0.0', 1), 2, [])
+        for port in (0, 2, 3):
+            lsdb.remove(('1.0.0.0', port))
+
+        self.assertEqual(len(lsdb.changes), len(lsdb) + 2)
+        self.assertIsNone(lsdb.get_changed_since(generation))
+        self.assertEqual(lsdb.get_changed_since(generation + 2), [('1.0.0.0', 3), ('1.0.0.0', 2)])
+
+        lsdb.install(('1.0.0.0', 2), 1, [('2.0.0.0', 2)])
+        self.assertEqual(len(lsdb.changes), len(lsdb) + 1)
+
+    def tearDown(self):
+        del self.lsdb
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,331 +2,396 @@
 #                                                                   IMPORTS                                                                              #
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 
-import socket
 import logging
-import datetime
-import struct
-import ipaddress
 
+import numpy_spf
+from adjacency_cache import AdjacencyCache
 from emulator_priority_queue import EmulatorPriorityQueue
+from event_loop import EventLoop
+from flooding import LSP_REFRESH_INTERVAL, FloodingEngine
+from forwarding_table import EmulatorIndex, ForwardingTable
+from incremental_spf import IncrementalSPF
+from link_state_database import LinkStateDatabase
+from lsp_payload import LspReassembly, decode_lsp_fragment, peek_fragment_no
+from neighbor_table import Neighbor
+from packet_codec import P_HEADER_LEN, get_ttl, int_to_ip, set_ttl, unpack_header
+from spf_throttle import SpfThrottle
 
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 #                                                                   ENUMERATIONS                                                                         #
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 
+# Protocol Timer Enums (seconds)
+HELLO_INTERVAL = 0.5 # Note: hello packets are sent to every neighbor on this interval
+NEIGHBOR_TIMEOUT = 2 # Note: a neighbor is dropped and a new LSP generated if no hello is received within this time
+NEIGHBOR_CHECK_SLACK = 0.01 # Note: wake up slightly after a neighbor's deadline so the timeout comparison is strictly past it
+LSP_MAX_AGE = 60 # Note: an LSP its origin has not refreshed within this time is purged, its origin is taken to have left the network
+
+# Measured RTT Enums - in measured-RTT mode the cost of a link is its smoothed hello round trip time
+RTT_COST_UNIT = 0.001 # Note: seconds of smoothed RTT per unit of link cost, i.e. link costs are in ms
+RTT_SMOOTHING = 0.125 # Note: weight of a new RTT sample in the smoothed RTT, as in RFC 6298
+RTT_COST_HYSTERESIS = 0.25 # Note: a link's cost is only re-advertised once its measured cost is off by more than this fraction
+
+# SPF Backend Enums - what runs a full rebuild of the forwarding table
+SPF_BACKEND_PYTHON = 'python' # Note: Dijkstra over the forwarding table itself, one entry at a time
+SPF_BACKEND_NUMPY = 'numpy' # Note: the LSDB as CSR arrays, relaxed a whole frontier at a time by NumPy (numpy_spf.py)
+SPF_BACKENDS = [SPF_BACKEND_PYTHON, SPF_BACKEND_NUMPY]
+
 
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 #                                                                   CLASSES / FUNCTIONS                                                                  #
 #--------------------------------------------------------------------------------------------------------------------------------------------------------#
 
-class ForwardingTableEntry():
-    
-    def __init__(self, dest_ip, dest_port, next_ip, next_port, in_spf, cost):
-        self.dest_ip = dest_ip
-        self.dest_port = dest_port
-        self.next_ip = next_ip
-        self.next_port = next_port
-        self.in_spf = in_spf
-        self.cost = cost
-
-    def get_entry(self):
-        return self.dest_ip, self.dest_port
-    
-    def get_ip(self):
-        return self.dest_ip
-    
-    def get_port(self):
-        return self.dest_port
-    
-    def get_next_hop(self):
-        return self.next_ip, self.next_port
-    
-    def set_next_hop(self, next_ip, next_port):
-        self.next_ip, self.next_port = next_ip, next_port
-
-    def get_in_spf(self):
-        return self.in_spf
+class LinkStateProtocol:
 
-    def set_in_spf(self, in_spf):
-        self.in_spf = in_spf
+    def __init__(self, emulator, incremental_spf=False, print_tables=True, spf_timers=None, lsp_max_age=LSP_MAX_AGE,
+                 lsp_refresh_interval=LSP_REFRESH_INTERVAL, rtt_costs=False, hello_timers=None, lsp_timers=None, spf_backend=SPF_BACKEND_PYTHON):
+        # hello_timers is (hello interval, neighbor timeout) and lsp_timers (refresh interval, max age), in seconds
+        hello_interval, neighbor_timeout = hello_timers or (HELLO_INTERVAL, NEIGHBOR_TIMEOUT)
+        if lsp_timers is not None:
+            lsp_refresh_interval, lsp_max_age = lsp_timers
+        if not 0 < lsp_refresh_interval < lsp_max_age:
+            raise ValueError("LSP refresh interval {} must be positive and below the max age {}".format(lsp_refresh_interval, lsp_max_age))
+        if not 0 < hello_interval < neighbor_timeout:
+            raise ValueError("Hello interval {} must be positive and below the neighbor timeout {}".format(hello_interval, neighbor_timeout))
+        if spf_backend not in SPF_BACKENDS:
+            raise ValueError("Unknown SPF backend {}".format(spf_backend))
+        if spf_backend != SPF_BACKEND_PYTHON and incremental_spf:
+            raise ValueError("The {} SPF backend only runs full rebuilds, not incremental SPF".format(spf_backend))
+        if spf_backend == SPF_BACKEND_NUMPY and not numpy_spf.is_available():
+            raise ImportError("The numpy SPF backend needs numpy installed")
 
-    def get_cost(self):
-        return self.cost
+        self.emulator_obj = emulator
+        self.forwarding_tbl = []
+        self.lsdb = LinkStateDatabase()  # Up-to-date Link State Packet of every known emulator
+        self.lsp_max_age = lsp_max_age
+        self.hello_interval = hello_interval
+        self.neighbor_timeout = neighbor_timeout  # Dead interval - a neighbor not heard from for this long is dropped
+        self.lsp_reassembly = LspReassembly()  # Fragments of LSPs that have not fully arrived yet
+        self.flooding = FloodingEngine(emulator, refresh_interval=lsp_refresh_interval)  # Floods LSPs reliably to the neighbors
+        self.forwarding_tbl = None
+        self.emulator_index = EmulatorIndex()  # Dense integer id of every emulator, shared by all forwarding tables
+        self.adjacency = AdjacencyCache(self.lsdb, self.emulator_index)  # The LSDB as a graph, kept up to date by the SPF runs that read it
+        self.event_loop = None
+        self.spf_throttle = SpfThrottle(self.buildforwardingtable, *(spf_timers or ()))  # Backs off forwarding table rebuilds during LSP storms
+        self.hello_timer = None
+        self.neighbor_timer = None
+        self.aging_timer = None  # Wakes up when the oldest LSP in the LSDB reaches its max age
+        self.nr_spf_runs = 0  # Forwarding tables built so far
+        self.nr_purged = 0  # LSPs aged out of the LSDB so far
+        self.print_tables = print_tables  # Print every forwarding table built - off when simulating large networks
+        self.rtt_costs = rtt_costs  # Set link costs from the measured hello round trip time instead of the topology file
+
+        # Incremental SPF mode repairs the previous shortest path tree instead of re-running Dijkstra from scratch
+        self.incremental_spf = incremental_spf
+        self.spf = None
+        self.spf_dirty = set()  # Emulators whose links changed since the last forwarding table build
+        self.spf_backend = spf_backend  # What runs a full rebuild, one of SPF_BACKENDS
     
-    def set_cost(self, cost):
-        self.cost = cost
 
+    def get_forwarding_tbl(self):
+        return self.forwarding_tbl
 
-class ForwardingTable(ForwardingTableEntry):
-
-    def __init__(self):
-        # EMULATOR   NEXT-HOP   IN-SPF
-        self.forwarding_table = {}
 
-    
-    def get_values(self):
-        return self.forwarding_table.values()
-
-    def print_forwarding_table(self, src_ip, src_port):
-        print("      Forwarding Table:      ")
-        print(' ____dest____   __next-hop__ ')
-        for entry in self.forwarding_table.values():
-            dest_ip, dest_port = entry.get_entry()
-            if not ((dest_ip == src_ip) and (dest_port == src_port)):
-                next_ip, next_port = entry.get_next_hop()
-                print("{},{} {},{}".format(dest_ip, dest_port, next_ip, next_port))
-        print()
-
-    def __get_emulator_key(self, ip, port):
-        key = str(ip) + ',' + str(port)
-        return key
-
-    def get_entry(self, ip, port):
-        key = self.__get_emulator_key(ip, port)
-        entry = self.forwarding_table[key]
-        return entry
-    
-    def add_entry(self, ip, port, next_ip, next_port, cost=0):
-        key = self.__get_emulator_key(ip, port)
-        entry = ForwardingTableEntry(ip, port, next_ip, next_port, False, cost)
-        self.forwarding_table[key] = entry
-    
-    def get_next_hop(self, ip, port):
-        key = self.__get_emulator_key(ip, port)
-        entry = self.forwarding_table[key]
-        return entry.get_next_hop()
-
-    def update_next_hop(self, ip, port, next_ip, next_port):
-        key = self.__get_emulator_key(ip, port)
-        entry = self.forwarding_table[key]
-        entry.set_next_hop(next_ip, next_port)
-
-    def find_next_hop(self, src_ip, src_port, pre_ip, pre_port, dest_ip, dest_port):
-        src_key = self.__get_emulator_key(src_ip, src_port)
-        pre_key = self.__get_emulator_key(pre_ip, pre_port)
-
-        # If source node == predecessor node, then destination is the 'next-hop'
-        if src_key == pre_key:
-            return dest_ip, dest_port
-        
-        # Find forwarding table entry who's next-node equals the current next-node (starting with predecessor)
-        entry = self.forwarding_table[pre_key]
-        next_ip, next_port = entry.get_next_hop()
-        return next_ip, next_port
-
-    def is_emulator_in_forwarding_table(self, ip, port):
-        try:
-            _ = self.get_entry(ip, port)
-            return True
-        except Exception:
-            return False
+    def get_nr_spf_runs(self):
+        return self.nr_spf_runs
 
-    def is_emulator_in_spf_tree(self, ip, port):
-        try:
-            entry = self.get_entry(ip, port)
-            return entry.get_in_spf()
-        except Exception:
-            return False
 
-    def add_emulator_to_sp_tree(self, ip, port):
-        entry = self.get_entry(ip, port)
-        entry.set_in_spf(True)
-    
-    def set_emulator_cost(self, ip, port, cost):
-        entry = self.get_entry(ip, port)
-        entry.set_cost(cost)
-        
-    def get_emulator_cost(self, emulator):
-        entry = self.get_entry(emulator)
-        return entry.get_cost()
+    def get_spf_throttle(self):
+        return self.spf_throttle
 
 
-class LinkStateProtocol:
+    def get_flooding(self):
+        return self.flooding
 
-    def __init__(self, emulator):
-        self.emulator_obj = emulator
-        self.forwarding_tbl = []
-        self.cur_LSP = {}  # Up-to-date Link State Packet
-        self.forwarding_tbl = None
-    
 
-    def get_forwarding_tbl(self):
-        return self.forwarding_tbl
+    def get_nr_purged(self):
+        return self.nr_purged
 
 
-    def createroutes(self):
+    def createroutes(self, event_loop=None):
         # Implements a link-state routing protocol to set up the shortest path forwarding
         # table between nodes in the specified topology (reliable flooding)
+        self.event_loop = event_loop if event_loop is not None else EventLoop()
+
+        # Sleep until a packet arrives or the next hello / neighbor timeout / forwarding table rebuild is due.
+        # The transport hands every datagram to handlepacket, which must not keep a reference to it.
+        self.emulator_obj.get_transport().start(self.event_loop, self.handlepacket)
+        self.spf_throttle.start(self.event_loop)
+        self.flooding.start(self.event_loop)
+
+        # Send hello messages to neighbors and continue to send after each hello interval, flood this emulator's LSP
+        self.sendhellos()
+        self.flooding.originate()
+
+        self.checkneighbors()
+
+        # Only run the loop if the caller did not hand us a shared one
+        if event_loop is None:
+            self.event_loop.run_forever()
+
+    def stop(self):
+        # Take the emulator off the network - cancel every protocol timer and close its transport
+        for timer in (self.hello_timer, self.neighbor_timer, self.aging_timer):
+            if timer is not None:
+                timer.cancel()
+        self.hello_timer = self.neighbor_timer = self.aging_timer = None
+        self.spf_throttle.cancel()
+        self.flooding.stop()
+        self.emulator_obj.get_transport().close()
+
+    def handlepacket(self, packet, addr=None):
+        # addr is the (ip, port) of the neighbor that sent the packet
+        # Route trace packets are forwarded straight from the raw header without decoding the packet
+        if packet[:1] == b'T':
+            self.emulator_obj.forwardtracepacket(packet)
+            return
 
-        # Generate new LSP if hello packet not received from neighbor in timeout
-        recv_timeout = datetime.timedelta(seconds=2)
-
-        # Send hello messages and LSP to neighbors and continue to send after each send_timeout
-        for node in self.emulator_obj.get_neighbors():
-            self.emulator_obj.get_sock().sendto(self.emulator_obj.assemblepacket('H', 10, [node['ip'], node['port']], -1), (node['ip'], node['port']))
-            self.emulator_obj.get_sock().sendto(self.emulator_obj.assemblepacket('L', 10, [node['ip'], node['port']], -1), (node['ip'], node['port']))
+        # LSPs go straight to forwardpacket, which drops duplicates before decoding them
+        if packet[:1] == b'L':
+            # Duplicate LSPs and fragments of LSPs not yet complete leave the topology as it was
+            if self.forwardpacket(packet, addr):
+                self.topographychanged()
+            return
 
-        send_hello = datetime.datetime.now()
-        send_timeout = datetime.timedelta(seconds=0.5)
+        # LSP acknowledgements go straight to the flooding engine, their header addresses are never decoded
+        lsp_ack = self.emulator_obj.deassemblelspack(packet)
+        if lsp_ack is not None:
+            seq_no, origin, fragment_no = lsp_ack
+            self.flooding.acknowledged(addr, origin, seq_no, fragment_no)
+            return
 
-        topography_change = False
-        build_ft_timeout = datetime.timedelta(seconds=3)
-        build_ft_wait = -1
+        packet, header, data = self.emulator_obj.deassemblepacket(packet)
 
-        while True:
+        # Hello packet received from neighbor node
+        if header[0] == 'H':
             unavailable = True
-            neighbor_timeout = []
 
-            try:
-                # Receive packets from other nodes
-                packet, addr = self.emulator_obj.get_sock().recvfrom(1024)
-                packet, header, data = self.emulator_obj.deassemblepacket(packet)
+            # Echo the timestamp of a measured-RTT hello straight back
+            if isinstance(data, float):
+                self.emulator_obj.get_transport().sendto(self.emulator_obj.assemblehelloack(header[4], data), (header[4][0], header[4][1]))
+
+            # Check if sender of hello message in neighbor table
+            neighbors = self.emulator_obj.get_neighbors()
+            node = neighbors.find(header[4][0], header[4][1])
+            if node is not None:
+                # Hello message received from previously available neighbor node
+                unavailable = False
+
+                # A neighbor that has not heard us after we heard it restarted or lost us - bring it up to date
+                if header[2] == 0 and node.heard:
+                    self.flooding.neighbor_up(node.address)
+                neighbors.hello(node, self.event_loop.time())
+
+            # Hello packet received from previously unavailable node, add to neighbor table with the link's configured
+            # cost, bring it up to date with every LSP held and generate new LSP. The neighbor is added as not heard yet:
+            # it may never have stopped hearing us (only its hellos to us were lost), so our next hello tells it we lost
+            # it and it sends back every LSP held - the ones dropped with it included.
+            if unavailable:
+                cost = self.emulator_obj.get_link_cost(header[4][0], header[4][1])
+                self.emulator_obj.append_neighbor(Neighbor(header[4][0], header[4][1], self.event_loop.time(), False, cost))
+                self.spf_dirty.add((self.emulator_obj.get_ip(), self.emulator_obj.get_port()))
+                self.topographychanged()
+
+                self.flooding.neighbor_up((header[4][0], header[4][1]))
+                self.flooding.originate()
+
+        # Hello acknowledgement received from neighbor node - a round trip time sample for the link to it
+        elif header[0] == 'A' and isinstance(data, float):
+            self.measurertt((header[4][0], header[4][1]), self.event_loop.time() - data)
 
-                # Hello packet received from neighbor node
-                if header[0] == 'H':
-                    # Check if sender of hello message in neighbor list
-                    for node in self.emulator_obj.get_neighbors():
+        else:
+            logging.warning("Received packet with unknown packet type.")
 
-                        if header[4][0].__eq__(node['ip']) and header[4][1] == node['port']:
-                            # Hello message received from previously available neighbor node
-                            node['last_hello'] = datetime.datetime.now()
-                            unavailable = False
+    def sendhellos(self):
+        # Send hello packet to all neighbors every hello interval in one batch, telling each whether it has been heard from
+        timestamp = self.event_loop.time() if self.rtt_costs else None
+        self.emulator_obj.get_transport().send_batch(self.emulator_obj.assemblehellos(10, self.emulator_obj.get_neighbors(), timestamp))
 
-                    # Hello packet received from previously unavailable node, add to neighbors list and generate new LSP
-                    if unavailable:
-                        self.emulator_obj.append_neighbor({'ip': header[4][0], 'port': header[4][1],
-                                                           'last_hello': datetime.datetime.now()})
-                        topography_change = True
+        self.hello_timer = self.event_loop.call_later(self.hello_interval, self.sendhellos)
 
+    def measurertt(self, neighbor, rtt):
+        # Fold an RTT sample into the neighbor's smoothed RTT and re-advertise the link once its cost moved far enough
+        node = self.emulator_obj.get_neighbors().find(*neighbor)
+        if node is None:
+            return
 
-                        for node in self.emulator_obj.get_neighbors():
-                            self.emulator_obj.get_sock().sendto(self.emulator_obj.assemblepacket('L', 10, [node['ip'], node['port']], -1),
-                                             (node['ip'], node['port']))
+        srtt = node.srtt = rtt if node.srtt is None else node.srtt + RTT_SMOOTHING * (rtt - node.srtt)
+        cost = max(1, round(srtt / RTT_COST_UNIT))
+        if abs(cost - node.cost) > node.cost * RTT_COST_HYSTERESIS:
+            node.cost = cost
+            self.spf_dirty.add((self.emulator_obj.get_ip(), self.emulator_obj.get_port()))
+            self.topographychanged()
+            self.flooding.originate()
+
+    def checkneighbors(self):
+        now = self.event_loop.time()
+        neighbors = self.emulator_obj.get_neighbors()
+
+        # If hello packet not received in time, remove neighbor and generate new LSP. Neighbors not heard from yet get
+        # leeway on their first hello, their timeout starts now. Only neighbors that may have timed out are looked at.
+        neighbor_timeout = neighbors.expire(now, self.neighbor_timeout)
+
+        for drop_node in neighbor_timeout:
+            self.flooding.neighbor_down(drop_node.address)
+            self.forgetorigin(drop_node.address)
+
+        if len(neighbor_timeout) >= 1:
+            self.spf_dirty.add((self.emulator_obj.get_ip(), self.emulator_obj.get_port()))
+            self.topographychanged()
+            self.flooding.originate()
+
+        # Wake up again when the neighbor with the oldest hello is due to time out
+        next_check = neighbors.get_next_expiry(self.neighbor_timeout)
+        if next_check is None:
+            next_check = now + self.neighbor_timeout
+        self.neighbor_timer = self.event_loop.call_at(max(next_check, now) + NEIGHBOR_CHECK_SLACK, self.checkneighbors)
+
+    def agelsps(self):
+        # Purge every LSP that reached its max age - its origin stopped refreshing it, so it left the network
+        self.aging_timer = None
+        expired = self.lsdb.purge(self.event_loop.time(), self.lsp_max_age)
+        for origin in expired:
+            self.forgetorigin(origin)
+        self.nr_purged += len(expired)
+
+        if expired:
+            self.topographychanged()
+        self.scheduleaging()
+
+    def scheduleaging(self):
+        # Sleep until the oldest LSP in the LSDB reaches its max age
+        next_expiry = self.lsdb.get_next_expiry(self.lsp_max_age)
+        if self.aging_timer is None and next_expiry is not None:
+            self.aging_timer = self.event_loop.call_at(next_expiry, self.agelsps)
+
+    def forgetorigin(self, origin):
+        # Drop everything held for an emulator that is no longer in the network
+        self.lsdb.remove(origin)
+        self.lsp_reassembly.discard(origin)
+        self.flooding.discard(origin)
+        self.spf_dirty.add(origin)
+
+    def topographychanged(self):
+        # If there is a change in topography rebuild the forwarding table, backing off while changes keep arriving
+        self.spf_throttle.trigger()
 
-                # LSP packet received
-                elif header[0] == 'L':
-                    self.forwardpacket(packet)
-                    topography_change = True
+    def decrement_ttl(self, packet):
+        # Copy the received datagram once - it may be a view of the transport's receive buffer - and patch the TTL of
+        # the copy in place. The copy is what is flooded on to every neighbor.
+        new_pkt = bytearray(packet)
+        set_ttl(new_pkt, get_ttl(new_pkt) - 1)
 
-                # Route trace packet
-                elif header[0] == 'T':
-                    pass
+        return new_pkt
 
-                else:
-                    logging.warning("Received packet with unknown packet type.")
 
-            except socket.error:
-                pass
+    def forwardpacket(self, packet, addr=None):
+        # Returns whether the LSP changed the LSDB, i.e. added its origin to spf_dirty.
+        # Duplicate suppression fast path - origin, seq # and fragment # are read straight from the packet bytes, so a
+        # stale or duplicate LSP is acknowledged and dropped before its payload is decoded or anything is flooded
+        _, _, seq_no, ttl, src_ip, src_port, _, _ = unpack_header(packet)
+        origin = (int_to_ip(src_ip), src_port)
+        fragment_no = peek_fragment_no(packet, P_HEADER_LEN)
 
-            # Send hello packet to all neighbors if send_timeout has passed
-            if datetime.datetime.now() - send_hello > send_timeout:
-                for node in self.emulator_obj.get_neighbors():
-                    self.emulator_obj.get_sock().sendto(self.emulator_obj.assemblepacket('H', 10, [node['ip'], node['port']], -1), (node['ip'],
-                                                                                                   node['port']))
+        # A copy of this emulator's own LSP from before it restarted - supersede it with a newer LSP
+        if origin == (self.emulator_obj.get_ip(), self.emulator_obj.get_port()):
+            if self.flooding.receive_own(addr, seq_no, fragment_no, packet):
+                self.emulator_obj.set_seq_no(seq_no + 1)
+                self.flooding.originate()
+            return False
 
-                send_hello = datetime.datetime.now()
+        # Only fragments newer than the copy held (per origin seq #) are flooded on and installed
+        if not self.flooding.receive(addr, origin, seq_no, fragment_no):
+            return False
 
-            # If hello packet not received in time, remove neighbor and generate new LSP
-            for node in self.emulator_obj.get_neighbors():
-                if node['last_hello'] == -1:
-                    # Give neighbors leeway on first hello message (set to -1), then store datetime regardless of recv
-                    node['last_hello'] = datetime.datetime.now()
+        # Decrement TTL of LSP by 1. If TTL has not reached 0 forward new LSP to all neighbors except the node it was received from,
+        # the same copy of the datagram goes to each of them
+        if ttl > 1:
+            self.flooding.flood(addr, origin, seq_no, fragment_no, self.decrement_ttl(packet))
 
-                elif datetime.datetime.now() - node['last_hello'] > recv_timeout:
-                    neighbor_timeout.append(node)
-                    topography_change = True
+        # Decode the new fragment's neighbors and wait for every fragment of the LSP before installing it. The links of
+        # an LSP in a newer payload version are unknown, the origin keeps the ones last installed.
+        fragment = decode_lsp_fragment(packet[P_HEADER_LEN:])
+        if fragment is None:
+            return False
+        neighbors, fragment_no, nr_fragments = fragment
+        neighbors = self.lsp_reassembly.add_fragment(origin, seq_no, fragment_no, nr_fragments, neighbors)
 
-            for drop_node in neighbor_timeout:
-                self.emulator_obj.remove_neighbor(drop_node)
+        # Install the LSP if it is the first from its src node or it's sequence number is greater than the last recieved LSP (from the new LSP src node).
+        # A refresh that advertises the same links only restarts the LSP's age and leaves the forwarding table as it is.
+        if neighbors is None:
+            return False
+        generation = self.lsdb.get_generation()
+        if not self.lsdb.install(origin, seq_no, [(ip, port) for ip, port, cost in neighbors], self.event_loop.time(), [cost for ip, port, cost in neighbors]):
+            return False
+        self.scheduleaging()
+        if self.lsdb.get_generation() == generation:
+            return False
+        self.spf_dirty.add(origin)
+        return True
 
-                key = str(drop_node['ip']) + ',' + str(drop_node['port'])
-                if key in self.cur_LSP.keys():
-                    self.cur_LSP.pop(key)
 
-            if len(neighbor_timeout) >= 1:
+    def buildforwardingtable(self):
 
-                for node in self.emulator_obj.get_neighbors():
-                    # logging.debug("Sending LSP packet to [ip:port] -- " + node['ip'] + " : " + str(node['port']))
-                    self.emulator_obj.get_sock().sendto(self.emulator_obj.assemblepacket('L', 10, [node['ip'], node['port']], -1),
-                                     (node['ip'], node['port']))
+        if self.incremental_spf:
+            forwarding_table = self.__incrementalforwardingtable()
+        elif self.spf_backend == SPF_BACKEND_NUMPY:
+            forwarding_table = self.__numpyforwardingtable()
+        else:
+            forwarding_table = self.__fullforwardingtable()
+        self.spf_dirty = set()
+        self.nr_spf_runs += 1
 
-            # If there is a change in topography rebuild forwarding table
-            if topography_change:
-                build_ft_wait = datetime.datetime.now()
-                topography_change = False
+        # Print Forwarding Table
+        # logging.info(str(self.forwarding_tbl))
+        if self.print_tables:
+            forwarding_table.print_forwarding_table(self.emulator_obj.get_ip(), self.emulator_obj.get_port())
+        self.forwarding_tbl = forwarding_table
 
-            if (build_ft_wait != -1) and datetime.datetime.now() - build_ft_wait > build_ft_timeout:
-                build_ft_wait = -1
-                self.buildforwardingtable()
 
-    def decrement_ttl(self, packet):
-        packet, header, data = self.emulator_obj.deassemblepacket(packet)
+    def __incrementalforwardingtable(self):
+        root = (self.emulator_obj.get_ip(), self.emulator_obj.get_port())
 
-        type = header[0]
-        id = int(header[1])
-        seq_no = int(header[2])
-        ttl = int(header[3] - 1)
-        src_ip = int(ipaddress.IPv4Address(header[4][0]))
-        src_port = int(header[4][1])
-        dest_ip = int(ipaddress.IPv4Address(header[5][0]))
-        dest_port = int(header[5][1])
-
-        new_pkt = struct.pack("!cIIIIIII", 
-                             type.encode(), 
-                             id, 
-                             seq_no, 
-                             ttl, 
-                             src_ip, 
-                             src_port,
-                             dest_ip, 
-                             dest_port)
-        
-        new_data = packet[29:]
-        new_pkt += new_data
+        # The first build seeds the shortest path tree with every known emulator's links, as the first sync of the
+        # adjacency cache reports them all changed
+        if self.spf is None:
+            self.spf = IncrementalSPF(root)
 
-        return new_pkt
-        
-    
-    def forwardpacket(self, packet):
-        no_lsp_for_id = True
-        new_lsp, new_header, new_data = self.emulator_obj.deassemblepacket(packet)
-
-        lsp_updated = False
-        key = str(new_header[4][0]) + ',' + str(new_header[4][1])
-
-        # If there is already a node from the new LSP src node then check if it's sequence number is greater than the last recieved LSP (from the new LSP src node)
-        if key in self.cur_LSP.keys():
-            cur_lsp, cur_header, cur_data = self.emulator_obj.deassemblepacket(self.cur_LSP[key])
-            if new_header[2] > cur_header[2]:
-                self.cur_LSP[key] = new_lsp
-        
-        # If no LSP exists from the new LSP src node then add it to the list of current LSPs
-        else:
-            self.cur_LSP[key] = new_lsp
+        # Only repair the parts of the tree reached through emulators whose links changed
+        for origin in self.syncadjacency():
+            self.spf.set_node_links(origin, dict(self.adjacency.get_links(*origin)))
 
-            # If no LSP existed then new node online, resend out own node's LSP
-            for node in self.emulator_obj.get_neighbors():
-                self.emulator_obj.get_sock().sendto(self.emulator_obj.assemblepacket('L', 10, [node['ip'], node['port']], -1), (node['ip'], node['port']))
+        # Create Forwarding Table w/ Destination, In SPF?, Cost and  Next Hop
+        forwarding_table = ForwardingTable(self.emulator_index)
+        for (dest_ip, dest_port), next_hops, cost in self.spf.get_multipath_routes():
+            forwarding_table.add_entry(dest_ip, dest_port, next_hops[0][0], next_hops[0][1], cost)
+            forwarding_table.update_next_hops(dest_ip, dest_port, next_hops)
+            forwarding_table.add_emulator_to_sp_tree(dest_ip, dest_port)
 
-        # Decrement TTL of LSP by 1. If TTL has reached 0 then do not forward packet.
-        new_ttl = new_header[3] - 1
-        if new_ttl == 0:
-            return
-        
-        new_lsp_pkt = self.decrement_ttl(new_lsp)
+        return forwarding_table
 
-        # Forward new LSP to all neighbors except the node LSP was received from
-        for neighbor in self.emulator_obj.get_neighbors():
-            if not (neighbor["ip"].__eq__(new_header[4][0]) and neighbor["port"] == new_header[4][1]):
-                self.emulator_obj.get_sock().sendto(new_lsp_pkt, (neighbor["ip"], neighbor["port"]))
 
-        return
-    
+    def __numpyforwardingtable(self):
+        # Same table as __fullforwardingtable, from the CSR arrays of the adjacency cache
+        self.syncadjacency()
+        forwarding_table = ForwardingTable(self.emulator_index)
+        forwarding_table.add_routes(numpy_spf.shortest_path_routes(self.adjacency, (self.emulator_obj.get_ip(), self.emulator_obj.get_port())))
+        return forwarding_table
+
+
+    def syncadjacency(self):
+        # Bring the adjacency cache up to date with the LSDB and this emulator's own links, which are not in the LSDB.
+        # Returns the emulators whose links changed since the last sync.
+        root = (self.emulator_obj.get_ip(), self.emulator_obj.get_port())
+        self.adjacency.sync()
+        self.adjacency.set_links(root, self.getoriginlinks(root))
+        return self.adjacency.get_dirty()
 
-    def buildforwardingtable(self):
+
+    def __fullforwardingtable(self):
 
         # Create Forwarding Table w/ Destination, In SPF?, Cost and  Next Hop
-        forwarding_table = ForwardingTable()
+        forwarding_table = ForwardingTable(self.emulator_index)
 
         # Create an Empty Priority Queue
         priority_queue = EmulatorPriorityQueue()
@@ -351,55 +416,48 @@ class LinkStateProtocol:
                 forwarding_table.add_emulator_to_sp_tree(entry.get_ip(), entry.get_port())
 
                 # For all of the added emulator's neighbors
-                for neighbor in self.getnodesneighbors(entry):
+                for (neighbor_ip, neighbor_port), link_cost in self.getoriginlinks((entry.get_ip(), entry.get_port())):
 
                     new_entry = False
 
                     # Calculate the cost to the neighbor [cost = weight(u,v) + table[v].cost]
-                    new_cost = 1 + entry.get_cost()
+                    new_cost = link_cost + entry.get_cost()
 
                     # If the forwarding table does not have a cost for the neighbor or the calculated cost is lower
-                    if not forwarding_table.is_emulator_in_forwarding_table(neighbor['ip'], neighbor['port']):
-                        forwarding_table.add_entry(neighbor['ip'], neighbor['port'], neighbor['ip'], neighbor['port'])
+                    if not forwarding_table.is_emulator_in_forwarding_table(neighbor_ip, neighbor_port):
+                        forwarding_table.add_entry(neighbor_ip, neighbor_port, neighbor_ip, neighbor_port)
                         new_entry = True
                     
-                    neighbor = forwarding_table.get_entry(neighbor['ip'], neighbor['port'])
+                    neighbor = forwarding_table.get_entry(neighbor_ip, neighbor_port)
                     
-                    if new_entry or (neighbor.get_cost() > new_cost):
+                    if new_entry or (neighbor.get_cost() >= new_cost):
 
-                        # Set the cost of the neighbor emulator
-                        neighbor.set_cost(new_cost)
-
-                        # Find the next-hop on the path from the starting emulator to the neighbor emulator
+                        # Find the next-hops on the path(s) from the starting emulator to the neighbor emulator
                         entry_ip, entry_port = entry.get_entry()
                         neighbor_ip, neighbor_port = neighbor.get_entry()
-                        next_ip, next_port = forwarding_table.find_next_hop(self.emulator_obj.get_ip(), self.emulator_obj.get_port(), entry_ip, entry_port, neighbor_ip, neighbor_port)
+                        next_hops = forwarding_table.find_next_hops(self.emulator_obj.get_ip(), self.emulator_obj.get_port(), entry_ip, entry_port, neighbor_ip, neighbor_port)
 
-                        # Update the neighbor emulator's next-hop
-                        forwarding_table.update_next_hop(neighbor.get_ip(), neighbor.get_port(), next_ip, next_port)
-
-                        # Insert the neighbor and it's cost into the priority queue
-                        priority_queue.insert(neighbor)
+                        # A path as cheap as the best one found so far adds its next-hops to the neighbor's (ECMP)
+                        if not new_entry and neighbor.get_cost() == new_cost:
+                            if not neighbor.get_in_spf():
+                                forwarding_table.add_next_hops(neighbor_ip, neighbor_port, next_hops)
+                            continue
 
-        # Print Forwarding Table
-        # logging.info(str(self.forwarding_tbl))
-        forwarding_table.print_forwarding_table(self.emulator_obj.get_ip(), self.emulator_obj.get_port())
-        self.forwarding_tbl = forwarding_table
+                        # Set the cost of the neighbor emulator
+                        neighbor.set_cost(new_cost)
 
+                        # Update the neighbor emulator's next-hops
+                        forwarding_table.update_next_hops(neighbor_ip, neighbor_port, next_hops)
 
-    def getnodesneighbors(self, node):
+                        # Insert the neighbor and it's cost into the priority queue
+                        priority_queue.insert(neighbor)
 
-        # If node equals starting emulator then return neighbors
-        if (node.get_ip() == self.emulator_obj.get_ip()) and (node.get_port() == self.emulator_obj.get_port()):
-            return self.emulator_obj.get_neighbors()
-        
-        # Returns a given nodes neighbors
-        neighbors = []
-        key = str(node.get_ip()) + ',' + str(node.get_port())
+        return forwarding_table
 
-        if key in self.cur_LSP.keys():
-            lsp, lsp_header, neighbors = self.emulator_obj.deassemblepacket(self.cur_LSP[key])
 
-        return neighbors
-    
+    def getoriginlinks(self, origin):
+        # Returns a given node's links as ((ip, port), cost) of the link to each neighbor
+        if origin == (self.emulator_obj.get_ip(), self.emulator_obj.get_port()):
+            return [(neighbor.address, neighbor.cost) for neighbor in self.emulator_obj.get_neighbors()]
 
+        return self.lsdb.get_links(origin)
@@ -1,7 +1,10 @@
 import unittest
 
-from link_state_routing import ForwardingTable
+from link_state_routing import ForwardingTable, LinkStateProtocol
 from emulator import EmulatorInProgress
+from neighbor_table import Neighbor
+from packet_codec import P_HEADER_LEN, P_HEADER_SRC_OFFSET, P_HEADER_TTL_OFFSET, get_ttl
+from simulated_network import SimulatedEventLoop, SimulatedNetwork
 
 
 class TestForwardingTable(unittest.TestCase):
@@ -179,5 +182,76 @@ class TestForwardingTable(unittest.TestCase):
         del self.forwarding_table
 
 
+class TestDecrementTtl(unittest.TestCase):
+
+    def test_ttl_patched_in_a_copy(self):
+        ''' Tests that a received LSP is copied out of the receive buffer with only its TTL decremented. '''
+        emulator = EmulatorInProgress(True, '1.0.0.0', 1, [Neighbor('2.0.0.0', 2)], emulator_id=1)
+        lsp = LinkStateProtocol(emulator, print_tables=False)
+        received = bytearray(emulator.assemblelsp(10, ['0.0.0.0', 0])[0])
+        packet = bytes(received)
+
+        new_pkt = lsp.decrement_ttl(memoryview(received))
+        received[:] = bytes(len(received))
+
+        self.assertEqual(get_ttl(new_pkt), 9)
+        ttl, after_ttl = P_HEADER_TTL_OFFSET, P_HEADER_SRC_OFFSET
+        self.assertEqual(new_pkt[:ttl] + new_pkt[after_ttl:], packet[:ttl] + packet[after_ttl:])
+        self.assertEqual(emulator.deassemblepacket(bytes(new_pkt))[2], emulator.deassemblepacket(packet)[2])
+        self.assertGreater(len(new_pkt), P_HEADER_LEN)
+
+
+class TestLspAck(unittest.TestCase):
+
+    def test_lsp_ack_fast_path(self):
+        ''' Tests that an LSP acknowledgement is read straight from the packet bytes and a hello acknowledgement is not taken for one. '''
+        emulator = EmulatorInProgress(True, '1.0.0.0', 1, [Neighbor('2.0.0.0', 2)], emulator_id=1)
+        lsp_ack = emulator.assemblelspack(('2.0.0.0', 2), ('3.0.0.0', 3), 7, 1)
+
+        self.assertEqual(emulator.deassemblelspack(lsp_ack), (7, ('3.0.0.0', 3), 1))
+        self.assertEqual(emulator.deassemblepacket(lsp_ack)[2], (('3.0.0.0', 3), 1))
+        self.assertIsNone(emulator.deassemblelspack(emulator.assemblehelloack(('2.0.0.0', 2), 1.5)))
+        self.assertIsNone(emulator.deassemblelspack(emulator.assemblelsp(10, ['0.0.0.0', 0])[0]))
+
+
+class TestLspPayloadVersion(unittest.TestCase):
+
+    def test_newer_version_keeps_links(self):
+        ''' Tests that an LSP in a newer payload version leaves the links its origin advertised before in place. '''
+        lsp = LinkStateProtocol(EmulatorInProgress(True, '1.0.0.0', 1, [Neighbor('2.0.0.0', 2)], emulator_id=1), print_tables=False)
+        lsp.event_loop = SimulatedEventLoop()
+        origin = EmulatorInProgress(True, '2.0.0.0', 2, [Neighbor('1.0.0.0', 1), Neighbor('3.0.0.0', 3)], emulator_id=2)
+        origin.set_seq_no(1)
+        lsp.forwardpacket(origin.assemblelsp(1, ['1.0.0.0', 1])[0])
+        links = lsp.lsdb.get_links(('2.0.0.0', 2))
+        self.assertEqual(len(links), 2)
+
+        newer = bytearray(origin.assemblelsp(1, ['1.0.0.0', 1])[0])
+        newer[P_HEADER_LEN + 1] = 2
+        with self.assertLogs(level='WARNING'):
+            lsp.forwardpacket(bytes(newer))
+        self.assertEqual(lsp.lsdb.get_links(('2.0.0.0', 2)), links)
+
+
+class TestLspTriggersSpf(unittest.TestCase):
+
+    def test_only_lsdb_changes_trigger_spf(self):
+        ''' Tests that duplicate LSPs and refreshes advertising the same links do not ask for an SPF run. '''
+        emulator = EmulatorInProgress(True, '1.0.0.0', 1, [Neighbor('2.0.0.0', 2)], emulator_id=1)
+        lsp = LinkStateProtocol(emulator, print_tables=False)
+        lsp.event_loop = SimulatedEventLoop()
+        lsp.spf_throttle.start(lsp.event_loop)
+        emulator.set_transport(SimulatedNetwork(lsp.event_loop).add_transport('1.0.0.0', 1))
+        origin = EmulatorInProgress(True, '2.0.0.0', 2, [Neighbor('1.0.0.0', 1)], emulator_id=2)
+        origin.set_seq_no(1)
+        packet = origin.assemblelsp(1, ['1.0.0.0', 1])[0]
+
+        lsp.handlepacket(packet, ('2.0.0.0', 2))
+        lsp.handlepacket(packet, ('2.0.0.0', 2))
+        origin.set_seq_no(2)
+        lsp.handlepacket(origin.assemblelsp(1, ['1.0.0.0', 1])[0], ('2.0.0.0', 2))
+        self.assertEqual(lsp.spf_throttle.get_stats(), {'triggered': 1, 'suppressed': 0})
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
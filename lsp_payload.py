@@ -0,0 +1,160 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import logging
+import struct
+
+from packet_codec import int_to_ip, ip_to_int, seq_newer
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# LSP Payload Layout
+# - magic    (1 byte, never an ASCII character so the old text payload is told apart)
+# - version  (1 byte)
+# - TLVs     (1 byte type, 2 byte length, <length> byte value) - unknown types are skipped
+PAYLOAD_MAGIC = 0xA5
+PAYLOAD_VERSION = 1
+PAYLOAD_PREAMBLE = struct.Struct("!BB")
+TLV_HEADER = struct.Struct("!BH")
+
+# TLV Type Enums
+TLV_NEIGHBORS = 1 # Note: value is a run of NEIGHBOR_RECORD, one per adjacency
+TLV_FRAGMENT = 2 # Note: value is FRAGMENT_RECORD, always the first TLV of a fragmented LSP
+
+NEIGHBOR_RECORD = struct.Struct("!IHI") # Note: packed IPv4 address, port, link cost
+FRAGMENT_RECORD = struct.Struct("!HH") # Note: fragment #, total # of fragments of the LSP
+DEFAULT_LINK_COST = 1
+
+# Payload bytes taken up by everything but the neighbor records of one fragment
+FRAGMENT_OVERHEAD = PAYLOAD_PREAMBLE.size + TLV_HEADER.size + FRAGMENT_RECORD.size + TLV_HEADER.size
+FRAGMENT_RECORD_OFFSET = PAYLOAD_PREAMBLE.size + TLV_HEADER.size # Note: where the fragment # of a fragmented LSP is, its TLV is always first
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+def encode_lsp_payload(neighbors):
+    # neighbors: iterable of (ip, port, cost) - returns the versioned binary payload
+    records = b''.join(NEIGHBOR_RECORD.pack(ip_to_int(ip), port, cost) for ip, port, cost in neighbors)
+    return PAYLOAD_PREAMBLE.pack(PAYLOAD_MAGIC, PAYLOAD_VERSION) + TLV_HEADER.pack(TLV_NEIGHBORS, len(records)) + records
+
+
+def encode_lsp_fragments(neighbors, max_payload_size):
+    # Split the neighbor list over as many payloads of at most max_payload_size bytes as needed
+    neighbors = list(neighbors)
+    per_fragment = (max_payload_size - FRAGMENT_OVERHEAD) // NEIGHBOR_RECORD.size
+    if per_fragment < 1:
+        raise ValueError("Datagram size {} too small to carry an LSP neighbor".format(max_payload_size))
+
+    # An LSP that fits in a single datagram is sent unfragmented
+    if len(neighbors) <= per_fragment:
+        return [encode_lsp_payload(neighbors)]
+
+    nr_fragments = (len(neighbors) + per_fragment - 1) // per_fragment
+    fragments = []
+    for fragment_no in range(nr_fragments):
+        payload = encode_lsp_payload(neighbors[fragment_no * per_fragment:(fragment_no + 1) * per_fragment])
+        fragment_tlv = TLV_HEADER.pack(TLV_FRAGMENT, FRAGMENT_RECORD.size) + FRAGMENT_RECORD.pack(fragment_no, nr_fragments)
+        fragments.append(payload[:PAYLOAD_PREAMBLE.size] + fragment_tlv + payload[PAYLOAD_PREAMBLE.size:])
+
+    return fragments
+
+
+def decode_lsp_payload(payload):
+    # Returns the advertised neighbors as a list of (ip, port, cost), accepting both the binary and the old text payload.
+    # None for a payload of a newer, unsupported version.
+    fragment = decode_lsp_fragment(payload)
+    return fragment[0] if fragment is not None else None
+
+
+def decode_lsp_fragment(payload):
+    # Returns (neighbors, fragment #, # of fragments) - an unfragmented LSP is fragment 0 of 1. None for a payload of a
+    # newer, unsupported version: its neighbors are unknown, not empty.
+    payload = memoryview(payload)
+
+    if len(payload) < PAYLOAD_PREAMBLE.size or payload[0] != PAYLOAD_MAGIC:
+        return decode_text_lsp_payload(payload), 0, 1
+
+    _, version = PAYLOAD_PREAMBLE.unpack_from(payload)
+    if version > PAYLOAD_VERSION:
+        logging.warning("Received LSP payload with unsupported version {}.".format(version))
+        return None
+
+    neighbors = []
+    fragment_no, nr_fragments = 0, 1
+    offset = PAYLOAD_PREAMBLE.size
+    while offset + TLV_HEADER.size <= len(payload):
+        tlv_type, length = TLV_HEADER.unpack_from(payload, offset)
+        offset += TLV_HEADER.size
+        value = payload[offset:offset + length]
+        offset += length
+
+        if tlv_type == TLV_NEIGHBORS:
+            # Whole records only - a truncated trailing record is dropped rather than misread
+            value = value[:len(value) - len(value) % NEIGHBOR_RECORD.size]
+            for packed_ip, port, cost in NEIGHBOR_RECORD.iter_unpack(value):
+                neighbors.append((int_to_ip(packed_ip), port, cost))
+
+        elif tlv_type == TLV_FRAGMENT and length == FRAGMENT_RECORD.size:
+            fragment_no, nr_fragments = FRAGMENT_RECORD.unpack_from(value)
+
+    return neighbors, fragment_no, nr_fragments
+
+
+def peek_fragment_no(packet, offset=0):
+    # Fragment # of the LSP payload at offset without decoding it - 0 for an unfragmented or old text payload
+    if (len(packet) >= offset + FRAGMENT_RECORD_OFFSET + FRAGMENT_RECORD.size and packet[offset] == PAYLOAD_MAGIC
+            and packet[offset + PAYLOAD_PREAMBLE.size] == TLV_FRAGMENT):
+        return FRAGMENT_RECORD.unpack_from(packet, offset + FRAGMENT_RECORD_OFFSET)[0]
+    return 0
+
+
+def decode_text_lsp_payload(payload):
+    # Old payload - space separated "ip,port" entries, every link costs DEFAULT_LINK_COST
+    neighbors = []
+    for entry in bytes(payload).decode().split():
+        entry = entry.split(',')
+        neighbors.append((entry[0], int(entry[1]), DEFAULT_LINK_COST))
+
+    return neighbors
+
+
+class LspReassembly:
+    # Collects the fragments of each origin's newest LSP until all of them have arrived
+
+    def __init__(self):
+        self.partial = {}        # origin -> [seq #, # of fragments, {fragment #: neighbors}]
+        self.last_complete = {}  # origin -> seq # of the newest fully reassembled LSP
+
+    def __len__(self):
+        return len(self.partial)
+
+    def add_fragment(self, origin, seq_no, fragment_no, nr_fragments, neighbors):
+        # Returns the complete neighbor list once every fragment of (origin, seq #) is in, otherwise None
+        if nr_fragments == 1:
+            return neighbors
+        last_complete = self.last_complete.get(origin)
+        if fragment_no >= nr_fragments or (last_complete is not None and not seq_newer(seq_no, last_complete)):
+            return None
+
+        entry = self.partial.get(origin)
+        if entry is None or seq_newer(seq_no, entry[0]):
+            # Fragments of a newer LSP replace any half-collected older one
+            entry = self.partial[origin] = [seq_no, nr_fragments, {}]
+        elif entry[0] != seq_no or entry[1] != nr_fragments:
+            return None
+
+        entry[2][fragment_no] = neighbors
+        if len(entry[2]) < nr_fragments:
+            return None
+
+        del self.partial[origin]
+        self.last_complete[origin] = seq_no
+        return [neighbor for fragment_no in range(nr_fragments) for neighbor in entry[2].get(fragment_no, ())]
+
+    def discard(self, origin):
+        self.partial.pop(origin, None)
+        self.last_complete.pop(origin, None)
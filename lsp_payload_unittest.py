@@ -0,0 +1,112 @@
+import unittest
+
+from lsp_payload import (TLV_HEADER, TLV_NEIGHBORS, LspReassembly, decode_lsp_fragment, decode_lsp_payload, encode_lsp_fragments, encode_lsp_payload,
+                         peek_fragment_no)
+
+
+class TestLspPayload(unittest.TestCase):
+
+    def setUp(self):
+        self.neighbors = [('127.0.0.1', 2052, 1), ('10.1.2.3', 65535, 7)]
+
+    def test_binary_round_trip(self):
+        ''' Tests that the binary payload carries address, port and cost of every neighbor in 10 bytes each. '''
+        payload = encode_lsp_payload(self.neighbors)
+        self.assertEqual(len(payload), 2 + 3 + 10 * len(self.neighbors))
+        self.assertEqual(decode_lsp_payload(payload), self.neighbors)
+        self.assertEqual(decode_lsp_payload(encode_lsp_payload([])), [])
+
+    def test_old_text_payload(self):
+        ''' Tests that the old space separated text payload still decodes, with every link costing 1. '''
+        self.assertEqual(decode_lsp_payload(b"127.0.0.1,2052 10.1.2.3,65535 "), [('127.0.0.1', 2052, 1), ('10.1.2.3', 65535, 1)])
+        self.assertEqual(decode_lsp_payload(b""), [])
+
+    def test_unknown_tlv_and_truncated_record(self):
+        ''' Tests that unknown TLVs are skipped and a truncated trailing neighbor record is dropped. '''
+        payload = encode_lsp_payload(self.neighbors)
+        unknown_tlv = TLV_HEADER.pack(200, 3) + b'xyz'
+        self.assertEqual(decode_lsp_payload(payload[:2] + unknown_tlv + payload[2:]), self.neighbors)
+
+        truncated = payload[:2] + TLV_HEADER.pack(TLV_NEIGHBORS, 14) + payload[5:19]
+        self.assertEqual(decode_lsp_payload(truncated), self.neighbors[:1])
+
+    def test_newer_version_is_ignored(self):
+        ''' Tests that a payload from a newer, unknown version is not misread. '''
+        payload = bytearray(encode_lsp_payload(self.neighbors))
+        payload[1] = 99
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(decode_lsp_payload(bytes(payload)))
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(decode_lsp_fragment(bytes(payload)))
+
+
+
+class TestLspFragmentation(unittest.TestCase):
+
+    def setUp(self):
+        self.neighbors = [('10.0.{}.{}'.format(i // 256, i % 256), 2000 + i, 1 + i % 3) for i in range(300)]
+        self.reassembly = LspReassembly()
+
+    def test_fragments_fit_and_reassemble_out_of_order(self):
+        ''' Tests that a hub's LSP is split into payloads no larger than the limit and rebuilt in order from shuffled fragments. '''
+        fragments = encode_lsp_fragments(self.neighbors, 995)
+        self.assertGreater(len(fragments), 1)
+        self.assertTrue(all(len(fragment) <= 995 for fragment in fragments))
+
+        decoded = [decode_lsp_fragment(fragment) for fragment in fragments]
+        self.assertEqual([fragment_no for _, fragment_no, _ in decoded], list(range(len(fragments))))
+
+        result = None
+        for neighbors, fragment_no, nr_fragments in reversed(decoded):
+            self.assertIsNone(result)
+            result = self.reassembly.add_fragment(('1.0.0.0', 1), 7, fragment_no, nr_fragments, neighbors)
+        self.assertEqual(result, self.neighbors)
+        self.assertEqual(len(self.reassembly), 0)
+
+    def test_peek_fragment_no(self):
+        ''' Tests that the fragment # read from the raw payload matches the decoded one, 0 for unfragmented and text payloads. '''
+        header = bytes(29)
+        for fragment in encode_lsp_fragments(self.neighbors, 995):
+            self.assertEqual(peek_fragment_no(header + fragment, 29), decode_lsp_fragment(fragment)[1])
+        self.assertEqual(peek_fragment_no(header + encode_lsp_payload(self.neighbors[:3]), 29), 0)
+        self.assertEqual(peek_fragment_no(header + b"127.0.0.1,2052 ", 29), 0)
+
+    def test_small_lsp_is_not_fragmented(self):
+        ''' Tests that an LSP that fits in one datagram carries no fragment TLV and completes immediately. '''
+        fragments = encode_lsp_fragments(self.neighbors[:3], 995)
+        self.assertEqual(fragments, [encode_lsp_payload(self.neighbors[:3])])
+        self.assertEqual(self.reassembly.add_fragment(('1.0.0.0', 1), 1, *decode_lsp_fragment(fragments[0])[1:], self.neighbors[:3]), self.neighbors[:3])
+
+    def test_newer_sequence_number_restarts_reassembly(self):
+        ''' Tests that fragments of an older LSP are dropped once a newer LSP from the same origin starts arriving. '''
+        old_fragments = [decode_lsp_fragment(fragment) for fragment in encode_lsp_fragments(self.neighbors, 995)]
+        new_fragments = [decode_lsp_fragment(fragment) for fragment in encode_lsp_fragments(self.neighbors[:200], 995)]
+
+        neighbors, fragment_no, nr_fragments = old_fragments[0]
+        self.assertIsNone(self.reassembly.add_fragment(('1.0.0.0', 1), 1, fragment_no, nr_fragments, neighbors))
+
+        result = None
+        for neighbors, fragment_no, nr_fragments in new_fragments:
+            result = self.reassembly.add_fragment(('1.0.0.0', 1), 2, fragment_no, nr_fragments, neighbors)
+        self.assertEqual(result, self.neighbors[:200])
+
+        for neighbors, fragment_no, nr_fragments in old_fragments[1:]:
+            self.assertIsNone(self.reassembly.add_fragment(('1.0.0.0', 1), 1, fragment_no, nr_fragments, neighbors))
+        self.assertEqual(len(self.reassembly), 0)
+
+    def test_reassembly_across_sequence_wrap(self):
+        ''' Tests that an LSP whose seq # wrapped around to 0 is still newer than the last one completed. '''
+        fragments = [decode_lsp_fragment(fragment) for fragment in encode_lsp_fragments(self.neighbors, 995)]
+        for seq_no in (2 ** 32 - 1, 0):
+            result = None
+            for neighbors, fragment_no, nr_fragments in fragments:
+                result = self.reassembly.add_fragment(('1.0.0.0', 1), seq_no, fragment_no, nr_fragments, neighbors)
+            self.assertEqual(result, self.neighbors)
+
+        neighbors, fragment_no, nr_fragments = fragments[0]
+        self.assertIsNone(self.reassembly.add_fragment(('1.0.0.0', 1), 2 ** 32 - 1, fragment_no, nr_fragments, neighbors))
+        self.assertEqual(len(self.reassembly), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import heapq
+import itertools
+
+from forwarding_table import pack_address
+from lsp_payload import DEFAULT_LINK_COST
+from packet_codec import ip_to_int
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class Neighbor:
+    # One adjacency of an emulator, its fields are read and written as attributes
+
+    __slots__ = ('ip', 'port', 'address', 'packed', 'last_hello', 'heard', 'cost', 'srtt')
+
+    def __init__(self, ip, port, last_hello=None, heard=False, cost=DEFAULT_LINK_COST, srtt=None):
+        self.ip = ip
+        self.port = port
+        self.address = (ip, port)                         # (ip, port) as used by the transport and the LSDB
+        self.packed = pack_address(ip_to_int(ip), port)   # Key of the neighbor in its NeighborTable
+        self.last_hello = last_hello                      # Time of the last hello received, None if none yet
+        self.heard = heard                                # A hello was received since the neighbor came up
+        self.cost = cost                                  # Cost of the link to the neighbor
+        self.srtt = srtt                                  # Smoothed hello round trip time, measured-RTT mode only
+
+    def get_ip(self):
+        return self.ip
+
+    def get_port(self):
+        return self.port
+
+    def get_address(self):
+        return self.address
+
+    def get_packed_address(self):
+        return self.packed
+
+
+class NeighborTable:
+    # An emulator's adjacencies keyed by packed (ip, port), in the order they were added. A hello refreshes its
+    # neighbor in O(1): the expiry heap holds one (last hello, ...) entry per neighbor that is only brought up to date
+    # when it reaches the top, so finding the neighbors that timed out touches just the ones that might have.
+
+    def __init__(self, neighbors=()):
+        self.records = {}   # packed (ip, port) -> Neighbor
+        self.expiry = []    # heap of (last hello when pushed, counter, Neighbor), at most one live entry per neighbor
+        self.counter = itertools.count()
+        for neighbor in neighbors:
+            self.add(neighbor)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def __contains__(self, address):
+        return self.find(*address) is not None
+
+    def find(self, ip, port):
+        # The Neighbor at (ip, port), None if it is not a neighbor
+        return self.records.get(pack_address(ip_to_int(ip), port))
+
+    def find_by_packed_addr(self, packed_addr):
+        return self.records.get(packed_addr)
+
+    def get_addresses(self):
+        return [neighbor.address for neighbor in self.records.values()]
+
+    def add(self, neighbor):
+        # Add a Neighbor, replacing one already at its address, returns the Neighbor
+        self.records[neighbor.packed] = neighbor
+        self.__push(neighbor)
+        return neighbor
+
+    def remove(self, ip, port):
+        # Returns the Neighbor removed, None if there was none - its expiry heap entry is dropped once it surfaces
+        return self.records.pop(pack_address(ip_to_int(ip), port), None)
+
+    def hello(self, neighbor, now):
+        # A hello arrived from the neighbor - no heap work, expire() catches up with the new time lazily
+        neighbor.last_hello = now
+        neighbor.heard = True
+
+    def expire(self, now, timeout):
+        # Remove and return every neighbor not heard from for more than timeout. A neighbor never heard from has its
+        # timeout start now.
+        expired = []
+        refreshed = []
+        while self.expiry and self.expiry[0][0] + timeout < now:
+            _, _, neighbor = heapq.heappop(self.expiry)
+            if self.records.get(neighbor.packed) is not neighbor:
+                continue
+
+            if neighbor.last_hello is None:
+                neighbor.last_hello = now
+                refreshed.append(neighbor)
+            elif now - neighbor.last_hello > timeout:
+                del self.records[neighbor.packed]
+                expired.append(neighbor)
+            else:
+                refreshed.append(neighbor)
+
+        for neighbor in refreshed:
+            self.__push(neighbor)
+        return expired
+
+    def get_next_expiry(self, timeout):
+        # Earliest time a neighbor may time out, None without neighbors. Hellos received since are only seen when
+        # expire() runs, so this may be early but never late.
+        while self.expiry and self.records.get(self.expiry[0][2].packed) is not self.expiry[0][2]:
+            heapq.heappop(self.expiry)
+        if not self.expiry:
+            return None
+        return self.expiry[0][0] + timeout
+
+    def __push(self, neighbor):
+        # Neighbors not heard from yet go first, so the next expire() starts their timeout
+        last_hello = neighbor.last_hello if neighbor.last_hello is not None else float('-inf')
+        heapq.heappush(self.expiry, (last_hello, next(self.counter), neighbor))
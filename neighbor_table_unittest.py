@@ -0,0 +1,58 @@
+import unittest
+
+from neighbor_table import Neighbor, NeighborTable
+
+
+class TestNeighborTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = NeighborTable([Neighbor('10.0.0.{}'.format(i), 2000 + i) for i in range(1, 4)])
+
+    def test_lookup_by_address(self):
+        ''' Tests that neighbors are found by (ip, port) and by their packed address, in the order they were added. '''
+        neighbor = self.table.find('10.0.0.2', 2002)
+        self.assertEqual(neighbor.get_address(), ('10.0.0.2', 2002))
+        self.assertIs(self.table.find_by_packed_addr(neighbor.get_packed_address()), neighbor)
+        self.assertIsNone(self.table.find('10.0.0.2', 2003))
+        self.assertIn(('10.0.0.3', 2003), self.table)
+        self.assertEqual(self.table.get_addresses(), [('10.0.0.{}'.format(i), 2000 + i) for i in range(1, 4)])
+
+        self.assertIs(self.table.remove('10.0.0.2', 2002), neighbor)
+        self.assertIsNone(self.table.remove('10.0.0.2', 2002))
+        self.assertEqual(len(self.table), 2)
+
+    def test_expiry(self):
+        ''' Tests that neighbors never heard from get a full timeout and only neighbors silent for longer expire. '''
+        self.assertEqual(self.table.expire(0, 10), [])
+        self.assertEqual(self.table.get_next_expiry(10), 10)
+        self.assertTrue(all(neighbor.last_hello == 0 for neighbor in self.table))
+
+        self.table.hello(self.table.find('10.0.0.1', 2001), 4)
+        self.table.hello(self.table.find('10.0.0.3', 2003), 8)
+        expired = self.table.expire(11, 10)
+        self.assertEqual([neighbor.get_address() for neighbor in expired], [('10.0.0.2', 2002)])
+        self.assertEqual(self.table.get_next_expiry(10), 14)
+
+        self.table.remove('10.0.0.1', 2001)
+        self.assertEqual(self.table.get_next_expiry(10), 18)
+        self.assertEqual([neighbor.get_address() for neighbor in self.table.expire(30, 10)], [('10.0.0.3', 2003)])
+        self.assertIsNone(self.table.get_next_expiry(10))
+
+    def test_readded_neighbor_replaces_old_record(self):
+        ''' Tests that a neighbor added again at the same address is timed from its own hello, not the old record's. '''
+        self.table.expire(0, 10)
+        self.table.add(Neighbor('10.0.0.1', 2001, last_hello=9, heard=True))
+        self.assertEqual([neighbor.get_port() for neighbor in self.table.expire(15, 10)], [2002, 2003])
+        self.assertEqual(self.table.get_addresses(), [('10.0.0.1', 2001)])
+
+    def test_defaults(self):
+        ''' Tests that a new record has not been heard from and costs the default link cost. '''
+        neighbor = self.table.find('10.0.0.1', 2001)
+        self.assertEqual((neighbor.ip, neighbor.port, neighbor.last_hello, neighbor.heard), ('10.0.0.1', 2001, None, False))
+        self.assertEqual(neighbor.address, ('10.0.0.1', 2001))
+        self.assertEqual(neighbor.cost, 1)
+        self.assertIsNone(neighbor.srtt)
+
+
+if __name__ == '__main__':
+    unittest.main()
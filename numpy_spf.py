@@ -0,0 +1,153 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import heapq
+
+try:
+    import numpy
+except ImportError:  # Note: optional - only the numpy SPF backend needs it, is_available() tells whether it can be used
+    numpy = None
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+UNREACHABLE = -1 # Note: distance of the nodes not reached from the root
+MASK_BITS = 64 # Note: next-hops of a node are a bit mask over the root's links, in words of this many bits
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# Shortest path tree of one root over the CSR arrays of a CsrGraph (all_pairs_spf.py) or an AdjacencyCache
+# (adjacency_cache.py), a whole frontier at a time.
+# Python only loops once per distinct distance - the links of every node settled at that distance are relaxed by
+# NumPy in one go.
+
+def is_available():
+    return numpy is not None
+
+
+def gather_links(offsets, nodes):
+    # Index into targets / costs of every link of the given nodes, the links of each node in a run
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    run_starts = numpy.cumsum(counts) - counts
+    return numpy.repeat(starts - run_starts, counts) + numpy.arange(counts.sum())
+
+
+def bfs_distances(offsets, targets, root):
+    # Unit link costs - the distance of a node is the BFS level its frontier reaches it in
+    dist = numpy.full(len(offsets) - 1, UNREACHABLE, numpy.int64)
+    dist[root] = 0
+    frontier = numpy.array([root])
+    level = 0
+    while frontier.size:
+        level += 1
+        reached = numpy.unique(targets[gather_links(offsets, frontier)])
+        frontier = reached[dist[reached] == UNREACHABLE]
+        dist[frontier] = level
+    return dist
+
+
+def dijkstra_distances(offsets, targets, costs, root):
+    # Weighted link costs - a heap of the distinct tentative distances, each with the nodes that got it. Every node
+    # at the smallest distance is settled at once: with positive costs nothing settled later can make it cheaper.
+    nr_nodes = len(offsets) - 1
+    tentative = numpy.full(nr_nodes, numpy.iinfo(numpy.int64).max, numpy.int64)
+    settled = numpy.zeros(nr_nodes, bool)
+    tentative[root] = 0
+    buckets = {0: [numpy.array([root])]}
+    heap = [0]
+
+    while heap:
+        cost = heapq.heappop(heap)
+        nodes = numpy.unique(numpy.concatenate(buckets.pop(cost)))
+        nodes = nodes[(tentative[nodes] == cost) & ~settled[nodes]]  # Drop nodes that got cheaper since
+        if not nodes.size:
+            continue
+        settled[nodes] = True
+
+        links = gather_links(offsets, nodes)
+        reached = targets[links]
+        new_costs = cost + costs[links]
+        better = ~settled[reached] & (new_costs < tentative[reached])
+        reached, new_costs = reached[better], new_costs[better]
+        numpy.minimum.at(tentative, reached, new_costs)
+        best = new_costs == tentative[reached]
+        reached, new_costs = reached[best], new_costs[best]
+
+        # File the improved nodes under their new distance
+        order = numpy.argsort(new_costs, kind='stable')
+        reached, new_costs = reached[order], new_costs[order]
+        values, starts = numpy.unique(new_costs, return_index=True)
+        for value, group in zip(values.tolist(), numpy.split(reached, starts[1:])):
+            if value in buckets:
+                buckets[value].append(group)
+            else:
+                buckets[value] = [group]
+                heapq.heappush(heap, value)
+
+    return numpy.where(settled, tentative, UNREACHABLE)
+
+
+def next_hop_masks(offsets, targets, costs, root, dist):
+    # Next-hops of every equal-cost shortest path, as a bit mask per node over the root's links. A link u -> v on a
+    # shortest path gives v the next-hops of u (or v itself, out of the root); links are merged in order of distance,
+    # so the mask of u is complete before it is passed on.
+    nr_nodes = len(offsets) - 1
+    nr_root_links = int(offsets[root + 1] - offsets[root])
+    masks = numpy.zeros((nr_nodes, max(1, -(-nr_root_links // MASK_BITS))), numpy.uint64)
+
+    sources = numpy.repeat(numpy.arange(nr_nodes), numpy.diff(offsets))
+    tight = numpy.flatnonzero((dist[sources] != UNREACHABLE) & (dist[sources] + costs == dist[targets]))
+    from_root = sources[tight] == root
+
+    root_links = tight[from_root] - offsets[root]
+    bits = numpy.left_shift(numpy.uint64(1), (root_links % MASK_BITS).astype(numpy.uint64))
+    numpy.bitwise_or.at(masks, (targets[tight[from_root]], root_links // MASK_BITS), bits)
+
+    tight = tight[~from_root]
+    tight = tight[numpy.argsort(dist[targets[tight]], kind='stable')]
+    _, starts = numpy.unique(dist[targets[tight]], return_index=True)
+    for links in numpy.split(tight, starts[1:]):
+        numpy.bitwise_or.at(masks, targets[links], masks[sources[links]])
+    return masks
+
+
+def shortest_path_routes(graph, root_address):
+    # ((ip, port), next-hop (ip, port)s, cost) of every emulator reached from the root, the root's own route first.
+    # Next-hops come in (ip, port) order, like a ForwardingTable keeps them.
+    root = graph.get_id(*root_address)
+    offsets, targets, costs = graph.get_arrays()
+    offsets = numpy.frombuffer(offsets, numpy.int64)
+    targets = numpy.frombuffer(targets, numpy.int32).astype(numpy.int64)
+    costs = numpy.frombuffer(costs, numpy.uint32).astype(numpy.int64)
+
+    if costs.size and (costs == 1).all():
+        dist = bfs_distances(offsets, targets, root)
+    else:
+        dist = dijkstra_distances(offsets, targets, costs, root)
+    masks = next_hop_masks(offsets, targets, costs, root, dist)
+
+    # Decode each distinct set of next-hops once
+    nodes = graph.get_nodes()
+    root_neighbors = [nodes[target] for target in targets[offsets[root]:offsets[root + 1]].tolist()]
+    reached = numpy.flatnonzero(dist != UNREACHABLE)
+    reached = reached[reached != root]
+    unique_masks, inverse = numpy.unique(masks[reached], axis=0, return_inverse=True)
+    next_hop_sets = []
+    for words in unique_masks.tolist():
+        next_hops = []
+        for word_no, word in enumerate(words):
+            while word:
+                bit = (word & -word).bit_length() - 1
+                next_hops.append(root_neighbors[word_no * MASK_BITS + bit])
+                word &= word - 1
+        next_hop_sets.append(tuple(sorted(set(next_hops))))
+
+    routes = [(root_address, (root_address,), 0)]
+    routes.extend((nodes[node], next_hop_sets[index], cost)
+                  for node, index, cost in zip(reached.tolist(), inverse.reshape(-1).tolist(), dist[reached].tolist()))
+    return routes
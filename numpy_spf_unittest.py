@@ -0,0 +1,83 @@
+import random
+import unittest
+from unittest import mock
+
+import numpy_spf
+from emulator import EmulatorInProgress
+from incremental_spf_unittest import ecmp_next_hops, random_edit
+from link_state_routing import SPF_BACKEND_NUMPY, LinkStateProtocol
+from neighbor_table import Neighbor
+
+
+@unittest.skipUnless(numpy_spf.is_available(), 'numpy is not installed')
+class TestNumpySPF(unittest.TestCase):
+
+    '''
+    Runs buildforwardingtable with the python and the numpy backend side by side on the same link-state database
+    while links flap, and checks both produce the same ForwardingTable.
+    '''
+
+    def setUp(self):
+        self.nodes = [('127.0.0.{}'.format(1 + i % 3), 2000 + i) for i in range(14)]
+        self.root = self.nodes[0]
+        self.protocols = [LinkStateProtocol(EmulatorInProgress(True, self.root[0], self.root[1], []), spf_backend=spf_backend)
+                          for spf_backend in ('python', SPF_BACKEND_NUMPY)]
+
+    def install(self, links, seq_no):
+        for lsp in self.protocols:
+            lsp.emulator_obj.set_neighbors([Neighbor(ip, port, cost=cost) for (ip, port), cost in links[self.root].items()])
+            for origin in self.nodes[1:]:
+                lsp.lsdb.install(origin, seq_no, list(links[origin]), costs=list(links[origin].values()))
+            with mock.patch('sys.stdout'):
+                lsp.buildforwardingtable()
+
+    def assertTablesMatch(self, links):
+        python, numpy = ({entry.get_entry(): (entry.get_cost(), entry.get_next_hops(), entry.get_in_spf()) for entry in lsp.get_forwarding_tbl().get_values()}
+                         for lsp in self.protocols)
+        self.assertEqual(numpy, python)
+
+        expected = ecmp_next_hops(links, self.root)
+        for dest, (_, next_hops, _) in numpy.items():
+            self.assertEqual(next_hops, expected[dest])
+
+    def test_unit_costs(self):
+        ''' Tests the BFS frontier expansion used when every link costs 1. '''
+        rng = random.Random(1)
+        links = {node: {} for node in self.nodes}
+        for seq_no in range(1, 40):
+            random_edit(rng, links, self.nodes, max_cost=1)
+            self.install(links, seq_no)
+            self.assertTablesMatch(links)
+
+    def test_weighted_costs(self):
+        ''' Tests the distance-bucketed Dijkstra used with weighted links, equal-cost paths included. '''
+        rng = random.Random(2)
+        links = {node: {} for node in self.nodes}
+        for seq_no in range(1, 40):
+            random_edit(rng, links, self.nodes, max_cost=3)
+            self.install(links, seq_no)
+            self.assertTablesMatch(links)
+
+    def test_wide_root(self):
+        ''' Tests next-hop masks that take more than one word, for a root with more than 64 links. '''
+        self.nodes = [('127.0.0.1', 2000 + i) for i in range(141)]
+        far = self.nodes[-1]
+        links = {node: {} for node in self.nodes}
+        for node in self.nodes[1:-1]:
+            links[self.root][node] = links[node][self.root] = 1
+            links[node][far] = links[far][node] = 1
+        self.install(links, 1)
+        self.assertTablesMatch(links)
+        self.assertEqual(self.protocols[1].get_forwarding_tbl().get_next_hops(*far), tuple(self.nodes[1:-1]))
+
+    def test_backend_checks(self):
+        ''' Tests that unknown backends, and non-python backends in incremental mode, are refused. '''
+        emulator = EmulatorInProgress(True, '127.0.0.1', 2000, [])
+        with self.assertRaises(ValueError):
+            LinkStateProtocol(emulator, spf_backend='fortran')
+        with self.assertRaises(ValueError):
+            LinkStateProtocol(emulator, incremental_spf=True, spf_backend=SPF_BACKEND_NUMPY)
+
+
+if __name__ == '__main__':
+    unittest.main()
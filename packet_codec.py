@@ -0,0 +1,106 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import socket
+import struct
+import zlib
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# Packet Header Layout - every field is a 4 byte unsigned integer in network byte order except the 1 byte type
+# - packet_type, packet_id, packet_seq_nr, TTL, src_address_ip, src_address_port, dest_address_ip, dest_address_port
+# Addresses are packed IPv4 integers, as in the header, and only turned into dotted strings where a socket needs them.
+P_HEADER = struct.Struct("!cIIIIIII")
+P_HEADER_LEN = P_HEADER.size # Note: packet header is 29 chars
+
+# Packet Header Byte Offsets - where a single field is read or patched in place without unpacking the whole header
+P_HEADER_TYPE_OFFSET = 0
+P_HEADER_ID_OFFSET = 1
+P_HEADER_SEQ_NR_OFFSET = 5
+P_HEADER_TTL_OFFSET = 9
+P_HEADER_SRC_OFFSET = 13
+P_HEADER_DEST_OFFSET = 21
+
+# Sequence Number Enums - seq #s are compared with RFC 1982 serial number arithmetic so they can wrap around
+SEQ_NR_MODULUS = 1 << 32 # Note: the seq # field is 4 bytes
+SEQ_NR_HALF = 1 << 31 # Note: a seq # is newer than the ones up to this far behind it, modulo SEQ_NR_MODULUS
+
+U32 = struct.Struct("!I") # Note: any single 4 byte header field
+ADDRESS = struct.Struct("!II") # Note: packed IPv4 address, port - the src or dest address of the header
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# A router only ever sees a handful of distinct addresses, so both conversions are cached for the life of the process
+ip_ints = {}     # dotted string -> packed IPv4 address
+ip_strings = {}  # packed IPv4 address -> dotted string
+
+
+def ip_to_int(ip):
+    packed_ip = ip_ints.get(ip)
+    if packed_ip is None:
+        packed_ip = ip_ints[ip] = U32.unpack(socket.inet_aton(ip))[0]
+    return packed_ip
+
+
+def int_to_ip(packed_ip):
+    ip = ip_strings.get(packed_ip)
+    if ip is None:
+        ip = ip_strings[packed_ip] = socket.inet_ntoa(U32.pack(packed_ip))
+    return ip
+
+
+def pack_header(p_type, p_id, seq_no, ttl, src_ip, src_port, dest_ip, dest_port):
+    # p_type is the one byte type (b'L', b'H', ...), addresses are packed IPv4 integers
+    return P_HEADER.pack(p_type, p_id, seq_no, ttl, src_ip, src_port, dest_ip, dest_port)
+
+
+def pack_header_into(buffer, offset, p_type, p_id, seq_no, ttl, src_ip, src_port, dest_ip, dest_port):
+    P_HEADER.pack_into(buffer, offset, p_type, p_id, seq_no, ttl, src_ip, src_port, dest_ip, dest_port)
+
+
+def unpack_header(packet, offset=0):
+    # Returns (type, id, seq #, TTL, src ip, src port, dest ip, dest port) with packed addresses, no copy of packet is made
+    return P_HEADER.unpack_from(packet, offset)
+
+
+def decode_header(packet):
+    # Returns the header as [type, id, seq #, TTL, [src ip, src port], [dest ip, dest port]] with dotted string addresses
+    p_type, p_id, seq_no, ttl, src_ip, src_port, dest_ip, dest_port = P_HEADER.unpack_from(packet)
+    return [p_type.decode(), p_id, seq_no, ttl, [int_to_ip(src_ip), src_port], [int_to_ip(dest_ip), dest_port]]
+
+
+def get_ttl(packet, offset=0):
+    return U32.unpack_from(packet, offset + P_HEADER_TTL_OFFSET)[0]
+
+
+def set_ttl(buffer, ttl, offset=0):
+    # Patch the TTL of the header at offset of a writable buffer in place
+    U32.pack_into(buffer, offset + P_HEADER_TTL_OFFSET, ttl)
+
+
+def set_seq_no(buffer, seq_no, offset=0):
+    U32.pack_into(buffer, offset + P_HEADER_SEQ_NR_OFFSET, seq_no)
+
+
+def set_dest(buffer, dest_ip, dest_port, offset=0):
+    ADDRESS.pack_into(buffer, offset + P_HEADER_DEST_OFFSET, dest_ip, dest_port)
+
+
+def flow_hash(packet, seed=0, offset=0):
+    # Hash of the src and dest address of the header - the flow a packet belongs to. Routers pass their own seed, so
+    # consecutive hops do not all split flows over their equal-cost paths the same way.
+    return zlib.crc32(memoryview(packet)[offset + P_HEADER_SRC_OFFSET:offset + P_HEADER_LEN], seed)
+
+
+def seq_newer(seq_no, other):
+    # True if seq_no comes after other, also across the wrap from 2^32 - 1 to 0
+    return seq_no != other and (seq_no - other) % SEQ_NR_MODULUS < SEQ_NR_HALF
+
+
+def next_seq_no(seq_no):
+    return (seq_no + 1) % SEQ_NR_MODULUS
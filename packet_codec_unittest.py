@@ -0,0 +1,66 @@
+import struct
+import unittest
+
+from packet_codec import (P_HEADER_LEN, decode_header, flow_hash, get_ttl, int_to_ip, ip_to_int, next_seq_no, pack_header, pack_header_into, seq_newer,
+                          set_dest, set_seq_no, set_ttl, unpack_header)
+
+
+class TestPacketCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.fields = (b'L', 3, 42, 10, ip_to_int('10.1.2.3'), 2051, ip_to_int('192.168.0.1'), 65535)
+
+    def test_header_matches_old_layout(self):
+        ''' Tests that the codec packs the same 29 bytes as the format string it replaces and reads them back. '''
+        packet = pack_header(*self.fields)
+        self.assertEqual(len(packet), P_HEADER_LEN)
+        self.assertEqual(packet, struct.pack("!cIIIIIII", *self.fields))
+        self.assertEqual(unpack_header(packet + b'payload'), self.fields)
+        self.assertEqual(decode_header(packet), ['L', 3, 42, 10, ['10.1.2.3', 2051], ['192.168.0.1', 65535]])
+
+    def test_address_conversions(self):
+        ''' Tests that dotted and packed IPv4 addresses convert both ways. '''
+        self.assertEqual(ip_to_int('127.0.0.1'), 0x7f000001)
+        self.assertEqual(int_to_ip(0x7f000001), '127.0.0.1')
+        self.assertEqual(int_to_ip(ip_to_int('255.255.255.255')), '255.255.255.255')
+
+    def test_fields_patched_in_place(self):
+        ''' Tests that TTL, seq # and dest are patched in place at any header offset without touching the rest. '''
+        buffer = bytearray(2 * P_HEADER_LEN)
+        pack_header_into(buffer, P_HEADER_LEN, *self.fields)
+
+        set_ttl(buffer, 9, P_HEADER_LEN)
+        set_seq_no(buffer, 43, P_HEADER_LEN)
+        set_dest(buffer, ip_to_int('10.0.0.9'), 7, P_HEADER_LEN)
+
+        self.assertEqual(bytes(buffer[:P_HEADER_LEN]), bytes(P_HEADER_LEN))
+        self.assertEqual(get_ttl(buffer, P_HEADER_LEN), 9)
+        self.assertEqual(unpack_header(buffer, P_HEADER_LEN), (b'L', 3, 43, 9, self.fields[4], 2051, ip_to_int('10.0.0.9'), 7))
+
+    def test_flow_hash_covers_addresses_only(self):
+        ''' Tests that the flow hash depends on the src / dest address and the seed, not on TTL or seq #. '''
+        packet = bytearray(pack_header(*self.fields))
+        digest = flow_hash(packet)
+
+        set_ttl(packet, 1)
+        set_seq_no(packet, 99)
+        self.assertEqual(flow_hash(packet), digest)
+        self.assertEqual(flow_hash(b'xx' + packet, offset=2), digest)
+        self.assertNotEqual(flow_hash(packet, seed=1), digest)
+
+        set_dest(packet, ip_to_int('192.168.0.1'), 65534)
+        self.assertNotEqual(flow_hash(packet), digest)
+
+    def test_sequence_numbers_wrap(self):
+        ''' Tests that seq #s compare as serial numbers, so 0 follows 2^32 - 1 and is newer than it. '''
+        self.assertEqual(next_seq_no(2 ** 32 - 1), 0)
+        self.assertTrue(seq_newer(1, 0))
+        self.assertTrue(seq_newer(0, 2 ** 32 - 1))
+        self.assertTrue(seq_newer(5, 2 ** 32 - 5))
+        self.assertFalse(seq_newer(2 ** 32 - 1, 0))
+        self.assertFalse(seq_newer(7, 7))
+        self.assertFalse(seq_newer(2 ** 31, 0) and seq_newer(0, 2 ** 31))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import gc
+import random
+
+from event_loop import TimerHandle, TimerHeap, TimerWheel
+from transport import count_sent, transport_stats
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_LINK_LATENCY = 0.001 # Note: one-way delay (virtual seconds) of links without their own latency
+DEFAULT_LINK_LOSS = 0.0 # Note: probability a datagram is lost on links without their own loss rate
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class SimulatedEventLoop:
+    # Discrete-event drop-in for EventLoop - time only moves when the next timer is run, so nothing ever sleeps and
+    # a run is fully reproducible. Datagrams of a SimulatedNetwork are delivered as timers too.
+    #
+    # With pause_gc the cyclic garbage collector is off while the loop runs. A large simulation keeps millions of
+    # objects alive and every full collection walks all of them, while the protocol creates no reference cycles.
+
+    def __init__(self, start_time=0.0, timer_wheel=False, pause_gc=False):
+        self.now = start_time
+        self.timer_wheel = timer_wheel
+        self.pause_gc = pause_gc
+        self.timers = TimerWheel(start_time) if timer_wheel else TimerHeap()  # Pending TimerHandles
+        self.nr_events = 0
+        self.running = False
+
+    def time(self):
+        return self.now
+
+    def get_nr_events(self):
+        return self.nr_events
+
+    def add_reader(self, sock, callback):
+        # Unsupported - e.g. a UdpTransport started on this loop
+        raise TypeError("SimulatedEventLoop has no sockets; use a SimulatedNetwork transport")
+
+    def remove_reader(self, sock):
+        raise TypeError("SimulatedEventLoop has no sockets; use a SimulatedNetwork transport")
+
+    def call_at(self, deadline, callback, *args):
+        timer = TimerHandle(deadline, callback, args)
+        self.timers.push(timer)
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(self.now + delay, callback, *args)
+
+    def run_once(self, deadline=None):
+        # Jump the clock to the earliest timer and run it, returns False once there is nothing left to run
+        # (before deadline, if given)
+        timer_deadline = self.timers.next_deadline()
+        if timer_deadline is None or (deadline is not None and timer_deadline > deadline):
+            return False
+
+        # Timers scheduled in the past still run, but never move the clock backwards
+        if timer_deadline > self.now:
+            self.now = timer_deadline
+        timer = self.timers.pop_due(self.now)
+        self.nr_events += 1
+        timer.callback(*timer.args)
+        return True
+
+    def run_until(self, deadline):
+        # Run every timer due up to deadline, then leave the clock at deadline
+        self.running = True
+        gc_paused = self.__pausegc()
+        try:
+            while self.running and self.run_once(deadline):
+                pass
+        finally:
+            if gc_paused:
+                gc.enable()
+
+        if self.running and deadline > self.now:
+            self.now = deadline
+        self.running = False
+
+    def run_forever(self):
+        # Runs until stopped or out of timers - periodic hellos mean a running protocol never runs out
+        self.running = True
+        gc_paused = self.__pausegc()
+        try:
+            while self.running and self.run_once():
+                pass
+        finally:
+            if gc_paused:
+                gc.enable()
+        self.running = False
+
+    def __pausegc(self):
+        # Returns True if the garbage collector was switched off here and has to be switched back on
+        if not self.pause_gc or not gc.isenabled():
+            return False
+        gc.disable()
+        return True
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.timers = TimerWheel(self.now) if self.timer_wheel else TimerHeap()
+
+
+class SimulatedNetwork:
+    # In-memory datagram network between SimulatedTransports - each datagram is delivered by the event loop after the
+    # latency of its link, or lost with the link's loss probability
+
+    def __init__(self, event_loop, latency=DEFAULT_LINK_LATENCY, loss=DEFAULT_LINK_LOSS, seed=0):
+        self.event_loop = event_loop
+        self.latency = latency
+        self.loss = loss
+        self.random = random.Random(seed)  # Seeded so losses are the same on every run
+        self.transports = {}  # (ip, port) -> SimulatedTransport
+        self.links = {}       # ((src ip, src port), (dest ip, dest port)) -> [latency, loss]
+
+        # Traffic counters
+        self.nr_packets_sent = 0
+        self.nr_bytes_sent = 0
+        self.nr_packets_lost = 0
+
+    def get_event_loop(self):
+        return self.event_loop
+
+    def get_transport(self, ip, port):
+        return self.transports.get((ip, port))
+
+    def add_transport(self, ip, port):
+        transport = self.transports[(ip, port)] = SimulatedTransport(self, (ip, port))
+        return transport
+
+    def set_link(self, src, dest, latency=None, loss=None, bidirectional=True):
+        # Give the link between two (ip, port) addresses its own latency and / or loss, None keeps the default
+        for key in ((src, dest), (dest, src)) if bidirectional else ((src, dest),):
+            link = self.links.setdefault(key, [self.latency, self.loss])
+            if latency is not None:
+                link[0] = latency
+            if loss is not None:
+                link[1] = loss
+
+    def get_link(self, src, dest):
+        # (latency, loss) of the link from src to dest
+        link = self.links.get((src, dest))
+        return (link[0], link[1]) if link is not None else (self.latency, self.loss)
+
+    def get_stats(self):
+        return {'packets_sent': self.nr_packets_sent, 'bytes_sent': self.nr_bytes_sent, 'packets_lost': self.nr_packets_lost}
+
+    def send(self, src, packet, dest):
+        self.nr_packets_sent += 1
+        self.nr_bytes_sent += len(packet)
+
+        # Like UDP, a datagram to an address nobody listens on disappears silently
+        transport = self.transports.get(dest)
+        link = self.links.get((src, dest)) if self.links else None
+        latency, loss = (link[0], link[1]) if link is not None else (self.latency, self.loss)
+        if transport is None or (loss and self.random.random() < loss):
+            self.nr_packets_lost += 1
+            return
+
+        # Copy the datagram - the sender is free to reuse its buffer as soon as send returns
+        self.event_loop.call_later(latency, transport.deliver, bytes(packet), src)
+
+
+class SimulatedTransport:
+    # Emulator end of a SimulatedNetwork, offers the same calls as UdpTransport
+
+    def __init__(self, network, addr):
+        self.network = network
+        self.addr = addr
+        self.on_packet = None
+        self.up = True
+        self.sent = {}  # Packet type (first byte) -> [# datagrams, # bytes] sent
+        self.nr_send_calls = 0  # A batch counts as one call, like a sendmmsg system call
+
+    def is_up(self):
+        return self.up
+
+    def start(self, event_loop, on_packet):
+        self.on_packet = on_packet
+
+    def sendto(self, packet, addr):
+        if self.up:
+            count_sent(self.sent, packet)
+            self.nr_send_calls += 1
+            self.network.send(self.addr, packet, addr)
+
+    def send_batch(self, batch):
+        if self.up and batch:
+            self.nr_send_calls += 1
+            for packet, addr in batch:
+                count_sent(self.sent, packet)
+                self.network.send(self.addr, packet, addr)
+
+    def get_stats(self):
+        return transport_stats(self.sent)
+
+    def get_nr_send_calls(self):
+        return self.nr_send_calls
+
+    def deliver(self, packet, src):
+        # Datagrams still in flight when the transport went down are lost
+        if not self.up:
+            self.network.nr_packets_lost += 1
+        elif self.on_packet is not None:
+            self.on_packet(packet, src)
+
+    def close(self):
+        # A closed transport neither sends nor receives - a failed router as seen by its neighbors
+        self.up = False
+        self.on_packet = None
+        if self.network.transports.get(self.addr) is self:
+            del self.network.transports[self.addr]
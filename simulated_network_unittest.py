@@ -0,0 +1,325 @@
+import gc
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy_spf
+from emulator import readtopology
+from emulator_host import EmulatorHost
+from neighbor_table import Neighbor
+from packet_codec import ip_to_int, pack_header
+from simulated_network import SimulatedEventLoop, SimulatedNetwork
+from transport import UdpTransport
+
+
+def hop_counts(links, root):
+    ''' Breadth-first hop count from root to every reachable node over {node: [neighbors]}. '''
+    distances = {root: 0}
+    frontier = [root]
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for neighbor in links[node]:
+                if neighbor not in distances:
+                    distances[neighbor] = distances[node] + 1
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+class TestSimulatedEventLoop(unittest.TestCase):
+
+    def test_timers_advance_virtual_clock(self):
+        ''' Tests that timers run in deadline order on the virtual clock and run_until stops the clock at its deadline. '''
+        event_loop = SimulatedEventLoop()
+        fired = []
+
+        event_loop.call_later(5, lambda: fired.append(('late', event_loop.time())))
+        event_loop.call_later(1, lambda: fired.append(('early', event_loop.time())))
+        event_loop.call_later(2, fired.append, 'cancelled').cancel()
+
+        event_loop.run_until(3)
+        self.assertEqual(fired, [('early', 1)])
+        self.assertEqual(event_loop.time(), 3)
+
+        event_loop.run_until(10)
+        self.assertEqual(fired, [('early', 1), ('late', 5)])
+        self.assertEqual(event_loop.time(), 10)
+
+    def test_pause_gc(self):
+        ''' Tests that with pause_gc the garbage collector is off only while the loop runs. '''
+        event_loop = SimulatedEventLoop(pause_gc=True)
+        enabled = []
+        event_loop.call_later(1, lambda: enabled.append(gc.isenabled()))
+        event_loop.run_until(2)
+        self.assertEqual(enabled, [False])
+        self.assertTrue(gc.isenabled())
+
+        event_loop = SimulatedEventLoop()
+        event_loop.call_later(1, lambda: enabled.append(gc.isenabled()))
+        event_loop.run_until(2)
+        self.assertEqual(enabled, [False, True])
+
+    def test_sockets_unsupported(self):
+        ''' Tests that a real UDP transport cannot be started on the simulated event loop. '''
+        event_loop = SimulatedEventLoop()
+        transport = UdpTransport('127.0.0.1', 0, 1024)
+        self.addCleanup(transport.get_sock().close)
+        with self.assertRaises(TypeError):
+            transport.start(event_loop, lambda packet, addr: None)
+        with self.assertRaises(TypeError):
+            event_loop.remove_reader(transport.get_sock())
+
+
+class TestSimulatedNetwork(unittest.TestCase):
+
+    def setUp(self):
+        self.event_loop = SimulatedEventLoop()
+        self.network = SimulatedNetwork(self.event_loop, latency=0.01)
+        self.a = self.network.add_transport('1.0.0.0', 1)
+        self.b = self.network.add_transport('2.0.0.0', 2)
+        self.received = []
+        self.b.start(self.event_loop, lambda packet, src: self.received.append((packet, self.event_loop.time())))
+
+    def test_latency_per_link(self):
+        ''' Tests that datagrams arrive after the default latency, or the link's own latency once one is set. '''
+        self.a.sendto(bytearray(b'one'), ('2.0.0.0', 2))
+        self.network.set_link(('1.0.0.0', 1), ('2.0.0.0', 2), latency=0.5)
+        self.a.sendto(b'two', ('2.0.0.0', 2))
+
+        self.event_loop.run_until(1)
+        self.assertEqual(self.received, [(b'one', 0.01), (b'two', 0.5)])
+
+    def test_loss_and_closed_transports(self):
+        ''' Tests that lossy links and closed or unknown transports drop datagrams and count them as lost. '''
+        self.network.set_link(('1.0.0.0', 1), ('2.0.0.0', 2), loss=1.0)
+        self.a.sendto(b'lost', ('2.0.0.0', 2))
+        self.a.sendto(b'unknown', ('9.0.0.0', 9))
+
+        self.network.set_link(('1.0.0.0', 1), ('2.0.0.0', 2), loss=0.0)
+        self.a.sendto(b'in flight', ('2.0.0.0', 2))
+        self.b.close()
+
+        self.event_loop.run_until(1)
+        self.assertEqual(self.received, [])
+        self.assertEqual(self.network.get_stats()['packets_lost'], 3)
+
+
+class TestSimulatedConvergence(unittest.TestCase):
+
+    '''
+    Runs the link-state protocol of every emulator in the topology below on virtual time:
+
+              2 - 4
+             / \\   \\
+            1 - 3 - 5
+
+    Every forwarding table must hold the hop count to every other emulator, and once emulator 3 fails the remaining
+    emulators must route around it.
+    '''
+
+    links = {1: [2, 3], 2: [1, 3, 4], 3: [1, 2, 5], 4: [2, 5], 5: [3, 4]}
+
+    def setUp(self):
+        self.build()
+
+    def build(self, **host_args):
+        self.event_loop = SimulatedEventLoop(timer_wheel=host_args.pop('timer_wheel', False))
+        self.network = SimulatedNetwork(self.event_loop)
+        self.host = EmulatorHost(event_loop=self.event_loop, transport_factory=self.network.add_transport, print_tables=False, **host_args)
+
+        for node, neighbors in self.links.items():
+            self.host.add_emulator(node, self.address(node)[0], node,
+                                   [Neighbor(self.address(neighbor)[0], neighbor) for neighbor in neighbors])
+        self.host.start()
+
+    def address(self, node):
+        return '{}.0.0.0'.format(node), node
+
+    def assertTablesMatch(self, links):
+        for emulator in self.host.get_emulators():
+            if emulator.get_port() not in links:
+                continue
+
+            expected = hop_counts(links, emulator.get_port())
+            forwarding_tbl = emulator.lsp.get_forwarding_tbl()
+            self.assertEqual({entry.get_port(): entry.get_cost() for entry in forwarding_tbl.get_values()}, expected)
+
+            for entry in forwarding_tbl.get_values():
+                if entry.get_port() != emulator.get_port():
+                    next_port = entry.get_next_hop()[1]
+                    self.assertIn(next_port, links[emulator.get_port()])
+                    self.assertEqual(1 + hop_counts(links, next_port)[entry.get_port()], entry.get_cost())
+
+    def test_converges_and_reroutes(self):
+        ''' Tests that forwarding tables converge from startup and again after an emulator fails. '''
+        self.event_loop.run_until(10)
+        self.assertTablesMatch(self.links)
+
+        self.network.get_transport(*self.address(3)).close()
+        self.event_loop.run_until(20)
+        self.assertTablesMatch({node: [neighbor for neighbor in neighbors if neighbor != 3]
+                                for node, neighbors in self.links.items() if node != 3})
+
+    def test_hello_timers(self):
+        ''' Tests that a shorter dead interval drops a failed emulator sooner, on a timer wheel as well as a heap. '''
+        for timer_wheel in (False, True):
+            self.build(hello_timers=(0.1, 0.3), timer_wheel=timer_wheel)
+            self.event_loop.run_until(5)
+            self.assertTablesMatch(self.links)
+
+            self.network.get_transport(*self.address(3)).close()
+            self.event_loop.run_until(6)
+            self.assertTablesMatch({node: [neighbor for neighbor in neighbors if neighbor != 3]
+                                    for node, neighbors in self.links.items() if node != 3})
+
+        with self.assertRaises(ValueError):
+            self.build(hello_timers=(2, 1))
+
+    @unittest.skipUnless(numpy_spf.is_available(), 'numpy is not installed')
+    def test_numpy_spf_backend(self):
+        ''' Tests that forwarding tables rebuilt by the numpy backend converge and reroute like the python ones. '''
+        self.build(spf_backend='numpy')
+        self.test_converges_and_reroutes()
+
+
+class TestWeightedLinks(unittest.TestCase):
+
+    '''
+    Routes around the expensive direct link of the triangle below, first with the costs of the topology and then with
+    costs measured from the hello round trip time:
+
+            2
+           / \\
+          1 - 3   (link 1 - 3 costs 5, or has 50 times the latency of the others)
+    '''
+
+    links = {1: [2, 3], 2: [1, 3], 3: [1, 2]}
+
+    def build(self, costs, incremental_spf=False, rtt_costs=False, latencies={}):
+        self.event_loop = SimulatedEventLoop()
+        self.network = SimulatedNetwork(self.event_loop)
+        self.host = EmulatorHost(incremental_spf, event_loop=self.event_loop, transport_factory=self.network.add_transport,
+                                 print_tables=False, rtt_costs=rtt_costs)
+
+        for node in self.links:
+            self.add_emulator(node, costs)
+        for (src, dest), latency in latencies.items():
+            self.network.set_link(self.address(src), self.address(dest), latency=latency)
+        self.host.start()
+
+    def add_emulator(self, node, costs):
+        return self.host.add_emulator(node, self.address(node)[0], node,
+                                      [Neighbor(self.address(neighbor)[0], neighbor, cost=costs.get(frozenset((node, neighbor)), 1))
+                                       for neighbor in self.links[node]])
+
+    def address(self, node):
+        return '{}.0.0.0'.format(node), node
+
+    def assertRoute(self, src, dest, next_port, cost):
+        entry = self.host.get_emulators()[src - 1].lsp.get_forwarding_tbl().get_entry(*self.address(dest))
+        self.assertEqual(entry.get_next_hop()[1], next_port)
+        self.assertEqual(entry.get_cost(), cost)
+
+    def test_configured_costs(self):
+        ''' Tests that full and incremental SPF take the cheaper two hop path over the expensive direct link. '''
+        for incremental_spf in (False, True):
+            self.build({frozenset((1, 3)): 5}, incremental_spf)
+            self.event_loop.run_until(10)
+            self.assertRoute(1, 3, 2, 2)
+            self.assertRoute(3, 1, 2, 2)
+            self.assertRoute(1, 2, 2, 1)
+
+    def test_costs_kept_across_restart(self):
+        ''' Tests that a neighbor coming back after it timed out gets the configured cost of the link to it again. '''
+        costs = {frozenset((1, 3)): 5}
+        self.build(costs)
+        self.event_loop.run_until(10)
+        self.assertRoute(1, 3, 2, 2)
+
+        self.network.get_transport(*self.address(3)).close()
+        self.event_loop.run_until(20)
+        self.assertNotIn(self.address(3), self.host.get_emulators()[0].get_neighbors())
+
+        self.add_emulator(3, costs).lsp.createroutes(self.event_loop)
+        self.event_loop.run_until(30)
+        link_costs = {neighbor.port: neighbor.cost for neighbor in self.host.get_emulators()[0].get_neighbors()}
+        self.assertEqual(link_costs, {2: 1, 3: 5})
+        self.assertRoute(1, 3, 2, 2)
+        self.assertRoute(1, 2, 2, 1)
+
+    def test_topology_file_costs(self):
+        ''' Tests that a neighbor's optional third field is the cost of the link to it. '''
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as topology:
+            topology.write("1.0.0.0,1 2.0.0.0,2 3.0.0.0,3,5\n")
+        self.addCleanup(os.remove, topology.name)
+
+        ip, port, neighbors = readtopology(topology.name)[0]
+        self.assertEqual([(neighbor.port, neighbor.cost) for neighbor in neighbors], [(2, 1), (3, 5)])
+
+    def test_measured_rtt_costs(self):
+        ''' Tests that in measured-RTT mode the high latency link gets a high cost and traffic avoids it. '''
+        self.build({}, rtt_costs=True, latencies={(1, 3): 0.05})
+        self.event_loop.run_until(30)
+
+        costs = {neighbor.port: neighbor.cost for neighbor in self.host.get_emulators()[0].get_neighbors()}
+        self.assertEqual(costs, {2: 2, 3: 100})
+        self.assertRoute(1, 3, 2, 4)
+        self.assertRoute(3, 1, 2, 4)
+
+
+class TestEqualCostMultipath(unittest.TestCase):
+
+    '''
+    Both paths from 1 to 4 in the diamond below cost the same:
+
+            2
+           / \\
+          1   4
+           \\ /
+            3
+    '''
+
+    links = {1: [2, 3], 2: [1, 4], 3: [1, 4], 4: [2, 3]}
+
+    def build(self, incremental_spf):
+        self.event_loop = SimulatedEventLoop()
+        self.network = SimulatedNetwork(self.event_loop)
+        self.host = EmulatorHost(incremental_spf, event_loop=self.event_loop, transport_factory=self.network.add_transport, print_tables=False)
+
+        for node, neighbors in self.links.items():
+            self.host.add_emulator(node, self.address(node)[0], node,
+                                   [Neighbor(self.address(neighbor)[0], neighbor) for neighbor in neighbors])
+        self.host.start()
+        self.event_loop.run_until(10)
+
+    def address(self, node):
+        return '{}.0.0.0'.format(node), node
+
+    def test_both_paths_kept(self):
+        ''' Tests that full and incremental SPF keep both next hops towards the far corner of the diamond. '''
+        for incremental_spf in (False, True):
+            self.build(incremental_spf)
+            forwarding_tbl = self.host.get_emulators()[0].lsp.get_forwarding_tbl()
+            self.assertEqual(forwarding_tbl.get_next_hops(*self.address(4)), (self.address(2), self.address(3)))
+            self.assertEqual(forwarding_tbl.get_next_hops(*self.address(2)), (self.address(2),))
+
+    def test_flows_spread_over_paths(self):
+        ''' Tests that trace packets of different flows use both paths and each flow always takes the same one. '''
+        self.build(False)
+        emulator = self.host.get_emulators()[0]
+
+        def next_hop(tracer_port):
+            trace_pkt = pack_header(b'T', 0, 0, 5, ip_to_int('9.0.0.0'), tracer_port, ip_to_int('4.0.0.0'), 4)
+            with mock.patch.object(emulator.get_transport(), 'sendto') as sendto:
+                emulator.forwardtracepacket(trace_pkt)
+            return sendto.call_args_list[-1][0][1]
+
+        flows = {tracer_port: next_hop(tracer_port) for tracer_port in range(1000, 1032)}
+        self.assertEqual(set(flows.values()), {self.address(2), self.address(3)})
+        self.assertEqual({tracer_port: next_hop(tracer_port) for tracer_port in flows}, flows)
+
+
+if __name__ == '__main__':
+    unittest.main()
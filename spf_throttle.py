@@ -0,0 +1,72 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# SPF Timer Enums (seconds)
+SPF_INITIAL_DELAY = 0.05 # Note: wait before the first SPF run after the topology has been quiet, lets the rest of an LSP burst arrive
+SPF_HOLD_TIME = 0.2 # Note: wait before the second SPF run of a burst, doubled for every further run
+SPF_MAX_WAIT = 3 # Note: the longest wait between two SPF runs, the topology is quiet again after 2 * SPF_MAX_WAIT without changes
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class SpfThrottle:
+    # Schedules SPF runs with exponential backoff like the spf-throttle timers of production IGPs.
+    # The first topology change after a quiet period runs SPF after initial_delay, the next after hold_time and every
+    # further one waits twice as long as the last, up to max_wait. Changes while a run is pending are folded into it.
+
+    def __init__(self, run_spf, initial_delay=SPF_INITIAL_DELAY, hold_time=SPF_HOLD_TIME, max_wait=SPF_MAX_WAIT):
+        if not 0 <= initial_delay <= max_wait or not 0 < hold_time <= max_wait:
+            raise ValueError("SPF timers need 0 <= initial delay <= max wait and 0 < hold time <= max wait, got {}, {}, {}"
+                             .format(initial_delay, hold_time, max_wait))
+
+        self.run_spf = run_spf
+        self.initial_delay = initial_delay
+        self.hold_time = hold_time
+        self.max_wait = max_wait
+        self.event_loop = None
+        self.timer = None
+        self.wait = hold_time  # Wait before the next SPF run unless the topology has been quiet
+        self.last_trigger = None
+        self.nr_triggered = 0  # Topology changes that asked for an SPF run
+        self.nr_suppressed = 0  # ... of which were folded into an SPF run already pending
+
+    def start(self, event_loop):
+        self.event_loop = event_loop
+
+    def cancel(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def is_pending(self):
+        return self.timer is not None
+
+    def get_timers(self):
+        return self.initial_delay, self.hold_time, self.max_wait
+
+    def get_stats(self):
+        return {'triggered': self.nr_triggered, 'suppressed': self.nr_suppressed}
+
+    def trigger(self):
+        # The topology changed - schedule an SPF run unless one is already pending
+        now = self.event_loop.time()
+        quiet = self.last_trigger is None or now - self.last_trigger >= 2 * self.max_wait
+        self.last_trigger = now
+        self.nr_triggered += 1
+
+        if self.timer is not None:
+            self.nr_suppressed += 1
+            return
+
+        if quiet:
+            delay, self.wait = self.initial_delay, self.hold_time
+        else:
+            delay, self.wait = self.wait, min(2 * self.wait, self.max_wait)
+
+        self.timer = self.event_loop.call_later(delay, self.__run)
+
+    def __run(self):
+        self.timer = None
+        self.run_spf()
@@ -0,0 +1,74 @@
+import unittest
+
+from simulated_network import SimulatedEventLoop
+from spf_throttle import SpfThrottle
+
+
+class TestSpfThrottle(unittest.TestCase):
+
+    def setUp(self):
+        self.event_loop = SimulatedEventLoop()
+        self.runs = []
+        self.throttle = SpfThrottle(lambda: self.runs.append(self.event_loop.time()), 0.05, 0.2, 1)
+        self.throttle.start(self.event_loop)
+
+    def trigger_at(self, times):
+        for time in times:
+            self.event_loop.call_at(time, self.throttle.trigger)
+
+    def test_first_change_waits_initial_delay(self):
+        ''' Tests that a single change after a quiet period runs SPF once, initial delay later. '''
+        self.trigger_at([10])
+        self.event_loop.run_until(20)
+
+        self.assertEqual(self.runs, [10.05])
+        self.assertEqual(self.throttle.get_stats(), {'triggered': 1, 'suppressed': 0})
+
+    def test_changes_while_pending_are_suppressed(self):
+        ''' Tests that changes arriving before the pending SPF run are folded into it. '''
+        self.trigger_at([1, 1.01, 1.02, 1.03])
+        self.event_loop.run_until(5)
+
+        self.assertEqual(self.runs, [1.05])
+        self.assertEqual(self.throttle.get_stats(), {'triggered': 4, 'suppressed': 3})
+
+    def test_storm_backs_off_exponentially_up_to_max_wait(self):
+        ''' Tests that a steady stream of changes waits initial, hold, 2 * hold, ... and then max wait between runs. '''
+        self.trigger_at([i * 0.01 for i in range(1, 501)])
+        self.event_loop.run_until(10)
+
+        # The next change arrives up to 0.01 after each run and the wait starts from it
+        waits = [b - a for a, b in zip(self.runs, self.runs[1:])]
+        expected = [0.2, 0.4, 0.8] + [1] * (len(waits) - 3)
+        self.assertAlmostEqual(self.runs[0], 0.06)
+        for wait, expected_wait in zip(waits, expected):
+            self.assertTrue(expected_wait <= wait + 1e-9 <= expected_wait + 0.01 + 2e-9, (waits, expected))
+        self.assertEqual(self.throttle.get_stats()['triggered'], 500)
+        self.assertEqual(self.throttle.get_stats()['suppressed'], 500 - len(self.runs))
+
+    def test_backoff_resets_after_quiet_period(self):
+        ''' Tests that the wait returns to the initial delay once no change arrived for twice the max wait. '''
+        self.trigger_at([1, 1.1, 1.35, 3, 10])
+        self.event_loop.run_until(20)
+
+        self.assertEqual([round(run, 6) for run in self.runs], [1.05, 1.3, 1.75, 3.8, 10.05])
+
+    def test_cancel_drops_pending_run(self):
+        ''' Tests that cancelling the throttle drops the SPF run it scheduled. '''
+        self.trigger_at([1])
+        self.event_loop.call_at(1.01, self.throttle.cancel)
+        self.event_loop.run_until(5)
+
+        self.assertEqual(self.runs, [])
+        self.assertFalse(self.throttle.is_pending())
+
+    def test_invalid_timers_rejected(self):
+        ''' Tests that timers with a hold time or initial delay above the max wait are rejected. '''
+        with self.assertRaises(ValueError):
+            SpfThrottle(lambda: None, 0.05, 2, 1)
+        with self.assertRaises(ValueError):
+            SpfThrottle(lambda: None, 2, 0.2, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
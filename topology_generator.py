@@ -0,0 +1,176 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import argparse
+import math
+import random
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_IP = '127.0.0.1'
+DEFAULT_BASE_PORT = 2051 # Note: router n listens on DEFAULT_BASE_PORT + n, like the routers of topology.txt
+TOPOLOGY_KINDS = ['ring', 'grid', 'fat-tree', 'erdos-renyi', 'scale-free']
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+# Every generator returns the topology as {router #: sorted list of neighboring router #s}, routers numbered from 0
+
+def add_link(links, u, v):
+    if u != v and v not in links[u]:
+        links[u].append(v)
+        links[v].append(u)
+
+
+def finish(links):
+    for neighbors in links.values():
+        neighbors.sort()
+    return links
+
+
+def ring(nr_routers):
+    links = {router: [] for router in range(nr_routers)}
+    for router in range(nr_routers):
+        add_link(links, router, (router + 1) % nr_routers)
+    return finish(links)
+
+
+def grid(nr_rows, nr_columns, nr_routers=None):
+    # Routers fill the grid row by row - with nr_routers the last row is only filled up to it
+    if nr_routers is None:
+        nr_routers = nr_rows * nr_columns
+    links = {router: [] for router in range(nr_routers)}
+    for router in range(nr_routers):
+        if (router + 1) % nr_columns and router + 1 < nr_routers:
+            add_link(links, router, router + 1)
+        if router + nr_columns < nr_routers:
+            add_link(links, router, router + nr_columns)
+    return finish(links)
+
+
+def fat_tree(k):
+    # Switches of a k-ary fat-tree (hosts left out): (k/2)^2 core switches, then k pods of k/2 aggregation and
+    # k/2 edge switches. Every edge switch links to every aggregation switch of its pod, aggregation switch j of a
+    # pod links to core switches j*k/2 .. (j+1)*k/2 - 1.
+    if k < 2 or k % 2:
+        raise ValueError("A fat-tree needs an even k >= 2, got {}".format(k))
+
+    half = k // 2
+    nr_core = half * half
+    links = {router: [] for router in range(nr_core + k * k)}
+    for pod in range(k):
+        aggregation = [nr_core + pod * k + j for j in range(half)]
+        edge = [nr_core + pod * k + half + j for j in range(half)]
+        for j, agg_switch in enumerate(aggregation):
+            for edge_switch in edge:
+                add_link(links, agg_switch, edge_switch)
+            for core_switch in range(j * half, (j + 1) * half):
+                add_link(links, agg_switch, core_switch)
+    return finish(links)
+
+
+def connect_components(links, rng):
+    # Link every component to a random router of the component holding router 0, so the network is connected
+    seen = set()
+    components = []
+    for start in links:
+        if start in seen:
+            continue
+        component = [start]
+        seen.add(start)
+        for router in component:
+            for neighbor in links[router]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    component.append(neighbor)
+        components.append(component)
+
+    for component in components[1:]:
+        add_link(links, rng.choice(components[0]), rng.choice(component))
+        components[0].extend(component)
+
+
+def erdos_renyi(nr_routers, link_probability, seed=0):
+    # G(n, p) random graph, made connected
+    rng = random.Random(seed)
+    links = {router: [] for router in range(nr_routers)}
+    for u in range(nr_routers):
+        for v in range(u + 1, nr_routers):
+            if rng.random() < link_probability:
+                add_link(links, u, v)
+
+    connect_components(links, rng)
+    return finish(links)
+
+
+def scale_free(nr_routers, nr_links_per_router=2, seed=0):
+    # Barabasi-Albert preferential attachment - each new router links to nr_links_per_router existing routers
+    # picked with probability proportional to their degree, starting from a fully meshed core
+    rng = random.Random(seed)
+    core = min(nr_routers, nr_links_per_router + 1)
+    links = {router: [] for router in range(nr_routers)}
+    endpoints = []  # Every link end seen so far - a uniform pick from it is a degree-weighted pick of a router
+
+    for u in range(core):
+        for v in range(u + 1, core):
+            add_link(links, u, v)
+            endpoints.extend((u, v))
+
+    for router in range(core, nr_routers):
+        targets = set()
+        while len(targets) < nr_links_per_router:
+            targets.add(rng.choice(endpoints))
+        for target in sorted(targets):
+            add_link(links, router, target)
+            endpoints.extend((router, target))
+
+    return finish(links)
+
+
+def router_address(router, ip=DEFAULT_IP, base_port=DEFAULT_BASE_PORT):
+    return ip, base_port + router
+
+
+def write_topology(filename, links, ip=DEFAULT_IP, base_port=DEFAULT_BASE_PORT):
+    # Write the topology in the topology.txt format - one line per router: its ip,port then each neighbor's ip,port
+    with open(filename, 'w') as file:
+        for router in sorted(links):
+            addresses = [router_address(router, ip, base_port)] + [router_address(neighbor, ip, base_port) for neighbor in links[router]]
+            file.write(' '.join('{},{}'.format(*address) for address in addresses) + '\n')
+
+
+def generate(kind, size, seed=0, link_probability=None):
+    # Topology of the given kind sized by a single number - # of routers, or k for a fat-tree
+    if kind == 'ring':
+        return ring(size)
+    if kind == 'grid':
+        # As square as it gets: ceil(sqrt(size)) columns, a partial last row when size is not a multiple of them
+        nr_columns = math.isqrt(size - 1) + 1 if size > 1 else 1
+        return grid(-(-size // nr_columns), nr_columns, size)
+    if kind == 'fat-tree':
+        return fat_tree(size)
+    if kind == 'erdos-renyi':
+        # Default p gives an average degree of 4
+        return erdos_renyi(size, link_probability if link_probability is not None else min(1.0, 4.0 / max(1, size - 1)), seed)
+    if kind == 'scale-free':
+        return scale_free(size, 2, seed)
+    raise ValueError("Unknown topology kind {}".format(kind))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a generated topology in the topology.txt format.')
+    parser.add_argument('kind', choices=TOPOLOGY_KINDS, help='the kind of topology')
+    parser.add_argument('-n', '--size', type=int, required=True, help='the number of routers, or k for a fat-tree - a grid has a partial last row unless it is a square')
+    parser.add_argument('-o', '--output', default='topology.txt', help='the topology file written')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='the seed of the random topologies')
+    parser.add_argument('--ip', default=DEFAULT_IP, help='the ip address of every router')
+    parser.add_argument('--base_port', type=int, default=DEFAULT_BASE_PORT, help='the port of router 0, router n listens on base_port + n')
+    args = parser.parse_args()
+
+    links = generate(args.kind, args.size, args.seed)
+    write_topology(args.output, links, args.ip, args.base_port)
+    print("Wrote {} routers and {} links to {}".format(len(links), sum(map(len, links.values())) // 2, args.output))
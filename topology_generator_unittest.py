@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+from emulator import readtopology
+from topology_generator import TOPOLOGY_KINDS, fat_tree, generate, grid, ring, router_address, write_topology
+
+
+def is_connected(links):
+    ''' True if every router is reachable from router 0. '''
+    seen = {0}
+    frontier = [0]
+    for router in frontier:
+        for neighbor in links[router]:
+            if neighbor not in seen:
+                seen.add(neighbor)
+                frontier.append(neighbor)
+    return len(seen) == len(links)
+
+
+class TestTopologyGenerator(unittest.TestCase):
+
+    def assertSymmetric(self, links):
+        for router, neighbors in links.items():
+            self.assertEqual(neighbors, sorted(set(neighbors)))
+            self.assertNotIn(router, neighbors)
+            for neighbor in neighbors:
+                self.assertIn(router, links[neighbor])
+
+    def test_ring(self):
+        ''' Tests that every router of a ring has its two neighbors. '''
+        links = ring(10)
+        self.assertEqual(len(links), 10)
+        self.assertEqual({len(neighbors) for neighbors in links.values()}, {2})
+        self.assertEqual(links[0], [1, 9])
+
+    def test_grid(self):
+        ''' Tests that grid corners have 2 neighbors, other border routers 3 and inner routers 4. '''
+        links = grid(4, 5)
+        self.assertEqual(len(links), 20)
+        self.assertEqual(Counter(len(neighbors) for neighbors in links.values()), {2: 4, 3: 2 * (2 + 3), 4: 2 * 3})
+        self.assertEqual(links[6], [1, 5, 7, 11])
+
+    def test_generated_grid_size(self):
+        ''' Tests that a generated grid has exactly the routers asked for, the last row only partly filled if need be. '''
+        links = generate('grid', 10)
+        self.assertEqual(len(links), 10)
+        self.assertEqual(links[8], [4, 9])
+        self.assertTrue(is_connected(links))
+
+    def test_fat_tree(self):
+        ''' Tests that a k-ary fat-tree has (k/2)^2 core and k^2 pod switches, edge switches with k/2 links and the rest with k. '''
+        k = 4
+        links = fat_tree(k)
+        self.assertEqual(len(links), 5 * k * k // 4)
+        self.assertEqual(Counter(len(neighbors) for neighbors in links.values()), {k // 2: k * k // 2, k: (k // 2) ** 2 + k * k // 2})
+        with self.assertRaises(ValueError):
+            fat_tree(3)
+
+    def test_every_kind(self):
+        ''' Tests that every kind of topology has the routers asked for and is symmetric and connected. '''
+        sizes = {'ring': (12, 12), 'grid': (10, 10), 'fat-tree': (4, 20), 'erdos-renyi': (50, 50), 'scale-free': (50, 50)}
+        for kind in TOPOLOGY_KINDS:
+            size, nr_routers = sizes[kind]
+            links = generate(kind, size)
+            self.assertEqual(len(links), nr_routers, kind)
+            self.assertSymmetric(links)
+            self.assertTrue(is_connected(links), kind)
+        self.assertEqual(generate('erdos-renyi', 50, seed=3), generate('erdos-renyi', 50, seed=3))
+        with self.assertRaises(ValueError):
+            generate('star', 5)
+
+    def test_sparse_erdos_renyi_connected(self):
+        ''' Tests that a random graph too sparse to be connected by chance gets its components linked. '''
+        self.assertTrue(is_connected(generate('erdos-renyi', 100, link_probability=0.001)))
+
+    def test_write_topology_round_trip(self):
+        ''' Tests that a written topology reads back through readtopology as the same routers and neighbors. '''
+        links = generate('scale-free', 30)
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as topology:
+            pass
+        self.addCleanup(os.remove, topology.name)
+        write_topology(topology.name, links)
+
+        emulators = readtopology(topology.name)
+        self.assertEqual(len(emulators), len(links))
+        for router, (ip, port, neighbors) in enumerate(emulators):
+            self.assertEqual((ip, port), router_address(router))
+            self.assertEqual([neighbor.address for neighbor in neighbors], [router_address(neighbor) for neighbor in links[router]])
+            self.assertEqual({neighbor.cost for neighbor in neighbors}, {1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,14 @@
 import argparse
-import ipaddress
 import socket
 import logging
-import struct
-import datetime
 
 from emulator import EmulatorInProgress
+from packet_codec import P_HEADER_LEN, decode_header, ip_to_int, pack_header
 
 # Recieve Packet Enums
 NR_BYTES_ACCEPTED = 1024
 
 # Packet Header Enums - The value corresponds to what index in the packet the information is retrieved from
-P_HEADER_LEN = 29 # Note: packet header is 29 chars
 P_HEADER_TYPE = 0
 P_HEADER_ID = 1
 P_HEADER_SEQ_NR = 2
@@ -122,14 +119,13 @@ class Trace(EmulatorInProgress):
         # - src_address_port (source addresses port)
 
         # Encode IP addresses
-        trace_ip = int(ipaddress.IPv4Address(self.routetrace_addr[HOST]))
-        dest_ip = int(ipaddress.IPv4Address(self.dest_addr[HOST]))
+        trace_ip = ip_to_int(self.routetrace_addr[HOST])
+        dest_ip = ip_to_int(self.dest_addr[HOST])
 
         # Route trace packet
         if p_type == TRACE_PACKET:
             # Construct acknowledgement packet, increment sequence number and append list of neighbors
-            trace_pkt = struct.pack("!cIIIIIII",
-                                    TRACE_PACKET.encode(),
+            trace_pkt = pack_header(TRACE_PACKET.encode(),
                                     DEFAULT_ID,
                                     DEFAULT_SEQ_NR,
                                     ttl,
@@ -146,18 +142,10 @@ class Trace(EmulatorInProgress):
         return
 
     def deassemblepacket(self, packet):
-        header = struct.unpack("!cIIIIIII", packet[:P_HEADER_LEN])
+        # Unpack packet header - [type, id, seq #, TTL, [src ip, src port], [dest ip, dest port]]
+        header = decode_header(packet)
         data = packet[P_HEADER_LEN:].decode()
 
-        # Unpack packet header
-        p_type = header[P_HEADER_TYPE].decode()
-        p_ID = header[P_HEADER_ID]
-        p_seq_nr = header[P_HEADER_SEQ_NR]
-        TTL = header[P_HEADER_TTL]
-        src_addr = [socket.inet_ntoa(struct.pack('!L', header[P_HEADER_SRC_HOST])), header[P_HEADER_SRC_PORT]]
-        dest_addr = [socket.inet_ntoa(struct.pack('!L', header[P_HEADER_DEST_HOST])), header[P_HEADER_DEST_PORT]]
-        header = [p_type, p_ID, p_seq_nr, TTL, src_addr, dest_addr]
-
         return packet, header, data
 
 
@@ -0,0 +1,225 @@
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   IMPORTS                                                                              #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+import bisect
+import ctypes
+import ctypes.util
+import itertools
+import os
+import socket
+import struct
+import sys
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   ENUMERATIONS                                                                         #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+MAX_BATCH_SIZE = 64 # Note: the most datagrams handed to the kernel in one sendmmsg call
+MAX_BATCH_BYTES = MAX_BATCH_SIZE * 1024 # Note: size of the preallocated send buffer, a batch is split when its datagrams do not fit
+NATIVE_BATCH_MIN_SIZE = 12 # Note: smallest batch sent with sendmmsg - below it the ctypes call costs more than the system calls it saves
+
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+#                                                                   CLASSES / FUNCTIONS                                                                  #
+#--------------------------------------------------------------------------------------------------------------------------------------------------------#
+
+class _SockaddrIn(ctypes.Structure):
+    _fields_ = [('sin_family', ctypes.c_ushort), ('sin_port', ctypes.c_uint16), ('sin_addr', ctypes.c_uint32), ('sin_zero', ctypes.c_char * 8)]
+
+
+class _Iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _Msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32), ('msg_iov', ctypes.POINTER(_Iovec)),
+                ('msg_iovlen', ctypes.c_size_t), ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t), ('msg_flags', ctypes.c_int)]
+
+
+class _Mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _Msghdr), ('msg_len', ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    # Native sendmmsg(2) from libc - Linux only, the struct layouts above are Linux's. None where it is not available.
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        sendmmsg = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True).sendmmsg
+    except (OSError, AttributeError):
+        return None
+
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+SENDMMSG = _load_sendmmsg()
+IOVEC = struct.Struct("@PN") # Note: iov_base, iov_len of a struct iovec
+MSG_NAME = struct.Struct("@P") # Note: msg_name, the first field of a struct mmsghdr
+MMSGHDR_SIZE = ctypes.sizeof(_Mmsghdr)
+
+
+class SendmmsgBatch:
+    # Preallocated sendmmsg(2) arguments - every datagram of a batch is copied into one send buffer and described by
+    # its own message header and destination address, then the kernel sends them all in one system call.
+    # The arrays are filled through memoryviews with struct.pack_into, which is much cheaper than ctypes field access.
+    # The headers only depend on the sizes and destinations of the datagrams, so they are packed again only when those
+    # differ from the previous call's - a fan-out repeated to the same neighbors just copies the datagrams.
+
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, max_batch_bytes=MAX_BATCH_BYTES):
+        self.max_batch_size = max_batch_size
+        self.buffer = ctypes.create_string_buffer(max_batch_bytes)
+        self.buffer_addr = ctypes.addressof(self.buffer)
+        self.buffer_view = memoryview(self.buffer).cast('B')
+        self.msgs = (_Mmsghdr * max_batch_size)()
+        self.msgs_addr = ctypes.addressof(self.msgs)
+        self.msgs_view = memoryview(self.msgs).cast('B')
+        self.iovecs = (_Iovec * max_batch_size)()
+        self.iovecs_view = memoryview(self.iovecs).cast('B')
+        self.sockaddrs = {}  # (ip, port) -> (_SockaddrIn, its address), kept alive for the msg_name pointers
+        self.layout = None   # (datagram sizes, destinations) the headers were last packed for
+
+        for i in range(max_batch_size):
+            hdr = self.msgs[i].msg_hdr
+            hdr.msg_namelen = ctypes.sizeof(_SockaddrIn)
+            hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+            hdr.msg_iovlen = 1
+
+    def __sockaddr(self, addr):
+        sockaddr = self.sockaddrs.get(addr)
+        if sockaddr is None:
+            packed_ip = socket.inet_aton(socket.gethostbyname(addr[0]))
+            sockaddr_in = _SockaddrIn(socket.AF_INET, socket.htons(addr[1]), int.from_bytes(packed_ip, sys.byteorder))
+            sockaddr = self.sockaddrs[addr] = (sockaddr_in, ctypes.addressof(sockaddr_in))
+        return sockaddr[1]
+
+    def __pack_headers(self, sizes, addrs):
+        # Point the iovec of each datagram at its place in the send buffer and its header at its destination
+        offset = 0
+        for i, (size, addr) in enumerate(zip(sizes, addrs)):
+            IOVEC.pack_into(self.iovecs_view, i * IOVEC.size, self.buffer_addr + offset, size)
+            MSG_NAME.pack_into(self.msgs_view, i * MMSGHDR_SIZE, self.__sockaddr(addr))
+            offset += size
+        self.layout = (sizes, addrs)
+
+    def send(self, fd, batch):
+        # Send [(packet, (ip, port)), ...], returns the # of system calls made
+        nr_calls = 0
+        start = 0
+        while start < len(batch):
+            # As many datagrams as fit into the send buffer, at least one
+            packets, addrs = zip(*batch[start:start + self.max_batch_size])
+            sizes = tuple(map(len, packets))
+            nr_msgs = len(sizes)
+            if sum(sizes) > len(self.buffer_view):
+                nr_msgs = max(1, bisect.bisect_right(list(itertools.accumulate(sizes)), len(self.buffer_view)))
+                packets, addrs, sizes = packets[:nr_msgs], addrs[:nr_msgs], sizes[:nr_msgs]
+
+            data = b''.join(packets)
+            self.buffer_view[:len(data)] = data
+            if self.layout != (sizes, addrs):
+                self.__pack_headers(sizes, addrs)
+
+            # The kernel may send fewer datagrams than asked, the rest go in the next call
+            sent = 0
+            while sent < nr_msgs:
+                nr_sent = SENDMMSG(fd, self.msgs_addr + sent * MMSGHDR_SIZE, nr_msgs - sent, 0)
+                nr_calls += 1
+                if nr_sent < 0:
+                    error = ctypes.get_errno()
+                    raise OSError(error, os.strerror(error))
+                sent += nr_sent
+            start += nr_msgs
+        return nr_calls
+
+
+def count_sent(sent, packet):
+    # Add one datagram to a transport's {packet type (first byte): [# datagrams, # bytes]} counters
+    counter = sent.get(packet[0])
+    if counter is None:
+        counter = sent[packet[0]] = [0, 0]
+    counter[0] += 1
+    counter[1] += len(packet)
+
+
+def transport_stats(sent):
+    # {packet type: {'packets': #, 'bytes': #}} of everything a transport sent
+    return {chr(p_type): {'packets': counter[0], 'bytes': counter[1]} for p_type, counter in sent.items()}
+
+
+class UdpTransport:
+    # Datagram transport of one emulator over a real non-blocking UDP socket
+    #
+    # Every transport offers the same four calls to the protocol:
+    # - start(event_loop, on_packet)  on_packet(packet, addr) is called for each datagram received while the loop runs
+    # - sendto(packet, addr)          send one datagram to an (ip, port) address
+    # - send_batch(batch)             send [(packet, addr), ...] - one sendmmsg system call, or one sendto per datagram for small batches
+    # - close()
+    # and counts what it sends in get_stats() and the send calls it made in get_nr_send_calls()
+
+    def __init__(self, ip, port, recv_buffer_size, recv_buffer=None, native_batch=True, native_batch_min_size=NATIVE_BATCH_MIN_SIZE):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((ip, port))
+        self.sock.setblocking(False)
+        self.event_loop = None
+        self.on_packet = None
+        self.sent = {}  # Packet type (first byte) -> [# datagrams, # bytes] sent
+        self.nr_send_calls = 0  # System calls made to send
+
+        # A batch of native_batch_min_size datagrams or more is sent with one sendmmsg call where it is available and
+        # native_batch is set, anything else with one sendto per datagram
+        self.batch = SendmmsgBatch() if native_batch and SENDMMSG is not None else None
+        self.native_batch_min_size = native_batch_min_size
+
+        # Every datagram is received into the same buffer - nothing may keep a reference to it after on_packet.
+        # Transports sharing an event loop can share one buffer as only one packet is handled at a time.
+        self.recv_buffer = recv_buffer if recv_buffer is not None else bytearray(recv_buffer_size)
+        self.recv_view = memoryview(self.recv_buffer)
+
+    def get_sock(self):
+        return self.sock
+
+    def start(self, event_loop, on_packet):
+        self.event_loop = event_loop
+        self.on_packet = on_packet
+        event_loop.add_reader(self.sock, self.__receivepackets)
+
+    def __receivepackets(self, sock):
+        # Drain every datagram waiting on the socket into the preallocated receive buffer
+        while True:
+            try:
+                nr_bytes, addr = sock.recvfrom_into(self.recv_buffer)
+            except socket.error:
+                return
+
+            self.on_packet(self.recv_view[:nr_bytes], addr)
+
+    def sendto(self, packet, addr):
+        count_sent(self.sent, packet)
+        self.nr_send_calls += 1
+        self.sock.sendto(packet, addr)
+
+    def send_batch(self, batch):
+        for packet, _ in batch:
+            count_sent(self.sent, packet)
+
+        if self.batch is not None and len(batch) >= self.native_batch_min_size:
+            self.nr_send_calls += self.batch.send(self.sock.fileno(), batch)
+            return
+
+        for packet, addr in batch:
+            self.sock.sendto(packet, addr)
+        self.nr_send_calls += len(batch)
+
+    def get_stats(self):
+        return transport_stats(self.sent)
+
+    def get_nr_send_calls(self):
+        return self.nr_send_calls
+
+    def close(self):
+        if self.event_loop is not None:
+            self.event_loop.remove_reader(self.sock)
+            self.event_loop = None
+        self.sock.close()
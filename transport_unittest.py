@@ -0,0 +1,78 @@
+import socket
+import unittest
+
+from emulator import EmulatorInProgress
+from neighbor_table import Neighbor
+from transport import SENDMMSG, SendmmsgBatch, UdpTransport
+
+
+class TestSendBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.receivers = []
+        for _ in range(3):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(('127.0.0.1', 0))
+            sock.settimeout(1)
+            self.receivers.append(sock)
+
+    def assertBatchDelivered(self, transport, nr_per_receiver):
+        batch = [(bytes([ord('L'), i]) * (i + 1), receiver.getsockname()) for receiver in self.receivers for i in range(nr_per_receiver)]
+        sent = transport.get_stats().get('L', {'packets': 0, 'bytes': 0})
+        transport.send_batch(batch)
+
+        for receiver in self.receivers:
+            received = [receiver.recvfrom(1024)[0] for _ in range(nr_per_receiver)]
+            self.assertEqual(received, [packet for packet, addr in batch if addr == receiver.getsockname()])
+        self.assertEqual(transport.get_stats()['L'], {'packets': sent['packets'] + len(batch), 'bytes': sent['bytes'] + sum(len(packet) for packet, _ in batch)})
+
+    @unittest.skipIf(SENDMMSG is None, 'no native sendmmsg on this platform')
+    def test_native_batch_is_one_call(self):
+        ''' Tests that by default a large batch is delivered in order with a single sendmmsg call, also after its sizes changed. '''
+        transport = UdpTransport('127.0.0.1', 0, 1024)
+        self.assertBatchDelivered(transport, 6)
+        self.assertBatchDelivered(transport, 6)
+        self.assertBatchDelivered(transport, 7)
+        self.assertEqual(transport.get_nr_send_calls(), 3)
+        transport.close()
+
+    @unittest.skipIf(SENDMMSG is None, 'no native sendmmsg on this platform')
+    def test_native_batch_split_to_fit_send_buffer(self):
+        ''' Tests that a batch larger than the send buffer goes out in as many sendmmsg calls as it takes to fit. '''
+        transport = UdpTransport('127.0.0.1', 0, 1024)
+        transport.batch = SendmmsgBatch(max_batch_bytes=16)
+        self.assertBatchDelivered(transport, 4)
+        self.assertEqual(transport.get_nr_send_calls(), 5)  # Datagrams of 2, 4, 6 and 8 bytes per receiver, 16 bytes at a time
+        transport.close()
+
+    def test_small_batch_sends_each_datagram(self):
+        ''' Tests that every datagram of a batch smaller than NATIVE_BATCH_MIN_SIZE is sent with its own call. '''
+        transport = UdpTransport('127.0.0.1', 0, 1024)
+        self.assertBatchDelivered(transport, 3)
+        self.assertEqual(transport.get_nr_send_calls(), 9)
+        transport.close()
+
+    def test_fallback_batch_sends_each_datagram(self):
+        ''' Tests that without native_batch every datagram of a batch is sent with its own call. '''
+        transport = UdpTransport('127.0.0.1', 0, 1024, native_batch=False)
+        self.assertBatchDelivered(transport, 6)
+        self.assertEqual(transport.get_nr_send_calls(), 18)
+        transport.close()
+
+    def test_hellos_patched_per_neighbor(self):
+        ''' Tests that the batched hellos match hellos assembled one neighbor at a time. '''
+        neighbors = [Neighbor('10.0.0.{}'.format(i), 2000 + i, heard=i % 2 == 0) for i in range(5)]
+        emulator = EmulatorInProgress(True, '10.0.0.100', 2100, neighbors, emulator_id=7)
+
+        hellos = emulator.assemblehellos(10, emulator.get_neighbors())
+        self.assertEqual([addr for _, addr in hellos], [node.address for node in neighbors])
+        for (hello, _), node in zip(hellos, neighbors):
+            self.assertEqual(bytes(hello), emulator.assemblepacket('H', 10, [node.ip, node.port], int(node.heard)))
+
+    def tearDown(self):
+        for sock in self.receivers:
+            sock.close()
+
+
+if __name__ == '__main__':
+    unittest.main()